@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""Measure generation of gridworld specifications.
+
+Generates the specification of a random world with two trolls,
+and of a smaller world with Boolean cell variables.
+
+usage: python gridworld_spec.py [size]
+"""
+from __future__ import print_function
+import sys
+import time
+import numpy as np
+from tulip import gridworld as gw
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    np.random.seed(0)
+    Y = gw.random_world((n, n), wall_density=.2, num_init=1, num_goals=2)
+    trolls = [((n // 4, n // 4), 5), ((3 * n // 4, n // 2), 10)]
+    t0 = time.time()
+    spec = gw.add_trolls(Y, trolls, get_moves_lists=False)
+    t1 = time.time()
+    print('{n} x {n} with trolls: {t:.2f} sec, {m} clauses'.format(
+        n=n, t=t1 - t0, m=len(spec.sys_safety) + len(spec.env_safety)))
+    m = n // 5
+    Z = gw.random_world((m, m), wall_density=.2, num_init=1, num_goals=2)
+    t0 = time.time()
+    spec = Z.spec(nonbool=False)
+    t1 = time.time()
+    print('{m} x {m} Boolean: {t:.2f} sec, {k} characters'.format(
+        m=m, t=t1 - t0, k=sum(len(x) for x in spec.sys_safety)))
+
+
+if __name__ == '__main__':
+    main()
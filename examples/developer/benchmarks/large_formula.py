@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""Measure parsing, translation and flattening of a huge formula.
+
+The formula is a left-nested disjunction with C{n} operands,
+as produced for large transition systems, so the tree is
+about C{n} levels deep.
+
+usage: python large_formula.py [n]
+"""
+from __future__ import print_function
+import sys
+import time
+from tulip.spec import GRSpec
+from tulip.spec import translation as ts
+
+
+LANGS = ['gr1c', 'slugs', 'jtlv', 'promela', 'smv',
+         'python', 'numpy', 'wring']
+NVARS = 10
+
+
+def formula(n):
+    return ' | '.join(
+        '(x{i} & !x{j})'.format(i=i % NVARS, j=(i + 1) % NVARS)
+        for i in xrange(n))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10**5
+    env_vars = {'x{i}'.format(i=i): 'boolean' for i in xrange(NVARS)}
+    f = formula(n)
+    spec = GRSpec(env_vars=env_vars, env_safety=[f])
+    t0 = time.time()
+    spec.parse()
+    t1 = time.time()
+    print('{n} operands, parse: {t:.2f} sec'.format(n=n, t=t1 - t0))
+    tree = spec.ast(f)
+    for lang in LANGS:
+        t0 = time.time()
+        u = ts.translate_ast(tree, lang)
+        t1 = time.time()
+        s = u.flatten(env_vars=env_vars, sys_vars=dict())
+        t2 = time.time()
+        print(('{lang}: translate {a:.2f} sec, flatten {b:.2f} sec, '
+               '{m} characters').format(
+                   lang=lang, a=t1 - t0, b=t2 - t1, m=len(s)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Measure startup cost of the LTL parser in fresh processes.
+
+Compares parsing the first formula using the pregenerated
+PLY tables, with building the tables from the grammar,
+as happens in each new worker process without them.
+
+usage: python spec_startup.py [repetitions]
+"""
+from __future__ import print_function
+import subprocess
+import sys
+
+
+FORMULA = '[]<>(x & (y -> X z)) && (a = 1 U b)'
+CODE = """
+import time
+t0 = time.time()
+from tulip.spec import lexyacc
+t1 = time.time()
+{setup}
+p = lexyacc.shared_parser()
+p.parse({formula!r})
+t2 = time.time()
+print('{{a}} {{b}}'.format(a=t1 - t0, b=t2 - t1))
+"""
+# nonexistent table module, so PLY builds the tables
+NO_TABLES = "lexyacc.Parser.tabmodule = 'no_such_parsetab'"
+
+
+def measure(setup, n):
+    """Return minimum import and first parse times of C{n} runs."""
+    imports = list()
+    parses = list()
+    code = CODE.format(setup=setup, formula=FORMULA)
+    for i in xrange(n):
+        out = subprocess.check_output([sys.executable, '-c', code])
+        a, b = out.split()
+        imports.append(float(a))
+        parses.append(float(b))
+    return min(imports), min(parses)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, setup in [('pregenerated tables', ''),
+                        ('built tables', NO_TABLES)]:
+        t_import, t_parse = measure(setup, n)
+        print('{name}: import {a:.1f} ms, first parse {b:.1f} ms'.format(
+            name=name, a=1e3 * t_import, b=1e3 * t_parse))
+
+
+if __name__ == '__main__':
+    main()
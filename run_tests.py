@@ -183,6 +183,8 @@ def main():
             'form_test',
             'gr1_test',
             'omega_interface_test',
+            'pool_test',
+            'procloop_test',
             'spec_test',
             'synth_test',
             'transform_test',
@@ -195,6 +197,7 @@ def main():
             'version_test',
             'gridworld_test']
         hybrid = [
+            'abstract_geometry_test',
             'abstract_test',
             'hybrid_test',
             'prop2part_test']
@@ -29,7 +29,7 @@ classifiers = [
     'Programming Language :: Python :: 2.7',
     'Topic :: Scientific/Engineering']
 package_data = {
-    'tulip.spec': ['parsetab.py']}
+    'tulip.spec': ['ltl_parsetab.py']}
 
 
 def package_jtlv():
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Tests for abstract._geometry
+"""
+import polytope as pc
+from tulip.abstract import _geometry as geom
+
+
+def key_test():
+    p = pc.box2poly([[0., 1.], [0., 2.]])
+    q = pc.Polytope(2 * p.A, 2 * p.b)
+    assert geom.key(p) == geom.key(q)
+    assert geom.key(p) == geom.key(p.copy())
+    r = pc.box2poly([[0., 1.], [0., 3.]])
+    assert geom.key(p) != geom.key(r)
+    assert geom.key(pc.Region([p, r])) == (geom.key(p), geom.key(r))
+
+
+def cache_test():
+    geom.clear()
+    p = pc.box2poly([[0., 1.], [0., 2.]])
+    rc, xc = geom.cheby_ball(p)
+    assert abs(rc - 0.5) < 1e-7, rc
+    assert p._chebR == rc
+    v = geom.volume(p)
+    assert abs(v - 2.) < 0.1, v
+    l, u = geom.bounding_box(p)
+    assert (l.flatten() == [0., 0.]).all()
+    assert (u.flatten() == [1., 2.]).all()
+    # a new polytope with the same constraints shares the attributes
+    q = pc.Polytope(p.A.copy(), p.b.copy())
+    assert geom.volume(q) == v
+    assert geom.cheby_ball(q)[0] == rc
+    assert q._volume == v
+    n = len(geom._cache)
+    assert n == 3, geom._cache.keys()
+    # invalidation
+    geom.clear()
+    assert not geom._cache
+    geom.cheby_ball(q)
+    assert len(geom._cache) == 1
+    # regions
+    r = pc.Region([p, pc.box2poly([[1., 2.], [0., 1.]])])
+    rc, xc = geom.cheby_ball(r)
+    assert abs(rc - 0.5) < 1e-7, rc
+    assert len(geom._cache) == 2
+    geom.clear()
+
+
+def copies_test():
+    geom.clear()
+    p = pc.box2poly([[0., 1.], [0., 2.]])
+    q = pc.Polytope(p.A.copy(), p.b.copy())
+    rc, xc = geom.cheby_ball(p)
+    center = xc.copy()
+    l, u = geom.bounding_box(p)
+    # modifying the attributes of one polytope leaves the others intact
+    xc[:] = 10.
+    l[:] = 10.
+    rc, yc = geom.cheby_ball(q)
+    assert (yc == center).all(), (yc, center)
+    l, u = geom.bounding_box(q)
+    assert (l.flatten() == [0., 0.]).all(), l
+    geom.clear()
+
+
+def max_size_test():
+    geom.clear()
+    size = geom.MAX_SIZE
+    try:
+        geom.MAX_SIZE = 2
+        boxes = [pc.box2poly([[0., i], [0., 1.]]) for i in (1., 2., 3.)]
+        for p in boxes:
+            geom.cheby_ball(p)
+        assert len(geom._cache) == 2
+        # least recently used is evicted
+        assert ('cheby_ball', geom.key(boxes[0])) not in geom._cache
+        geom.cheby_ball(boxes[1])
+        geom.bounding_box(boxes[0])
+        assert ('cheby_ball', geom.key(boxes[1])) in geom._cache
+        assert ('cheby_ball', geom.key(boxes[2])) not in geom._cache
+    finally:
+        geom.MAX_SIZE = size
+        geom.clear()
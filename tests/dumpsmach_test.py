@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 """Tests for the export mechanisms of tulip.dumpsmach."""
 import logging
+import os
+import shutil
+import tempfile
 
 import networkx as nx
 from nose.tools import assert_raises
@@ -47,6 +50,14 @@ class basic_test:
                      +'\nM = TulipStrategy(); M.move()',
                      filename="<string>", mode="exec")
 
+    def test_python_table(self):
+        for m in (self.triv_M, self.dcounter_M):
+            compile(dumpsmach.python_table(m),
+                    filename="<string>", mode="exec")
+        exec compile(dumpsmach.python_table(self.enumf_M)
+                     +'\nM = TulipStrategy(); M.move()',
+                     filename="<string>", mode="exec")
+
 
 def test_nx():
     g = nx.DiGraph()
@@ -74,3 +85,88 @@ def test_nx():
     # dead-end
     with assert_raises(Exception):
         m.move(a=1, b=0)
+
+
+def _nx_machine():
+    g = nx.DiGraph()
+    g.inputs = {'a': '...', 'b': '...'}
+    g.outputs = {'c': '...', 'd': '...'}
+    start = 'Sinit'
+    g.add_edge(start, 0, a=0, b=0, c=0, d=0)
+    g.add_edge(0, 1, a=0, b=1, c=0, d=1)
+    g.add_edge(1, 2, a=1, b=0, c=1, d=1)
+    return g
+
+
+def _check_table_machine(m):
+    # same behavior as `test_nx`
+    assert m.move(a=0, b=0) == dict(c=0, d=0)
+    assert m.move(a=0, b=1) == dict(c=0, d=1)
+    with assert_raises(ValueError):
+        m.move(a=1, b=1)
+    assert m.move(a=1, b=0) == dict(c=1, d=1)
+    with assert_raises(Exception):
+        m.move(a=1, b=0)
+
+
+def test_nx_table():
+    g = _nx_machine()
+    ns = dict()
+    exec dumpsmach.python_table(g, classname='Machine', start='Sinit') in ns
+    Machine = ns['Machine']
+    _check_table_machine(Machine())
+    # batch of moves
+    m = Machine()
+    x = [tuple(d[k] for k in m.input_vars)
+         for d in (dict(a=0, b=0), dict(a=0, b=1))]
+    out = m.move_many(x)
+    assert out == [dict(c=0, d=0), dict(c=0, d=1)], out
+    # state is kept after an invalid input
+    with assert_raises(ValueError):
+        m.move_many([x[0]])
+    assert m.move(a=1, b=0) == dict(c=1, d=1)
+
+
+def test_nx_table_missing_input():
+    # input `b` is missing from some labels, so any value matches
+    g = nx.DiGraph()
+    g.inputs = {'a': {0, 1}, 'b': {0, 1, 2}}
+    g.outputs = {'c': {0, 1}}
+    g.add_edge('Sinit', 0, a=0, c=0)
+    g.add_edge(0, 1, a=0, b=1, c=1)
+    g.add_edge(0, 2, a=0, c=0)
+    g.add_edge(2, 0, b=2, c=1)
+    for export in (dumpsmach.python_case, dumpsmach.python_table):
+        ns = dict()
+        exec export(g, classname='Machine', start='Sinit') in ns
+        m = ns['Machine']()
+        assert m.move(a=0, b=2) == dict(c=0)
+        # first matching edge wins
+        assert m.move(a=0, b=1) == dict(c=1)
+        # dead-end
+        with assert_raises(Exception):
+            m.move(a=0, b=0)
+        m = ns['Machine']()
+        m.move(a=0, b=0)
+        assert m.move(a=0, b=0) == dict(c=0)
+        assert m.move(a=1, b=2) == dict(c=1)
+        with assert_raises(ValueError):
+            m.move(a=1, b=2)
+
+
+def test_nx_table_sidecar():
+    g = _nx_machine()
+    d = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(d, 'machine.py')
+        dumpsmach.write_python_table(
+            fname, g, classname='Machine', sidecar=True)
+        assert os.path.isfile(os.path.join(d, 'machine.npy'))
+        with open(fname) as f:
+            code = f.read()
+        assert 'mmap_mode' in code
+        ns = dict()
+        exec code in ns
+        _check_table_machine(ns['Machine']())
+    finally:
+        shutil.rmtree(d)
@@ -4,6 +4,7 @@ import logging
 logging.basicConfig(level=logging.ERROR)
 logging.getLogger('ltl_parser_log').setLevel(logging.WARNING)
 import nose.tools as nt
+import numpy as np
 from tulip.spec.form import LTL, GRSpec, replace_dependent_vars
 
 
@@ -123,6 +124,27 @@ def test_str_to_int():
     assert s._bool_int[x] == "( ( X a ) = 0 )"
 
 
+def test_shared_ast():
+    sys_vars = {'a': ['hehe', 'haha'], 'b': 'boolean'}
+    s = GRSpec(sys_vars=sys_vars,
+               sys_safety=['b -> X(a = "haha")', '!b -> X(a = "haha")'])
+    t = GRSpec(sys_vars=sys_vars, sys_prog=['a = "haha"'])
+    s.parse()
+    t.parse()
+    u = s.ast('b -> X(a = "haha")').operands[1].operands[0]
+    assert u is s.ast('!b -> X(a = "haha")').operands[1].operands[0]
+    assert u is t.ast('a = "haha"')
+    s.str_to_int()
+    f = s._bool_int['!b -> X(a = "haha")']
+    assert f == '( ( ! b ) -> ( X ( a = 1 ) ) )', f
+    # substitution leaves cached ASTs unchanged
+    d = s.sub_values(dict(b=False))
+    assert d['b -> X(a = "haha")'].flatten() == (
+        '( False -> ( X ( a = haha ) ) )')
+    assert s.ast('b -> X(a = "haha")').flatten() == (
+        '( b -> ( X ( a = haha ) ) )')
+
+
 def test_compile_init():
     env_vars = {'x': (0, 0), 'y': (0, 0), 'z': (0, 1)}
     sys_vars = {'w': (0, 0)}
@@ -138,6 +160,64 @@ def test_compile_init():
     assert eval(code, d)
     d = dict(x=0, y=0, z=0, w=1)
     assert not eval(code, d)
+    # vectorized
+    code = spc.compile_init(no_str=True, vectorized=True)
+    d = dict(x=np.array([0, 0, 0]), y=np.array([0, 1, 0]),
+             z=np.array([0, 1, 0]), w=np.array([0, 0, 1]))
+    r = eval(code, {'numpy': np}, d)
+    assert r.tolist() == [True, True, False], r
+
+
+def test_compile_init_vectorized_bool():
+    spc = GRSpec(
+        env_vars={'a': 'boolean'}, sys_vars={'s': ['on', 'off']},
+        env_init=['!a -> (1 = 2)'], sys_init=['s = "off" <-> a'])
+    code = spc.compile_init(no_str=True, vectorized=True)
+    a = np.array([False, False, True, True])
+    s = np.array([0, 1, 0, 1])
+    r = eval(code, {'numpy': np}, dict(a=a, s=s))
+    code = spc.compile_init(no_str=True)
+    r_ = [eval(code, dict(a=x, s=y)) for x, y in zip(a, s)]
+    assert r.tolist() == r_, (r, r_)
+
+
+def test_compile_vectorized():
+    spc = GRSpec(
+        env_vars={'a': 'boolean'},
+        sys_vars={'x': (0, 3), 's': ['on', 'off']},
+        env_init=['a'], sys_init=['x = 0'],
+        sys_safety=['(x < 3) -> (X(x) = x + 1)', 'a -> X(s = "on")'],
+        sys_prog=['x = 3', 's = "off" & !a', 'True'])
+    a = np.array([True, True, False])
+    x = np.array([0, 3, 2])
+    s = np.array([1, 0, 1])
+    f = spc.compile_vectorized('sys_init')
+    r = f(dict(x=x))
+    assert r.tolist() == [True, False, False], r
+    f = spc.compile_vectorized('env_init')
+    assert f(dict(a=a)).tolist() == [True, True, False]
+    # safety
+    f = spc.compile_vectorized('sys_safety')
+    r = f(dict(a=a, x=x, s=s),
+          dict(x=np.array([1, 0, 2]), s=np.array([0, 1, 1])))
+    assert r.tolist() == [True, False, False], r
+    with nt.assert_raises(ValueError):
+        f(dict(a=a, x=x, s=s))
+    # goals
+    f = spc.compile_vectorized('sys_prog', each=True)
+    r = f(dict(a=a, x=x, s=s))
+    assert r.shape == (3, 3), r.shape
+    assert r.tolist() == [[False, True, False],
+                          [False, False, True],
+                          [True, True, True]], r
+    # strings
+    f = spc.compile_vectorized('sys_prog', no_str=False, each=True)
+    s = np.array(['off', 'on', 'off'])
+    r = f(dict(a=a, x=x, s=s))
+    assert r[1].tolist() == [False, False, True], r
+    # empty part
+    f = spc.compile_vectorized('env_prog')
+    assert f(dict(a=a)).tolist() == [True, True, True]
 
 
 def test_replace_dependent_vars():
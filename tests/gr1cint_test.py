@@ -8,8 +8,12 @@ logging.getLogger('tulip.spec.lexyacc').setLevel(logging.WARNING)
 import networkx as nx
 from nose.tools import raises
 import os
+import shutil
+import StringIO
+import tempfile
 from tulip.spec import GRSpec, translate
 from tulip.interfaces import gr1c
+from tulip.interfaces import _jsonstream
 
 
 REFERENCE_SPECFILE = """
@@ -157,16 +161,25 @@ class basic_test:
 
 class GR1CSession_test:
     def setUp(self):
-        self.spec_filename = "trivial_partwin.spc"
-        with open(self.spec_filename, "w") as f:
-            f.write(REFERENCE_SPECFILE)
-        self.gs = gr1c.GR1CSession("trivial_partwin.spc",
-                                   env_vars=["x", "ze"],
-                                   sys_vars=["y", "zs"])
+        # `tearDown` is not called if `setUp` fails,
+        # so remove the spec file here in that case
+        self.tmpdir = tempfile.mkdtemp()
+        self.spec_filename = os.path.join(self.tmpdir, "trivial_partwin.spc")
+        try:
+            with open(self.spec_filename, "w") as f:
+                f.write(REFERENCE_SPECFILE)
+            self.gs = gr1c.GR1CSession(self.spec_filename,
+                                       env_vars=["x", "ze"],
+                                       sys_vars=["y", "zs"])
+        except:
+            shutil.rmtree(self.tmpdir)
+            raise
 
     def tearDown(self):
-        self.gs.close()
-        os.remove(self.spec_filename)
+        try:
+            self.gs.close()
+        finally:
+            shutil.rmtree(self.tmpdir)
 
     def test_numgoals(self):
         assert self.gs.numgoals() == 3
@@ -187,6 +200,12 @@ class GR1CSession_test:
         assert self.gs.iswinning({"x": 1, "y": 1, "ze": 0, "zs": 0})
         assert not self.gs.iswinning({"x": 1, "y": 1, "ze": 0, "zs": 1})
 
+    def test_iswinning_many(self):
+        states = [{"x": 1, "y": 1, "ze": 0, "zs": 0},
+                  {"x": 1, "y": 1, "ze": 0, "zs": 1}]
+        assert self.gs.iswinning_many(states) == [True, False]
+        assert self.gs.iswinning_many(2000 * states) == 2000 * [True, False]
+
     def test_env_next(self):
         assert (self.gs.env_next({"x": 1, "y": 1, "ze": 0, "zs": 0}) ==
                 [{'x': 0, 'ze': 0}, {'x': 1, 'ze': 0}])
@@ -247,6 +266,54 @@ def test_load_aut_json():
     assert h_edges == g_edges, (h_edges, g_edges)
 
 
+def test_load_aut_json_stream():
+    # small chunks split tokens and numbers
+    f = StringIO.StringIO(REFERENCE_AUTJSON_smallbool)
+    stream = list(_jsonstream.iterparse(f, 'nodes', chunk_size=3))
+    keys = [k for k, _ in stream]
+    assert keys[:6] == [
+        ('version',), ('gr1c',), ('date',), ('extra',),
+        ('ENV',), ('SYS',)], keys
+    assert keys[6:] == [
+        ('nodes', '0x1E8FA40'), ('nodes', '0x1E8FA00'),
+        ('nodes', '0x1E8F990')], keys
+    d = dict(stream)
+    assert d[('version',)] == 1, d
+    assert d[('nodes', '0x1E8F990')]['state'] == [0, 1], d
+    g = gr1c.load_aut_json(StringIO.StringIO(REFERENCE_AUTJSON_smallbool))
+    h = gr1c.load_aut_json(REFERENCE_AUTJSON_smallbool)
+    assert set(g.edges_iter()) == set(h.edges_iter())
+    assert g.node['0x1E8FA40']['state'] == dict(x=0, y=0), g.node
+
+
+def test_jsonstream_numbers():
+    # numbers split across chunks of any size
+    s = ('{"version": 10, "nodes": {"a": 1.5, "b": [15e2, -2.25E-1], '
+         '"c": "x", "d": 123, "e": true}}')
+    expected = {('version',): 10, ('nodes', 'a'): 1.5,
+                ('nodes', 'b'): [1500.0, -0.225], ('nodes', 'c'): 'x',
+                ('nodes', 'd'): 123, ('nodes', 'e'): True}
+    for n in (1, 2, 3, 4, 1000):
+        f = StringIO.StringIO(s)
+        d = dict(_jsonstream.iterparse(f, 'nodes', chunk_size=n))
+        assert d == expected, (n, d)
+
+
+def test_load_aut_json_shared_states():
+    s = REFERENCE_AUTJSON_smallbool.replace('[1, 1]', '[0, 0]')
+    g = gr1c.load_aut_json(s)
+    u = g.node['0x1E8FA40']['state']
+    v = g.node['0x1E8FA00']['state']
+    assert u == dict(x=0, y=0), u
+    assert u is v
+    assert g.node['0x1E8FA00']['mode'] == 1
+
+
+@raises(ValueError)
+def test_load_aut_json_version():
+    gr1c.load_aut_json('{"version": 0, "ENV": [], "SYS": [], "nodes": {}}')
+
+
 @raises(ValueError)
 def synth_init_illegal_check(init_option):
     spc = GRSpec(moore=False, plus_one=False, qinit=init_option)
@@ -65,3 +65,27 @@ class basic_test(object):
         assert len(g.env_vars) == 0
         assert len(g.sys_vars) == 1 and 'y' in g.sys_vars
         assert len(g) == 2, [g.nodes(data=True), g.edges(data=True)]
+
+
+def test_session_pool():
+    spec = GRSpec(
+        env_vars='x',
+        sys_vars='y',
+        env_prog='!x',
+        sys_safety=["x -> (y' <-> y)"],
+        sys_prog=['y', '!y'],
+        moore=False,
+        plus_one=False,
+        qinit='\A \E')
+    with gr1py.session_pool(spec, size=3, timeout=10) as pool:
+        assert pool.call('numgoals') == 2
+        states = [dict(x=x, y=y) for x in (0, 1) for y in (0, 1)]
+        answers = pool.map('iswinning', [(s,) for s in states])
+        assert answers == [True] * len(states), answers
+        moves = pool.call('env_next', dict(x=1, y=1))
+        assert sorted(moves) == [dict(x=0), dict(x=1)], moves
+        moves = pool.call('sys_nexta', dict(x=1, y=1), dict(x=0))
+        assert moves == [dict(y=1)], moves
+        moves = pool.call('sys_nexta', dict(x=0, y=1), dict(x=1))
+        assert len(moves) == 2, moves
+    assert pool.restarts == 0
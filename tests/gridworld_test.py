@@ -1,6 +1,7 @@
 """Tests for the tulip.gridworld."""
 import numpy as np
 import tulip.gridworld as gw
+from tulip import synth
 from tulip.synth import is_realizable
 
 
@@ -158,6 +159,63 @@ class GridWorld_test(object):
         spec.qinit = r'\A \E'
         assert is_realizable('omega', spec)
 
+    def test_spec_bool_mutex(self):
+        spec = self.X.spec(nonbool=False)
+        f = spec.compile_vectorized('sys_safety')
+        names = sorted(spec.sys_vars)
+        var = lambda i, j: self.X.__getitem__((i, j), nonbool=False)
+        n = len(names)
+        (i, j) = (3, 1)
+        assert self.X.is_empty((i, j))
+        cell = names.index(var(i, j))
+        cur = {v: np.zeros(1, dtype=bool) for v in names}
+        cur[var(i, j)][0] = True
+        # one-hot rows, the all-false row, and two cells at once
+        nxt = np.vstack([np.eye(n, dtype=bool), np.zeros(n, dtype=bool)])
+        two = np.zeros(n, dtype=bool)
+        two[cell] = True
+        two[names.index(var(i, j + 1))] = True
+        nxt = np.vstack([nxt, two])
+        r = f({v: np.repeat(cur[v], len(nxt)) for v in names},
+              {v: nxt[:, k] for k, v in enumerate(names)})
+        allowed = {var(i, j), var(i - 1, j), var(i + 1, j),
+                   var(i, j - 1), var(i, j + 1)}
+        expected = [v in allowed for v in names] + [False, False]
+        assert r.tolist() == expected, (r, expected)
+
+    def test_cell_formulas(self):
+        for nonbool in (True, False):
+            for use_next in (True, False):
+                c = self.X._cell_formulas(use_next=use_next,
+                                          nonbool=nonbool)
+                assert c[2][7] == self.X.__getitem__(
+                    (2, 7), use_next=use_next, nonbool=nonbool)
+
+    def test_to_fts(self):
+        ts = self.X.to_fts()
+        (n, m) = self.X.size()
+        free = [(i, j) for i in range(n) for j in range(m)
+                if self.X.is_empty((i, j))]
+        assert len(ts) == len(free)
+        adj = self.X.adjacency()
+        assert adj.nnz == len(ts.transitions())
+        for (i, j) in free:
+            u = i * m + j
+            post = {(v / m, v % m) for v in ts.states.post(u)}
+            moves = {(i + a, j + b) for a, b in
+                     [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]}
+            assert post == moves.intersection(free), (i, j, post)
+        assert set(ts.states.initial) == {
+            i * m + j for i, j in self.X.init_list}
+        (i, j) = self.X.goal_list[0]
+        assert ts.node[i * m + j]['ap'] == {'goal_0'}
+        ts.owner = 'sys'
+        spec = synth.sys_to_spec(ts, False, 'loc', compact=True)
+        spec.moore = False
+        spec.plus_one = False
+        spec.qinit = r'\A \E'
+        assert is_realizable('omega', spec)
+
     def check_is_empty(self, coord, expected):
         assert self.X.is_empty(coord) == expected
 
@@ -275,6 +333,17 @@ class RandomWorld_test(object):
 RandomWorld_test.slow = True
 
 
+def random_world_feasible_test():
+    size = (30, 40)
+    Z = gw.random_world(size, wall_density=.3, num_init=3, num_goals=3,
+                        ensure_feasible=True)
+    assert (Z.W == 1).sum() == int(np.round(.3 * size[0] * size[1]))
+    points = Z.init_list + Z.goal_list
+    assert len(set(points)) == len(points)
+    for p in points:
+        assert Z.is_reachable(points[0], p)
+
+
 def extract_coord_check(label, expected_coord):
     assert gw.extract_coord(label) == expected_coord
 
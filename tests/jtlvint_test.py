@@ -3,6 +3,10 @@
 Tests for the interface with JTLV.
 """
 
+import os
+import shutil
+import tempfile
+
 import networkx as nx
 import nose.tools as nt
 from tulip.spec import GRSpec
@@ -82,3 +86,24 @@ def hash_question_mark_test():
                    moore=False, plus_one=False, qinit='\A \E')
     with nt.assert_raises(ValueError):
         jtlv.synthesize(specs)
+
+
+def create_files_test():
+    spec = GRSpec(env_vars="x", sys_vars="y",
+                  env_init="x", sys_prog="y",
+                  moore=False, plus_one=False)
+    d = tempfile.mkdtemp()
+    try:
+        fSMV, fLTL, fAUT = jtlv.create_files(spec, d)
+        assert all(os.path.dirname(f) == d for f in (fSMV, fLTL, fAUT))
+        with open(fSMV) as f:
+            assert f.read() == jtlv.generate_jtlv_smv(spec)
+        with open(fLTL) as f:
+            assert f.read() == jtlv.generate_jtlv_ltl(spec)
+        # translation reused, until the spec changes
+        r = jtlv._translate(spec)
+        assert jtlv._translate(spec) is r
+        spec.sys_prog.append('!y')
+        assert jtlv._translate(spec) is not r
+    finally:
+        shutil.rmtree(d)
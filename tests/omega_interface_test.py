@@ -150,6 +150,129 @@ def test_is_circular_false():
     assert not triv, triv
 
 
+def test_session_reuse():
+    sp = grspec_1()
+    s = omega_int._session(sp, False)
+    assert omega_int._session(grspec_1(), False) is s
+    assert omega_int.is_realizable(sp)
+    win = s._win
+    assert win is not None
+    h = omega_int.synthesize_enumerated_streett(sp)
+    assert h is not None
+    # solved once
+    assert s._win is win
+    # no env liveness
+    assert omega_int.is_circular(sp)
+    assert s._win is win
+    # different spec, different session
+    sp.sys_prog = ['y = 1']
+    assert omega_int._session(sp, False) is not s
+    omega_int.clear_sessions()
+    assert not omega_int._sessions
+    # changing the spec in place does not change the cached session
+    sp = grspec_1()
+    s = omega_int._session(sp, False)
+    sp.sys_prog.append('False')
+    sp.env_vars['x'] = (0, 1)
+    assert s.spec is not sp
+    assert s.spec.sys_prog == grspec_1().sys_prog, s.spec.sys_prog
+    assert s.spec.env_vars == grspec_1().env_vars, s.spec.env_vars
+    assert omega_int._session(grspec_1(), False) is s
+    omega_int.clear_sessions()
+
+
+def test_session_cache_size():
+    size = omega_int.SESSION_CACHE_SIZE
+    try:
+        omega_int.SESSION_CACHE_SIZE = 0
+        sp = grspec_1()
+        assert omega_int.is_realizable(sp)
+        assert not omega_int._sessions
+        assert omega_int._session(sp, False) is not omega_int._session(
+            sp, False)
+    finally:
+        omega_int.SESSION_CACHE_SIZE = size
+
+
+def test_session_add():
+    sp = grspec_0()
+    s = omega_int.Session(sp)
+    assert s.is_realizable()
+    s.add(sys_init='y', sys_safety=["y'"])
+    assert s.spec.sys_safety == ["x' -> y'", "y'"], s.spec.sys_safety
+    assert sp.sys_safety == ["x' -> y'"], sp.sys_safety
+    # `!y` is no longer reachable
+    assert s._win is None
+    assert not s.is_realizable()
+    assert s.synthesize() is None
+    # compare with compiling from scratch
+    sp.sys_init = ['y']
+    sp.sys_safety.append("y'")
+    assert not omega_int.Session(sp).is_realizable()
+    with nt.assert_raises(ValueError):
+        s.add(foo='x')
+
+
+def test_session_add_prog():
+    f = form.GRSpec()
+    f.sys_vars['y'] = 'bool'
+    s = omega_int.Session(f)
+    assert s.is_realizable()
+    s.add(sys_prog=['y', '!y'])
+    h = s.synthesize()
+    assert h is not None
+    values = {d['state']['y'] for _, d in h.nodes_iter(data=True)}
+    assert values == {True, False}, values
+    s.add(sys_safety="y'")
+    assert not s.is_realizable()
+
+
+def test_symbolic_mealy_int():
+    sp = grspec_1()
+    m = omega_int.synthesize_symbolic(sp)
+    assert isinstance(m, omega_int.SymbolicMealy), m
+    assert set(m.inputs) == {'x'}, m.inputs
+    assert set(m.outputs) == {'y'}, m.outputs
+    xs = [0, 3, 4, 1, 1, 2]
+    states, outputs = m.run(input_sequences=dict(x=xs))
+    assert outputs == dict(y=xs), outputs
+    assert len(states) == len(xs), states
+    d = dict(states[-1])
+    assert d['x'] == 2 and d['y'] == 2, d
+    with nt.assert_raises(ValueError):
+        m.reaction('Sinit', dict())
+    # lazy picks missing inputs
+    u, out = m.reactionpart(states[0], dict())
+    assert dict(u)['y'] == out['y'], (u, out)
+
+
+def test_symbolic_mealy_strings():
+    sp = grspec_4()
+    m = synth.synthesize('omega', sp, symbolic=True)
+    assert isinstance(m, omega_int.SymbolicMealy), m
+    u, out = m.reaction('Sinit', dict(x=0))
+    assert out == dict(y='a'), out
+    u, out = m.reaction(u, dict(x=2))
+    assert out == dict(y='b'), out
+    # env_init violated
+    with nt.assert_raises(Exception):
+        m.reaction('Sinit', dict(x=1))
+    # compare with enumerated machine
+    mealy = synth.synthesize('omega', sp)
+    xs = [0, 1, 2, 0]
+    _, out = m.run(input_sequences=dict(x=xs))
+    _, out_ = mealy.run(input_sequences=dict(x=xs))
+    assert out == out_, (out, out_)
+    with nt.assert_raises(ValueError):
+        synth.synthesize('gr1py', sp, symbolic=True)
+
+
+def test_symbolic_mealy_unrealizable():
+    sp = grspec_0()
+    sp.sys_prog = ['False']
+    assert omega_int.synthesize_symbolic(sp) is None
+
+
 def grspec_0():
     sp = form.GRSpec()
     sp.moore = False
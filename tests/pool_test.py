@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Tests for tulip.interfaces.pool."""
+import threading
+
+from nose.tools import assert_raises
+
+from tulip.interfaces import pool
+
+
+class FakeSession(object):
+    """Session whose queries can block until killed."""
+
+    started = 0
+
+    def __init__(self):
+        FakeSession.started += 1
+        self.killed = threading.Event()
+
+    def double(self, x):
+        return 2 * x
+
+    def hang(self):
+        self.killed.wait()
+        raise EOFError('killed')
+
+    def crash(self):
+        raise IOError('broken pipe')
+
+    def fail(self):
+        raise ValueError('bad query')
+
+    def kill(self):
+        self.killed.set()
+
+    def close(self):
+        pass
+
+
+def test_call():
+    cleaned = list()
+    p = pool.SessionPool(FakeSession, size=2,
+                         cleanup=lambda: cleaned.append(True))
+    assert p.call('double', 3) == 6
+    assert p.map('double', [(i,) for i in xrange(10)]) == range(0, 20, 2)
+    r = p.submit('double', x=4)
+    assert r.result() == 8
+    assert r.done()
+    p.close()
+    assert cleaned == [True]
+    with assert_raises(ValueError):
+        p.submit('double', 1)
+
+
+def test_errors():
+    with pool.SessionPool(FakeSession, size=1) as p:
+        # errors of queries are raised to the caller
+        with assert_raises(ValueError):
+            p.call('fail')
+        assert p.restarts == 0
+        # broken sessions are replaced
+        with assert_raises(IOError):
+            p.call('crash')
+        assert p.restarts == 1
+        assert p.call('double', 1) == 2
+
+
+def test_timeout():
+    FakeSession.started = 0
+    with pool.SessionPool(FakeSession, size=1, timeout=0.1) as p:
+        assert FakeSession.started == 1
+        with assert_raises(pool.Timeout):
+            p.call('hang')
+        # the session was killed and replaced
+        assert p.call('double', 2) == 4
+        assert p.restarts == 1
+        assert FakeSession.started == 2
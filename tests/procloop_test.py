@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Tests for tulip.interfaces.procloop, using a fake solver."""
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+
+from nose.tools import assert_raises
+
+from tulip.interfaces import gr1c, procloop
+from tulip.spec import GRSpec
+
+
+FAKE_GR1C = """#!{python}
+import os
+import sys
+import time
+if '-V' in sys.argv:
+    print('gr1c 0.10.2')
+    sys.exit(0)
+spec = sys.stdin.read()
+time.sleep(float(os.environ.get('FAKE_GR1C_SLEEP', 0)))
+if 'unrealizable' in spec:
+    sys.exit(1)
+if '-r' in sys.argv:
+    sys.exit(0)
+sys.stdout.write('''{strategy}''')
+"""
+STRATEGY = """
+{"version": 1, "gr1c": "0.10.2", "date": "", "extra": "",
+ "ENV": [{"x": "boolean"}], "SYS": [{"y": "boolean"}],
+ "nodes": {
+"0x1": {"state": [0, 1], "mode": 0, "rgrad": 1,
+        "initial": true, "trans": ["0x2"]},
+"0x2": {"state": [1, 1], "mode": 0, "rgrad": 1,
+        "initial": false, "trans": ["0x1"]}
+}}
+"""
+
+
+def _python(code):
+    return [sys.executable, '-c', code]
+
+
+def test_spawn():
+    loop = procloop.ProcessLoop()
+    # input larger than the pipe buffer
+    s = 'a' * 10**6
+    f = loop.spawn(
+        _python('import sys; sys.stdout.write(sys.stdin.read().upper())'),
+        input=s)
+    g = loop.spawn(_python('import sys; sys.stderr.write("e"); sys.exit(3)'))
+    assert loop.run()
+    returncode, out, err = f.result()
+    with out:
+        assert returncode == 0
+        assert out.read() == s.upper()
+    returncode, out, err = g.result()
+    out.close()
+    assert returncode == 3, returncode
+    assert err == 'e', err
+
+
+def test_concurrent():
+    loop = procloop.ProcessLoop()
+    code = 'import time; time.sleep(0.5)'
+    t0 = time.time()
+    futures = [loop.spawn(_python(code)) for i in xrange(6)]
+    assert loop.run(until=futures)
+    assert time.time() - t0 < 2.5
+    for f in futures:
+        assert f.result()[0] == 0
+        f.result()[1].close()
+
+
+def test_timeout_and_cancel():
+    loop = procloop.ProcessLoop()
+    code = 'import time; time.sleep(10)'
+    f = loop.spawn(_python(code), timeout=0.2)
+    g = loop.spawn(_python(code))
+    h = g.then(lambda r: r[0])
+    assert not loop.run(until=[f], timeout=0.05)
+    assert loop.run(until=[f])
+    with assert_raises(procloop.Timeout):
+        f.result()
+    assert h.cancel()
+    assert g.cancelled()
+    with assert_raises(procloop.Cancelled):
+        h.result()
+    # nothing left to run
+    assert loop.run()
+
+
+def _spec(**kw):
+    return GRSpec(moore=False, plus_one=False, qinit='\\A \\E', **kw)
+
+
+class gr1c_async_test(object):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        path = os.path.join(self.dir, 'gr1c')
+        with open(path, 'w') as f:
+            f.write(FAKE_GR1C.format(python=sys.executable,
+                                     strategy=STRATEGY))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        self.path = os.environ['PATH']
+        os.environ['PATH'] = self.dir + os.pathsep + self.path
+        os.environ['FAKE_GR1C_SLEEP'] = '0.5'
+        self.spec = _spec(env_vars='x', sys_vars='y', sys_prog='y')
+
+    def tearDown(self):
+        os.environ['PATH'] = self.path
+        del os.environ['FAKE_GR1C_SLEEP']
+        shutil.rmtree(self.dir)
+
+    def test_synthesize_async(self):
+        loop = procloop.ProcessLoop()
+        unrealizable = _spec(sys_vars={'unrealizable'})
+        t0 = time.time()
+        futures = [gr1c.synthesize_async(self.spec, loop)
+                   for i in xrange(4)]
+        futures.append(gr1c.synthesize_async(unrealizable, loop))
+        futures.append(gr1c.check_realizable_async(self.spec, loop))
+        futures.append(gr1c.check_realizable_async(unrealizable, loop))
+        assert loop.run()
+        # concurrently
+        assert time.time() - t0 < 3
+        for f in futures[:4]:
+            g = f.result()
+            assert len(g) == 2, g.nodes()
+            assert g.env_vars == dict(x='boolean')
+        assert futures[4].result() is None
+        assert futures[5].result() is True
+        assert futures[6].result() is False
+
+    def test_timeout(self):
+        loop = procloop.ProcessLoop()
+        f = gr1c.synthesize_async(self.spec, loop, timeout=0.1)
+        loop.run()
+        with assert_raises(procloop.Timeout):
+            f.result()
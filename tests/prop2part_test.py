@@ -3,9 +3,15 @@
 Tests for abstract.prop2partition
 """
 
-from tulip.abstract import prop2part
+from tulip.abstract import prop2part, add_grid, pwa_partition
+from tulip.abstract import prop2partition
+from tulip.abstract.prop2partition import (
+    PropPreservingPartition, _find_adjacent_regions,
+    _candidate_pairs, _adjacency)
+from tulip import hybrid
 import polytope as pc
 import numpy as np
+from scipy import sparse as sp
 
 def prop2part_test():
     state_space = pc.Polytope.from_box(np.array([[0., 2.],[0., 2.]]))
@@ -58,3 +64,98 @@ def prop2part_test():
     # invalidate it
     mypartition.regions += [pc.Region([pc.Polytope(A[0], b[0])], {})]
     assert(not mypartition.preserves_predicates())
+
+def add_grid_test():
+    dom = pc.box2poly([[0., 2.], [0., 2.]])
+    a = pc.box2poly([[0., 1.], [0., 2.]])
+    b = pc.box2poly([[1., 2.], [0., 2.]])
+    regions = [pc.Region([a], {'a'}), pc.Region([b], set())]
+    adj = np.array([[1, 1], [1, 1]], dtype=np.int8)
+    ppp = PropPreservingPartition(
+        domain=dom, regions=regions, adj=sp.lil_matrix(adj),
+        prop_regions={'a': a}, check=False)
+    grid = add_grid(ppp, num_grid_pnts=4)
+    assert len(grid.regions) == 16
+    for r in grid.regions:
+        (x, y) = r.chebXc
+        assert r.props == ({'a'} if x < 1 else set()), (r.chebXc, r.props)
+    # cells touching in a facet or corner are adjacent
+    adj = grid.adj.todense()
+    for i, r in enumerate(grid.regions):
+        for j, s in enumerate(grid.regions):
+            d = np.abs(r.chebXc - s.chebXc)
+            assert adj[i, j] == (d.max() < 0.6), (i, j, adj[i, j])
+    assert (adj == _find_adjacent_regions(grid.regions).todense()).all()
+
+def adjacency_test():
+    # boxes along a diagonal, corner touching
+    boxes = [
+        [[0., 1.], [0., 1.]], [[1., 2.], [1., 2.]], [[2., 3.], [0., 1.]],
+        [[0., 1.], [3., 4.]], [[2.5, 3.], [3., 4.]], [[0., 1.], [1., 3.]]]
+    regions = [pc.Region([pc.box2poly(x)]) for x in boxes]
+    # a region with two polytopes
+    regions.append(pc.Region([
+        pc.box2poly([[5., 6.], [0., 1.]]),
+        pc.box2poly([[3., 5.], [0., 1.]])]))
+    n = len(regions)
+    brute = np.eye(n, dtype=np.int8)
+    for i in xrange(n):
+        for j in xrange(n):
+            if i != j and pc.is_adjacent(regions[i], regions[j]):
+                brute[i, j] = 1
+    pairs = _candidate_pairs(regions)
+    assert all(i < j for i, j in pairs)
+    assert len(pairs) < n * (n - 1) / 2
+    for i, j in zip(*np.nonzero(brute)):
+        assert i == j or (min(i, j), max(i, j)) in pairs, (i, j)
+    adj = _find_adjacent_regions(regions)
+    assert isinstance(adj, sp.lil_matrix)
+    assert (adj.todense() == brute).all()
+    adj = _find_adjacent_regions(regions, processes=2)
+    assert (adj.todense() == brute).all()
+    # pairs known to be adjacent are not checked
+    adj = _adjacency(regions, [], [(0, 4)])
+    assert adj[0, 4] == 1 and adj[4, 0] == 1 and adj.sum() == n + 2
+
+def pwa_partition_test():
+    dom = pc.box2poly([[0., 2.], [0., 1.]])
+    a = pc.box2poly([[0., 1.], [0., 1.]])
+    b = pc.box2poly([[1., 2.], [0., 1.]])
+    regions = [pc.Region([a], {'a'}), pc.Region([b], set())]
+    ppp = PropPreservingPartition(
+        domain=dom, regions=regions,
+        adj=sp.lil_matrix(np.ones((2, 2), dtype=np.int8)),
+        prop_regions={'a': a}, check=False)
+    U = pc.box2poly([[-1., 1.], [-1., 1.]])
+    subsys = [
+        hybrid.LtiSysDyn(np.eye(2), np.eye(2), Uset=U,
+                         domain=pc.box2poly(x))
+        for x in ([[0., 0.5], [0., 1.]], [[0.5, 2.], [0., 1.]])]
+    pwa = hybrid.PwaSysDyn(subsys, dom)
+    calls = list()
+    f = prop2partition._intersect
+    def intersect(pair):
+        calls.append(pair)
+        return f(pair)
+    prop2partition._intersect = intersect
+    try:
+        r = pwa_partition(pwa, ppp)
+    finally:
+        prop2partition._intersect = f
+    # the first subsystem and region `b` are not intersected
+    assert len(calls) == 3, calls
+    for processes in (None, 2):
+        new_ppp, subsys_list, parents = pwa_partition(
+            pwa, ppp, processes=processes)
+        assert isinstance(subsys_list, np.ndarray)
+        assert isinstance(parents, np.ndarray)
+        assert subsys_list.tolist() == [0, 1, 1], subsys_list
+        assert parents.tolist() == [0, 0, 1], parents
+        boxes = [[[0., 0.5], [0., 1.]], [[0.5, 1.], [0., 1.]],
+                 [[1., 2.], [0., 1.]]]
+        for region, box, props in zip(
+                new_ppp.regions, boxes, [{'a'}, {'a'}, set()]):
+            assert region == pc.box2poly(box), (region, box)
+            assert region.props == props, region.props
+        adj = np.array([[1, 1, 0], [1, 1, 1], [0, 1, 1]])
+        assert (new_ppp.adj.todense() == adj).all(), new_ppp.adj.todense()
@@ -1,8 +1,16 @@
 #!/usr/bin/env python
 """Tests for the interface with slugs."""
 import logging
+import os
+import shutil
+import stat
+import StringIO
+import sys
+import tempfile
 logger = logging.getLogger(__name__)
+from nose.tools import assert_raises
 from tulip.interfaces import slugs
+from tulip.interfaces import _scratch
 import jtlvint_test
 
 
@@ -36,8 +44,63 @@ def bitfields_to_ints_test():
         assert m == {'a': n}
 
 
+def load_strategy_test():
+    s = (
+        '{"version": 0, "slugs": "0.0.1",\n'
+        ' "variables": ["x", "a@0.0.2", "a@1"],\n'
+        ' "nodes": {\n'
+        '  "0": {"rank": 0, "state": [0, 1, 0], "trans": [1]},\n'
+        '  "1": {"rank": 0, "state": [1, 0, 1], "trans": [0, 2]},\n'
+        '  "2": {"rank": 1, "state": [0, 1, 0], "trans": [2]}}}\n')
+    vrs = {'x': 'boolean', 'a': (0, 2)}
+    g = slugs._load_strategy(StringIO.StringIO(s), vrs)
+    assert set(g) == {0, 1, 2}, g.nodes()
+    assert set(g.edges_iter()) == {(0, 1), (1, 0), (1, 2), (2, 2)}
+    assert g.node[0]['state'] == {'x': 0, 'a': 1}, g.node
+    assert g.node[1]['state'] == {'x': 1, 'a': 2}, g.node
+    # converted once
+    assert g.node[0]['state'] is g.node[2]['state']
+
+
 class basic_test(jtlvint_test.basic_test):
     def setUp(self):
         super(basic_test, self).setUp()
         self.check_realizable = lambda x: slugs.synthesize(x) is not None
         self.synthesize = slugs.synthesize
+
+
+FAKE_COMPILER = '''#!{python}
+import sys
+with open(sys.argv[0] + '.calls', 'a') as f:
+    f.write('x')
+sys.stdout.write(open(sys.argv[1]).read().upper())
+'''
+
+
+def compile_cache_test():
+    d = tempfile.mkdtemp()
+    try:
+        compiler = os.path.join(d, 'compiler.py')
+        with open(compiler, 'w') as f:
+            f.write(FAKE_COMPILER.format(python=sys.executable))
+        os.chmod(compiler, os.stat(compiler).st_mode | stat.S_IEXEC)
+        struct = '[INPUT]\nx\n'
+        for i in xrange(2):
+            with _scratch.scratch_dir() as s:
+                path = slugs._compile(struct, s, compiler)
+                with open(path) as f:
+                    assert f.read() == struct.upper()
+            assert not os.path.exists(s)
+        # compiled once
+        with open(compiler + '.calls') as f:
+            assert f.read() == 'x'
+    finally:
+        shutil.rmtree(d)
+
+
+def scratch_dir_test():
+    with assert_raises(ValueError):
+        with _scratch.scratch_dir() as d:
+            assert os.path.isdir(d)
+            raise ValueError()
+    assert not os.path.exists(d)
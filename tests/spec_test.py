@@ -118,6 +118,25 @@ def test_lex():
     assert tok.value == 'X0reach'
 
 
+def parse_tables_test():
+    # stale tables would be silently rebuilt on each startup
+    import ply.yacc
+    from tulip.spec import ltl_parsetab
+    p = lexyacc.Parser()
+    pdict = dict((k, getattr(p, k)) for k in dir(p))
+    reflect = ply.yacc.ParserReflect(pdict)
+    reflect.get_all()
+    assert reflect.signature() == ltl_parsetab._lr_signature
+
+
+def shared_parser_test():
+    p = lexyacc.shared_parser()
+    assert lexyacc.shared_parser() is p
+    r = lexyacc.parse('a & b')
+    assert isinstance(r, ast.nodes.Binary), r
+    assert lexyacc.shared_parser() is p
+
+
 def lexer_token_precedence_test():
     s = 'False'
     r = parse(s)
@@ -2,10 +2,15 @@
 Tests for the tulip.synth module.
 """
 import logging
+import os
+import shutil
+import tempfile
+import time
 logging.getLogger('tulip').setLevel(logging.ERROR)
 logging.getLogger('tulip.interfaces.omega').setLevel(logging.DEBUG)
 logging.getLogger('omega').setLevel(logging.WARNING)
 from nose.tools import assert_raises
+import networkx as nx
 import numpy as np
 from scipy import sparse as sp
 from tulip import spec, synth, transys
@@ -301,6 +306,68 @@ def _check_ofts_int_actions(spec):
             'sys_actionsnone'})
 
 
+def int_states_fts():
+    """FTS with 8 integer states, some sharing their successors."""
+    sys = transys.FTS()
+    sys.states.add_from(range(8))
+    sys.states.initial.add(0)
+    for i in range(8):
+        for j in range(8):
+            if abs(i - j) <= 1 or (i >= 5 and j >= 5):
+                sys.transitions.add(i, j)
+    return sys
+
+
+def test_sys_to_spec_compact():
+    """Compact encoding is smaller and equivalent."""
+    sys = int_states_fts()
+    specs = dict()
+    for compact in (False, True):
+        f = synth.sys_to_spec(
+            sys,
+            ignore_initial=False,
+            statevar='loc',
+            compact=compact)
+        f.sys_prog = ['loc = 7']
+        f.moore = False
+        f.plus_one = False
+        f.qinit = '\A \E'
+        specs[compact] = f
+    full = ''.join(specs[False].sys_safety)
+    compact = ''.join(specs[True].sys_safety)
+    assert len(compact) < len(full), (compact, full)
+    # states 6 and 7 have the same successors
+    assert len(specs[True].sys_safety) < len(specs[False].sys_safety)
+    assert '(loc >= 5) && (loc <= 7)' in compact, compact
+    assert synth.is_realizable('omega', specs[True])
+    # unrealizable if state 5 is avoided
+    for f in specs.values():
+        f.sys_safety.append('!(loc = 5)')
+        f.sys_prog = ['loc = 7']
+    assert not synth.is_realizable('omega', specs[False])
+    assert not synth.is_realizable('omega', specs[True])
+
+
+def test_env_to_spec_compact():
+    """Compact encoding of env FTS with actions."""
+    env = env_ofts_int_actions()
+    env.sys_actions_must = 'mutex'
+    env.transitions.add('e2', 'e0', env_actions='go', sys_actions='up')
+    env.transitions.add('e2', 'e1', env_actions='go', sys_actions='up')
+    f = synth.env_to_spec(
+        env,
+        ignore_initial=False,
+        statevar='eloc',
+        bool_actions=False,
+        compact=True)
+    _check_ofts_int_actions(f)
+    trans = [x for x in f.env_safety if x.startswith('((eloc = "e2"))')]
+    assert len(trans) == 1, trans
+    (trans, ) = trans
+    # successors with same actions merged
+    assert trans.count('env_actions = "go"') == 1, trans
+
+
 def test_only_mode_control():
     """Unrealizable due to non-determinism.
 
@@ -624,6 +691,209 @@ def test_determinize_machine_init():
         assert d['b'] == 1
 
 
+class strategy_cache_test:
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = synth.StrategyCache(self.path)
+        self.f = spec.GRSpec(
+            sys_vars={'x'},
+            sys_prog=['x', '!x'],
+            moore=False,
+            plus_one=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_key(self):
+        g = spec.GRSpec(
+            sys_vars={'x'},
+            sys_prog=['!x', 'x', 'x'],
+            moore=False,
+            plus_one=False)
+        key = self.cache.key('omega', self.f)
+        assert key == self.cache.key('omega', g)
+        assert key != self.cache.key('gr1c', self.f)
+        g.moore = True
+        assert key != self.cache.key('omega', g)
+
+    def test_hit(self):
+        m = synth.synthesize('omega', self.f, cache=self.cache)
+        assert len(os.listdir(self.path)) == 1
+        f = synth._synthesize
+        try:
+            synth._synthesize = _raise_on_call
+            h = synth.synthesize('omega', self.f, cache=self.cache)
+        finally:
+            synth._synthesize = f
+        assert set(m.transitions()) == set(h.transitions())
+        # unrealizable
+        self.f.sys_safety.append('x')
+        assert synth.synthesize('omega', self.f, cache=self.cache) is None
+        hit, strategy = self.cache.get(self.cache.key('omega', self.f))
+        assert hit
+        assert strategy is None
+
+    def test_portfolio(self):
+        key = self.cache.key(['omega', 'gr1py'], self.f)
+        assert key == self.cache.key(['gr1py', 'omega'], self.f)
+        assert key != self.cache.key('omega', self.f)
+        m = synth.synthesize(['gr1py', 'omega'], self.f, cache=self.cache)
+        assert m is not None
+        hit, strategy = self.cache.get(key)
+        assert hit
+        assert strategy is not None
+
+    def test_evict(self):
+        k1 = self.cache.key('omega', self.f)
+        strategy = synth._synthesize('omega', self.f)
+        self.cache.put(k1, strategy)
+        (fname, ) = os.listdir(self.path)
+        fname = os.path.join(self.path, fname)
+        size = os.path.getsize(fname)
+        os.utime(fname, (0, 0))
+        self.cache.max_size = int(1.5 * size)
+        k2 = self.cache.key('gr1py', self.f)
+        self.cache.put(k2, strategy)
+        assert self.cache.get(k1) == (False, None)
+        hit, _ = self.cache.get(k2)
+        assert hit
+        # too large to store, and nothing else is evicted
+        self.cache.max_size = size // 2
+        k3 = self.cache.key('gr1c', self.f)
+        self.cache.put(k3, strategy)
+        assert self.cache.get(k3) == (False, None)
+        hit, _ = self.cache.get(k2)
+        assert hit
+
+    def test_key_unchanged_spec(self):
+        f = spec.GRSpec(
+            sys_vars={'x': ['a', 'b']},
+            sys_init=['x = "b"'],
+            moore=False,
+            plus_one=False)
+        self.cache.key('omega', f)
+        assert not f._ast, f._ast
+        assert not f._bool_int, f._bool_int
+        assert not f._cache['gr1c'], f._cache
+
+
+def _raise_on_call(*arg, **kw):
+    raise AssertionError('solver called')
+
+
+def _crash_or_solve(option, specs):
+    if option == 'crash':
+        os._exit(1)
+    if option == 'sleep':
+        time.sleep(60)
+    if option == 'raise':
+        raise Exception('solver failed')
+    return synth._is_realizable(option, specs)
+
+
+def test_strategy2mealy():
+    sp = spec.GRSpec(
+        env_vars={'x': 'boolean'},
+        sys_vars={'y': (0, 2), 'm': ['a', 'b']},
+        env_init=['!x'],
+        sys_init=['(y < 2) & (m = "a")'])
+    A = nx.DiGraph()
+    # nodes 0, 1 and 3 differ only in the hidden memory
+    A.add_node(0, state=dict(x=0, y=0, m=0))
+    A.add_node(1, state=dict(x=0, y=0, m=0))
+    A.add_node(2, state=dict(x=1, y=2, m=1))
+    A.add_node(3, state=dict(x=0, y=0, m=0))
+    A.add_edges_from([(0, 2), (1, 2), (2, 3), (3, 1), (2, 0)])
+    mach = synth.strategy2mealy(A, sp)
+    assert len(mach) == 5, mach.states
+    # env_init -> sys_init, so node 2 is initial too
+    init = {u: d for _, u, d in mach.transitions.find('Sinit')}
+    assert len(init) == 2, init
+    assert 2 in init, init
+    (u,) = set(init).difference({2})
+    assert u in {0, 1, 3}, u
+    assert init[u] == dict(x=0, y=0, m='a'), init
+    r = mach.transitions.find(2)
+    assert len(r) == 2, r
+    for _, v, d in mach.transitions.find(0):
+        assert v == 2
+        assert d == dict(x=1, y=2, m='b'), d
+    assert len(mach.transitions) == 7, mach.transitions
+
+
+def test_synthesize_minimize():
+    sp = spec.GRSpec(
+        env_vars={'x'},
+        sys_vars={'y': (0, 3)},
+        env_prog=['!x'],
+        sys_safety=["x -> (y' = y)"],
+        sys_prog=['y = 0', 'y = 3'])
+    sp.qinit = r'\E \A'
+    sp.moore = False
+    mach = synth.synthesize('omega', sp)
+    small = synth.synthesize('omega', sp, minimize=True)
+    assert len(small) < len(mach), (len(small), len(mach))
+    assert set(small.states.initial) == {'Sinit'}
+    assert len(transys.machines.minimize(small)) == len(small)
+
+
+class synthesize_batch_test:
+    def setUp(self):
+        self.base = spec.GRSpec(
+            env_vars={'park': 'boolean'},
+            sys_vars={'x': (0, 3), 'mode': ['walk', 'run']},
+            sys_init={'x = 0'},
+            sys_safety={"(x = 0) -> (x' < 2)", "(x = 1) -> (x' < 3)",
+                        "(x = 2) -> (x' > 0)", "(x = 3) -> (x' > 1)",
+                        '(mode = "run") -> (x < 3)'},
+            env_prog={'park'},
+            moore=False,
+            plus_one=False)
+        self.base.qinit = r'\A \E'
+        self.variants = [
+            {'sys_prog': 'x = 3'},
+            {'sys_prog': ['x = 3', 'x = 0']},
+            {'sys_prog': 'mode = "run"', 'env_init': '!park'},
+            {'sys_prog': '(x = 3) && (mode = "run")'},
+            {'sys_safety': 'x < 2', 'sys_prog': 'x = 2'}]
+        self.realizable = [True, True, True, False, False]
+
+    def tearDown(self):
+        self.base = None
+        self.variants = None
+
+    def _check(self, option):
+        r = dict(synth.synthesize_batch(self.base, self.variants, option))
+        assert set(r) == set(xrange(len(self.variants))), r
+        for i, variant in enumerate(self.variants):
+            ctrl = r[i]
+            assert (ctrl is not None) == self.realizable[i], (i, ctrl)
+            specs = synth._spec_variant(self.base, variant)
+            single = synth.synthesize(option, specs)
+            assert (single is not None) == self.realizable[i], i
+            if ctrl is not None:
+                assert isinstance(ctrl, transys.MealyMachine)
+
+    def test_omega(self):
+        self._check('omega')
+
+    def test_gr1py(self):
+        self._check('gr1py')
+
+    def test_pool(self):
+        # stand-in for an external solver, inherited by forked workers
+        f = synth._synthesize
+        synth._synthesize = lambda option, specs: f('omega', specs)
+        try:
+            self._check('gr1c')
+        finally:
+            synth._synthesize = f
+
+    def test_unknown_part(self):
+        with assert_raises(ValueError):
+            list(synth.synthesize_batch(self.base, [{'foo': 'x = 1'}]))
+
+
 class synthesize_test:
     def setUp(self):
         self.f_triv = spec.GRSpec(
@@ -646,6 +916,65 @@ class synthesize_test:
     def test_unrealizable(self):
         assert synth.synthesize("omega", self.trivial_unreachable) is None
 
+    def test_portfolio(self):
+        solvers = ['gr1py', 'omega']
+        synth.solver_timings.clear()
+        synth.solver_failures.clear()
+        g = synth.synthesize(solvers, self.f_triv)
+        assert isinstance(g, transys.MealyMachine)
+        assert synth.is_realizable(solvers, self.f_triv)
+        assert not synth.is_realizable(solvers, self.trivial_unreachable)
+        assert synth.synthesize(solvers, self.trivial_unreachable) is None
+        ranked = synth.rank_solvers()
+        assert ranked, synth.solver_timings
+        assert set(ranked).issubset(solvers), ranked
+        # each solver is timed in each run, also when losing,
+        # or its failure is counted
+        for option in solvers:
+            n = len(synth.solver_timings.get(option, ()))
+            n += synth.solver_failures.get(option, 0)
+            assert n == 4, (synth.solver_timings, synth.solver_failures)
+
+    def test_portfolio_failures(self):
+        # unknown solver fails, so the other one answers
+        r = synth.is_realizable(['foo', 'omega'], self.f_triv)
+        assert r
+        with assert_raises(Exception):
+            synth.is_realizable(['foo', 'bar'], self.f_triv)
+
+    def test_portfolio_dead_worker(self):
+        # a crashed worker counts as failed
+        synth.solver_timings.clear()
+        synth.solver_failures.clear()
+        r = synth.portfolio(
+            _crash_or_solve, ['crash', 'omega'], self.f_triv, timeout=60)
+        assert r == ('omega', True), r
+        with assert_raises(Exception):
+            synth.portfolio(
+                _crash_or_solve, ['crash'], self.f_triv, timeout=60)
+        # failures are counted, not timed
+        assert synth.solver_failures.get('crash') >= 1, (
+            synth.solver_failures)
+        assert 'omega' not in synth.solver_failures, synth.solver_failures
+
+    def test_portfolio_rank_failures(self):
+        synth.solver_timings.clear()
+        synth.solver_failures.clear()
+        for i in xrange(2):
+            synth.portfolio(_crash_or_solve, ['raise', 'omega'], self.f_triv)
+        # a solver that fails fast is ranked last
+        with assert_raises(Exception):
+            synth.portfolio(_crash_or_solve, ['raise'], self.f_triv)
+        assert synth.solver_failures['raise'] >= 1, synth.solver_failures
+        assert synth.rank_solvers() == ['omega', 'raise'], (
+            synth.solver_timings, synth.solver_failures)
+
+    def test_portfolio_timeout(self):
+        with assert_raises(Exception):
+            synth.portfolio(
+                _crash_or_solve, ['sleep'], self.f_triv, timeout=0.5)
+        assert synth.is_realizable(['omega'], self.f_triv, timeout=60)
+
 
 if __name__ == '__main__':
     multiple_env_actions_test()
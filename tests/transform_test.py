@@ -1,8 +1,8 @@
 import logging
 logging.basicConfig(level=logging.DEBUG)
 logging.getLogger('tulip.ltl_parser_log').setLevel(logging.ERROR)
-# import nose.tools as nt
-from tulip.spec.ast import nodes
+import nose.tools as nt
+from tulip.spec.ast import nodes, share
 from tulip.spec.parser import parse
 from tulip.spec import transformation as tx
 
@@ -110,3 +110,50 @@ def test_str_to_int():
     print(s)
     assert s == ('( ( loc = 1 ) -> '
                  '( X ( ( env_alice = 0 ) & ( env_bob = 1 ) ) ) )')
+
+
+def test_share():
+    a = share(parse('(x = "a") & X(y = "a")'))
+    b = share(parse('z | X(y = "a")'))
+    # shared subformula
+    u = a.operands[1]
+    assert u is b.operands[1], (u, b)
+    # shared terminal
+    assert a.operands[0].operands[1] is u.operands[0].operands[1]
+    assert share(a) is a
+
+
+def test_sub_constants_ast():
+    var_str2int = {'x': ['b', 'a'], 'y': ['a']}
+    a = share(parse('(x = "a") & X(y = "a") & !(z)'))
+    memo = dict()
+    b = tx.sub_constants_ast(a, var_str2int, memo)
+    s = b.flatten()
+    assert s == ('( ( ( x = 1 ) & ( X ( y = 0 ) ) ) & ( ! z ) )'), s
+    # unchanged subformulas are reused
+    assert b.operands[1] is a.operands[1]
+    assert a.flatten() == (
+        '( ( ( x = a ) & ( X ( y = a ) ) ) & ( ! z ) )')
+    # memoized
+    assert tx.sub_constants_ast(a, var_str2int, memo) is b
+
+
+def test_sub_values_ast():
+    a = share(parse('(x = 2) -> (y & (s = "on"))'))
+    b = tx.sub_values_ast(a, dict(x=1, y=True))
+    assert b.flatten() == '( ( 1 = 2 ) -> ( True & ( s = on ) ) )'
+    assert b.operands[1].operands[1] is a.operands[1].operands[1]
+
+
+def test_check_identifiers_ast():
+    a = share(parse('x & X(y = 2)'))
+    checked = set()
+    tx.check_identifiers_ast(a, {'x': 'boolean', 'y': (0, 3)}, checked)
+    assert a in checked
+    with nt.assert_raises(ValueError):
+        tx.check_identifiers_ast(a, {'x': 'boolean'})
+
+
+def test_collect_primed_vars():
+    a = share(parse('x & X(y | (x = 2))'))
+    assert tx.collect_primed_vars(a) == {'x', 'y'}
@@ -33,3 +33,67 @@ def check_translate_unrecognized_types(spc):
 def test_translate_unrecognized_types():
     for spc in [form.LTL(), 'a -> b']:
         yield check_translate_unrecognized_types, spc
+
+
+def test_translate_deep_formula():
+    # deeper than the recursion limit
+    n = 2000
+    f = ' | '.join('(x{i} & !x{j})'.format(i=i % 3, j=(i + 1) % 3)
+                   for i in xrange(n))
+    env_vars = {'x0': 'boolean', 'x1': 'boolean', 'x2': 'boolean'}
+    s = spec.GRSpec(env_vars=env_vars, env_safety=[f])
+    s.str_to_int()
+    t = s.ast(s._bool_int[f])
+    for lang in ts.lang2nodes:
+        r = ts.translate_ast(t, lang).flatten(
+            env_vars=env_vars, sys_vars=dict())
+        assert r.count('x0') == f.count('x0'), (lang, r[:80])
+    r = ts.translate(s, 'gr1c')
+    assert r.count('|') == f.count('|'), r[:80]
+    s.compile_init(no_str=True)
+
+
+def test_translate_smv():
+    x = 'X(a | !b) -> (True ^ (c <-> a))'
+    t = spec.parser.parse(x)
+    r = ts.translate_ast(t, 'smv').flatten()
+    assert r == '( ( X ( a | ( ! b ) ) ) -> ( TRUE xor ( c <-> a ) ) )', r
+
+
+def test_translate_incremental():
+    s = spec.GRSpec(env_vars={'x'}, sys_vars={'y'},
+                    env_init=['x'], sys_safety=['y -> X !y'])
+    ts.translate(s, 'gr1c')
+    assert set(s._cache['gr1c']) == {'x', 'y -> X !y'}, s._cache
+    # detect retranslation
+    s._cache['gr1c']['x'] = 'cached'
+    s |= spec.GRSpec(sys_vars={'z'}, sys_prog=['z'])
+    r = ts.translate(s, 'gr1c')
+    assert 'ENVINIT: (cached);' in r, r
+    assert 'SYSGOAL: []<>(z);' in r, r
+    # changed domain drops translations
+    s.sys_vars['z'] = (0, 1)
+    r = ts.translate(s, 'gr1c')
+    assert 'ENVINIT: (x);' in r, r
+    # removed clauses are dropped from the cache
+    s.env_init = ['!x']
+    s.parse()
+    assert 'x' not in s._cache['gr1c'], s._cache
+
+
+def test_translate_copy_changed_domain():
+    s = spec.GRSpec(sys_vars={'a': ['x', 'y']}, sys_init=['a = "y"'])
+    r = ts.translate(s, 'gr1c')
+    assert 'SYSINIT: (( a = 1 ));' in r, r
+    t = s.copy()
+    t.sys_vars['a'] = ['y', 'x']
+    r = ts.translate(t, 'gr1c')
+    assert 'SYSINIT: (( a = 0 ));' in r, r
+    # the original is unaffected
+    r = ts.translate(s, 'gr1c')
+    assert 'SYSINIT: (( a = 1 ));' in r, r
+    # also when converting to integers directly
+    u = s.copy()
+    u.sys_vars['a'] = ['y', 'x']
+    u.str_to_int()
+    assert u._bool_int['a = "y"'] == '( a = 0 )', u._bool_int
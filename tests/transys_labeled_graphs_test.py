@@ -280,6 +280,49 @@ class LabeledDiGraph_test():
     def test_edge_subscript_assign_illegal_value(self):
         self.G[1][2][0]['day'] = 'abc'
 
+    def test_add_nodes_bulk(self):
+        label = dict(month='Feb', day='Tue')
+        self.G.add_nodes_bulk([(3, label), (4, label), (1, {})])
+        assert self.G.node[3] == label, self.G.node[3]
+        assert self.G.node[4] == label, self.G.node[4]
+        assert self.G.node[1] == dict(), self.G.node[1]
+        assert 3 in self.G.states
+        self.G.add_edges_bulk([(3, 4, {})])
+        assert self.G.has_edge(3, 4)
+        # copies
+        self.G.node[3]['day'] = 'Mon'
+        assert self.G.node[4]['day'] == 'Tue'
+        # still typed
+        assert_raises(ValueError, self.G.node[4].__setitem__,
+                      'day', 'abc')
+        assert_raises(ValueError, self.G.add_nodes_bulk,
+                      [(5, dict(month='haha'))])
+        assert_raises(AttributeError, self.G.add_nodes_bulk,
+                      [(5, dict(mo='Jan'))])
+
+    def test_add_edges_bulk(self):
+        self.G.states.add(3)
+        label = dict(month='Feb', day='Tue')
+        self.G.add_edges_bulk([(1, 2, label), (2, 3, label), (3, 3, {})])
+        assert self.G[1][2][1] == label, self.G[1][2]
+        assert self.G[2][3][0] == label, self.G[2][3]
+        assert self.G[3][3][0] == dict(), self.G[3][3]
+        # copies
+        self.G[2][3][0]['day'] = 'Mon'
+        assert self.G[1][2][1]['day'] == 'Tue'
+        assert label['day'] == 'Tue'
+        # still typed
+        assert_raises(ValueError, self.G[2][3][0].__setitem__,
+                      'day', 'abc')
+
+    def test_add_edges_bulk_invalid(self):
+        assert_raises(ValueError, self.G.add_edges_bulk,
+                      [(1, 2, dict(month='haha'))])
+        assert_raises(AttributeError, self.G.add_edges_bulk,
+                      [(1, 2, dict(mo='Jan'))])
+        assert_raises(ValueError, self.G.add_edges_bulk,
+                      [(1, 5, dict())])
+
 
 def open_fts_multiple_env_actions_test():
     env_modes = MathSet({'up', 'down'})
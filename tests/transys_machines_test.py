@@ -42,3 +42,48 @@ def test_strip_ports():
         assert(u == x)
         assert(v == y)
         assert(d == b)
+
+
+def test_minimize():
+    mealy = machines.MealyMachine()
+    mealy.add_inputs({'a': {0, 1}})
+    mealy.add_outputs({'b': {0, 1}})
+    mealy.add_nodes_from(xrange(6))
+    mealy.states.initial.add(0)
+    # 1, 2 and 3, 4 alternate the same way
+    mealy.add_edge(0, 1, a=0, b=0)
+    mealy.add_edge(0, 3, a=1, b=0)
+    mealy.add_edge(1, 2, a=0, b=1)
+    mealy.add_edge(2, 1, a=0, b=0)
+    mealy.add_edge(3, 4, a=0, b=1)
+    mealy.add_edge(4, 3, a=0, b=0)
+    # 5 differs from 1 only at its successor
+    mealy.add_edge(5, 1, a=0, b=1)
+    new = machines.minimize(mealy)
+    assert set(new.states.initial) == {0}
+    assert len(new) == 4, new.states()
+    assert len(new.edges()) == 5, new.edges()
+    # same reactions
+    for inputs in ([0, 0, 0, 0], [1, 0, 0, 0]):
+        seq = dict(a=inputs)
+        states, outputs = machines.guided_run(mealy, 0, seq)
+        states_, outputs_ = machines.guided_run(new, 0, seq)
+        assert outputs == outputs_, (outputs, outputs_)
+    # 5 is distinguished from 1 by its successor
+    assert 5 in new, new.states()
+
+
+def test_minimize_nondeterministic():
+    mealy = machines.MealyMachine()
+    mealy.add_inputs({'a': {0, 1}})
+    mealy.add_outputs({'b': {0, 1}})
+    mealy.add_nodes_from(xrange(3))
+    mealy.states.initial.add(0)
+    mealy.add_edge(0, 1, a=0, b=0)
+    mealy.add_edge(0, 2, a=0, b=0)
+    mealy.add_edge(1, 1, a=1, b=1)
+    mealy.add_edge(2, 2, a=1, b=1)
+    new = machines.minimize(mealy)
+    assert len(new) == 2, new.states()
+    assert new.edges() == [(0, 1), (1, 1)] or \
+        new.edges() == [(0, 2), (2, 2)], new.edges()
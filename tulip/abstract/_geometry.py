@@ -0,0 +1,90 @@
+"""Cache of geometric attributes of polytopes and regions.
+
+The abstraction algorithms create many polytopes that are copies,
+or are recomputed from the same constraints, so the attributes that
+C{polytope} caches on each object are computed again and again.
+Here polytopes are keyed by their H-representation,
+and regions by the keys of their polytopes, so that equal sets share
+their volume, Chebyshev ball, bounding box and reduced H-representation.
+The volume is estimated by random sampling,
+so the cache also makes repeated estimates agree.
+
+Only the C{MAX_SIZE} most recently used entries are kept.
+Call L{clear} to invalidate the cache, for example after
+changing the tolerances of C{polytope}. C{discretize} clears it
+when done. Cached values are copied before being attached to
+a polytope, so modifying them does not affect other polytopes.
+"""
+from __future__ import absolute_import
+import collections
+import copy
+
+import numpy as np
+import polytope as pc
+
+
+# max number of cached attributes
+MAX_SIZE = 1000
+_cache = collections.OrderedDict()
+
+
+def key(p):
+    """Return hashable key of the H-representation of C{p}.
+
+    @type p: C{Polytope} or C{Region}
+    """
+    if isinstance(p, pc.Region):
+        return tuple(key(q) for q in p)
+    A = np.ascontiguousarray(p.A, dtype=float)
+    b = np.ascontiguousarray(p.b, dtype=float).flatten()
+    return (A.shape, A.tobytes(), b.tobytes())
+
+
+def clear():
+    """Remove all cached attributes."""
+    _cache.clear()
+
+
+def _lookup(name, p, f):
+    """Return attribute C{name} of C{p}, computing it as C{f(p)}."""
+    k = (name, key(p))
+    r = _cache.pop(k, None)
+    if r is None:
+        r = f(p)
+    # mark as most recently used
+    _cache[k] = r
+    while len(_cache) > MAX_SIZE:
+        _cache.popitem(last=False)
+    return r
+
+
+def volume(p):
+    """Return volume of C{p}, as C{p.volume}."""
+    v = _lookup('volume', p, lambda p: p.volume)
+    p._volume = v
+    return v
+
+
+def cheby_ball(p):
+    """Return Chebyshev radius and center of C{p}, as C{pc.cheby_ball}."""
+    rc, xc = _lookup('cheby_ball', p, pc.cheby_ball)
+    if xc is None:
+        return rc, xc
+    p._chebR = rc
+    p._chebXc = xc.copy()
+    return rc, p._chebXc
+
+
+def bounding_box(p):
+    """Return corners of bounding box of C{p}, as C{p.bounding_box}."""
+    l, u = _lookup('bounding_box', p, lambda p: p.bounding_box)
+    p.bbox = (l.copy(), u.copy())
+    return p.bbox
+
+
+def reduce(p):
+    """Return copy of C{pc.reduce(p)}.
+
+    A deep copy is returned, so callers can modify it.
+    """
+    return copy.deepcopy(_lookup('reduce', p, pc.reduce))
@@ -59,6 +59,7 @@ from tulip.hybrid import LtiSysDyn, PwaSysDyn
 from .prop2partition import (PropPreservingPartition,
                              pwa_partition, part2convex)
 from .feasible import is_feasible, solve_feasible
+from . import _geometry as geom
 from .plot import plot_ts_on_partition
 
 # inline imports:
@@ -520,7 +521,7 @@ def discretize(
     if ispwa:
         (part, ppp2pwa, part2orig) = pwa_partition(ssys, part)
     else:
-        part2orig = range(len(part))
+        part2orig = np.arange(len(part))
 
     # Save original polytopes, require them to be convex
     if conservative:
@@ -528,11 +529,11 @@ def discretize(
         orig = [0]
     else:
         (part, new2old) = part2convex(part) # convexify
-        part2orig = [part2orig[i] for i in new2old]
+        part2orig = part2orig[new2old]
 
         # map new regions to pwa subsystems
         if ispwa:
-            ppp2pwa = [ppp2pwa[i] for i in new2old]
+            ppp2pwa = ppp2pwa[new2old]
 
         remove_trans = False # already allowed in nonconservative
         orig_list = []
@@ -654,19 +655,19 @@ def discretize(
             msg += str(subsys_list[i]) + '\n'
 
         msg += '\t Computed reachable set S0 with volume: '
-        msg += str(S0.volume) + '\n'
+        msg += str(geom.volume(S0)) + '\n'
 
         logger.debug(msg)
 
         #logger.debug('si \cap s0')
         isect = si.intersect(S0)
-        vol1 = isect.volume
-        risect, xi = pc.cheby_ball(isect)
+        vol1 = geom.volume(isect)
+        risect, xi = geom.cheby_ball(isect)
 
         #logger.debug('si \ s0')
         diff = si.diff(S0)
-        vol2 = diff.volume
-        rdiff, xd = pc.cheby_ball(diff)
+        vol2 = geom.volume(diff)
+        rdiff, xd = geom.cheby_ball(diff)
 
         # if pc.is_fulldim(pc.Region([isect]).intersect(diff)):
         #     logging.getLogger('tulip.polytope').setLevel(logging.DEBUG)
@@ -968,6 +969,8 @@ def discretize(
         ax.set_ylabel('progress ratio')
         ax.figure.savefig('progress.pdf')
 
+    # release the geometry of cells that no longer exist
+    geom.clear()
     return AbstractPwa(
         ppp=new_part,
         ts=ofts,
@@ -1587,7 +1590,7 @@ def merge_partition_pair(
         for j in xrange(len(part2)):
             isect = pc.intersect(old_regions[i],
                                  part2[j])
-            rc, xc = pc.cheby_ball(isect)
+            rc, xc = geom.cheby_ball(isect)
 
             # no intersection ?
             if rc < 1e-5:
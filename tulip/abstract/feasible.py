@@ -50,6 +50,8 @@ from collections import Iterable
 import numpy as np
 import polytope as pc
 
+from . import _geometry as geom
+
 def is_feasible(
     from_region, to_region, sys, N,
     closed_loop=True,
@@ -172,7 +174,7 @@ def _solve_closed_loop_fixed_horizon(
         if i == 1:
             pinit = p1
         p2 = solve_open_loop(pinit, p2, ssys, 1, trans_set)
-        p2 = pc.reduce(p2)
+        p2 = geom.reduce(p2)
         if not pc.is_fulldim(p2):
             return pc.Polytope()
     return p2
@@ -199,16 +201,16 @@ def _solve_closed_loop_bounded_horizon(
         if i == 1:
             pinit = p1
         p2 = solve_open_loop(pinit, p2, ssys, 1, trans_set)
-        p2 = pc.reduce(p2)
+        p2 = geom.reduce(p2)
         # running union
         s = s.union(p2, check_convex=True)
-        s = pc.reduce(s)
+        s = geom.reduce(s)
         # empty target polytope ?
         if not pc.is_fulldim(p2):
             break
     if not pc.is_fulldim(s):
         return pc.Polytope()
-    s = pc.reduce(s)
+    s = geom.reduce(s)
     return s
 
 
@@ -234,7 +236,7 @@ def _underapproximate_attractor(
             pinit = p1
         r = solve_open_loop(pinit, p2, ssys, 1, trans_set)
         p2 = p2.union(r, check_convex=True)
-        p2 = pc.reduce(p2)
+        p2 = geom.reduce(p2)
         # empty target polytope ?
         if not pc.is_fulldim(p2):
             return pc.Polytope()
@@ -291,7 +293,7 @@ def poly_to_poly(p1, p2, ssys, N, trans_set=None):
     # stack polytope constraints
     L, M = createLM(ssys, N, p1, trans_set, p2)
     s0 = pc.Polytope(L, M)
-    s0 = pc.reduce(s0)
+    s0 = geom.reduce(s0)
 
     # Project polytope s0 onto lower dim
     n = np.shape(ssys.A)[1]
@@ -299,7 +301,7 @@ def poly_to_poly(p1, p2, ssys, N, trans_set=None):
 
     s0 = s0.project(dims)
 
-    return pc.reduce(s0)
+    return geom.reduce(s0)
 
 def volumes_for_reachability(part, max_num_poly):
     if len(part) <= max_num_poly:
@@ -307,7 +309,7 @@ def volumes_for_reachability(part, max_num_poly):
 
     vol_list = np.zeros(len(part) )
     for i in xrange(len(part) ):
-        vol_list[i] = part[i].volume
+        vol_list[i] = geom.volume(part[i])
 
     ind = np.argsort(-vol_list)
     temp = []
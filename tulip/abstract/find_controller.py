@@ -56,6 +56,7 @@ except ImportError:
 import polytope as pc
 
 from .feasible import solve_feasible, createLM, _block_diag2
+from . import _geometry as geom
 
 
 logger = logging.getLogger(__name__)
@@ -270,7 +271,7 @@ def get_input(
         # for each polytope in target region
         for P3 in P_end:
             if mid_weight > 0:
-                rc, xc = pc.cheby_ball(P3)
+                rc, xc = geom.cheby_ball(P3)
                 R[
                     np.ix_(
                         range(n*(N-1), n*N),
@@ -299,7 +300,7 @@ def get_input(
     else:
         P3 = P_end
         if mid_weight > 0:
-            rc, xc = pc.cheby_ball(P3)
+            rc, xc = geom.cheby_ball(P3)
             R[
                 np.ix_(
                     range(n*(N-1), n*N),
@@ -40,6 +40,8 @@ logger = logging.getLogger(__name__)
 
 import warnings
 import copy
+import itertools
+import multiprocessing as mp
 
 import numpy as np
 from scipy import sparse as sp
@@ -47,6 +49,7 @@ import polytope as pc
 from polytope.plot import plot_partition
 
 from tulip import transys as trs
+from . import _geometry as geom
 
 # inline imports:
 #
@@ -54,7 +57,7 @@ from tulip import transys as trs
 
 _hl = 40 * '-'
 
-def prop2part(state_space, cont_props_dict):
+def prop2part(state_space, cont_props_dict, processes=None):
     """Main function that takes a domain (state_space) and a list of
     propositions (cont_props), and returns a proposition preserving
     partition of the state space.
@@ -70,6 +73,9 @@ def prop2part(state_space, cont_props_dict):
     @param cont_props_dict: propositions
     @type cont_props_dict: dict of C{polytope.Polytope}
 
+    @param processes: number of processes for computing adjacency,
+        see L{part2convex}
+
     @return: state space quotient partition induced by propositions
     @rtype: L{PropPreservingPartition}
     """
@@ -141,17 +147,23 @@ def prop2part(state_space, cont_props_dict):
         prop_regions = copy.deepcopy(cont_props_dict)
     )
 
-    mypartition.adj = pc.find_adjacent_regions(mypartition).copy()
+    mypartition.adj = _find_adjacent_regions(regions, processes)
 
     return mypartition
 
-def part2convex(ppp):
+def part2convex(ppp, processes=None):
     """This function takes a proposition preserving partition and generates
     another proposition preserving partition such that each part in the new
     partition is a convex polytope
 
     @type ppp: L{PropPreservingPartition}
 
+    @param processes: if not C{None}, then check adjacency of regions
+        with a C{multiprocessing.Pool} of this many processes
+        (C{0} for the number of CPUs).
+        Only pairs of regions with intersecting bounding boxes are
+        checked in any case.
+
     @return: refinement into convex polytopes and
         map from new to old Regions
     @rtype: (L{PropPreservingPartition}, list)
@@ -174,11 +186,11 @@ def part2convex(ppp):
             cvxpart.regions.append(region_now)
             new2old += [i]
 
-    cvxpart.adj = pc.find_adjacent_regions(cvxpart).copy()
+    cvxpart.adj = _find_adjacent_regions(cvxpart.regions, processes)
 
     return (cvxpart, new2old)
 
-def pwa_partition(pwa_sys, ppp, abs_tol=1e-5):
+def pwa_partition(pwa_sys, ppp, abs_tol=1e-5, processes=None):
     """This function takes:
 
       - a piecewise affine system C{pwa_sys} and
@@ -204,13 +216,18 @@ def pwa_partition(pwa_sys, ppp, abs_tol=1e-5):
     @type pwa_sys: L{hybrid.PwaSysDyn}
     @type ppp: L{PropPreservingPartition}
 
+    @param processes: if not C{None}, then intersect the regions
+        with the subsystem domains, and check adjacency,
+        in a C{multiprocessing.Pool}, see L{part2convex}.
+        Only pairs with intersecting bounding boxes are intersected.
+
     @return: new partition and associated maps:
 
         - new partition C{new_ppp}
         - map of C{new_ppp.regions} to C{pwa_sys.list_subsys}
         - map of C{new_ppp.regions} to C{ppp.regions}
 
-    @rtype: C{(L{PropPreservingPartition}, list, list)}
+    @rtype: C{(L{PropPreservingPartition}, numpy.ndarray, numpy.ndarray)}
     """
     if pc.is_fulldim(ppp.domain.diff(pwa_sys.domain) ):
         raise Exception('pwa system is not defined everywhere ' +
@@ -218,51 +235,49 @@ def pwa_partition(pwa_sys, ppp, abs_tol=1e-5):
 
     # for each subsystem's domain, cut it into pieces
     # each piece is the intersection with
-    # a unique Region in ppp.regions
+    # a unique Region in ppp.regions,
+    # for the pairs with intersecting bounding boxes
+    domains = [subsys.domain for subsys in pwa_sys.list_subsys]
+    dlo, dhi = _bounding_boxes(domains)
+    rlo, rhi = _bounding_boxes(ppp.regions)
+    overlap = (
+        (dlo[:, None, :] <= rhi[None, :, :]) &
+        (rlo[None, :, :] <= dhi[:, None, :])).all(axis=2)
+    sys_idx, reg_idx = np.nonzero(overlap)
+    args = [(ppp.regions[j], domains[i]) for i, j in zip(sys_idx, reg_idx)]
+    if processes is None:
+        pieces = map(_intersect, args)
+    else:
+        pool = mp.Pool(processes or None)
+        try:
+            pieces = pool.map(_intersect, args)
+        finally:
+            pool.terminate()
+            pool.join()
     new_list = []
-    subsys_list = []
-    parents = []
-    for i, subsys in enumerate(pwa_sys.list_subsys):
-        for j, region in enumerate(ppp.regions):
-            isect = region.intersect(subsys.domain)
-
-            if pc.is_fulldim(isect):
-                rc, xc = pc.cheby_ball(isect)
-
-                if rc < abs_tol:
-                    msg = 'One of the regions in the refined PPP is '
-                    msg += 'too small, this may cause numerical problems'
-                    warnings.warn(msg)
-
-                # not Region yet, but Polytope ?
-                if len(isect) == 0:
-                    isect = pc.Region([isect])
-
-                # label with AP
-                isect.props = region.props.copy()
-
-                # store new Region
-                new_list.append(isect)
-
-                # keep track of original Region in ppp.regions
-                parents.append(j)
-
-                # index of subsystem active within isect
-                subsys_list.append(i)
+    for (isect, rc), j in zip(pieces, reg_idx):
+        if isect is None:
+            continue
+        if rc < abs_tol:
+            msg = 'One of the regions in the refined PPP is '
+            msg += 'too small, this may cause numerical problems'
+            warnings.warn(msg)
+        # label with AP
+        isect.props = ppp.regions[j].props.copy()
+        new_list.append(isect)
+    found = np.array([isect is not None for isect, rc in pieces], dtype=bool)
+    # index of subsystem active within each new Region
+    subsys_list = sys_idx[found]
+    # original Region in ppp.regions of each new Region
+    parents = reg_idx[found]
 
     # compute spatial adjacency matrix
-    n = len(new_list)
-    adj = sp.lil_matrix((n, n), dtype=np.int8)
-    for i, ri in enumerate(new_list):
-        pi = parents[i]
-        for j, rj in enumerate(new_list[0:i]):
-            pj = parents[j]
-
-            if (ppp.adj[pi, pj] == 1) or (pi == pj):
-                if pc.is_adjacent(ri, rj):
-                    adj[i, j] = 1
-                    adj[j, i] = 1
-        adj[i, i] = 1
+    padj = sp.csr_matrix(ppp.adj)
+    pairs = [
+        (i, j) for i, j in _candidate_pairs(new_list)
+        if (padj[parents[i], parents[j]] == 1) or
+        (parents[i] == parents[j])]
+    adj = _adjacency(new_list, pairs, processes=processes)
 
     new_ppp = PropPreservingPartition(
         domain = ppp.domain,
@@ -292,6 +307,12 @@ def add_grid(ppp, grid_size=None, num_grid_pnts=None, abs_tol=1e-10):
     Note: There could be numerical instabilities when the continuous
     propositions in ppp do not align well with the grid resulting in very small
     regions. Performace significantly degrades without glpk.
+
+    Grid boxes contained in a region of ppp become cells as they are,
+    and only boxes that cross region boundaries are intersected with
+    the regions that their bounding boxes overlap. This assumes that
+    the regions of ppp have disjoint interiors, as in a partition.
+    Adjacency is checked only between cells in touching grid boxes.
     """
     if (grid_size!=None)&(num_grid_pnts!=None):
         raise Exception("add_grid: Only one of the grid size or number of \
@@ -352,28 +373,52 @@ def add_grid(ppp, grid_size=None, num_grid_pnts=None, abs_tol=1e-10):
             size_list[j],
             abs_tol
         )
-        if j>0:
-            if j==1:
-                re_list=list_grid[j-1]
-                re_list=product_interval(re_list, list_grid[j])
-            else:
-                re_list=product_interval(re_list, list_grid[j])
         j+=1
 
+    # grid boxes, ordered as by product_interval
+    boxes = list(itertools.product(
+        *[xrange(len(list_grid[j])) for j in xrange(dim)]))
+    lo = np.array([[list_grid[j][k[j]][0] for j in xrange(dim)]
+                   for k in boxes])
+    hi = np.array([[list_grid[j][k[j]][1] for j in xrange(dim)]
+                   for k in boxes])
+    # cull with bounding boxes: overlap[i, j] is False if box i
+    # and region j are too far for a full-dimensional intersection
+    rlo, rhi = _bounding_boxes(ppp.regions)
+    overlap = (
+        np.minimum(hi[:, None, :], rhi[None, :, :]) -
+        np.maximum(lo[:, None, :], rlo[None, :, :]) > abs_tol
+    ).all(axis=2)
+    # boxes contained in a region are cells of the new partition,
+    # assuming that the regions of ppp have disjoint interiors
+    inside = np.empty(len(boxes), dtype=int)
+    inside.fill(-1)
+    for j, region in enumerate(ppp.regions):
+        for poly in _polytopes(region):
+            (idx,) = np.nonzero(overlap[:, j] & (inside < 0))
+            c = _boxes_in_polytope(lo[idx], hi[idx], poly, abs_tol)
+            inside[idx[c]] = j
+
     new_list = []
     parent = []
-    for i in xrange(len(re_list)):
-        temp_list=list()
-        j=0
-        while j<dim*2:
-            temp_list.append([re_list[i][j],re_list[i][j+1]])
-            j=j+2
-        for j in xrange(len(ppp.regions)):
+    # grid box of each cell, and whether the cell is the whole box
+    cell_box = []
+    whole = []
+    for i in xrange(len(boxes)):
+        temp_list = [[lo[i, j], hi[i, j]] for j in xrange(dim)]
+        if inside[i] >= 0:
+            j = inside[i]
+            rc = np.min(hi[i] - lo[i]) / 2.0
+            candidates = [j]
+        else:
+            candidates = np.flatnonzero(overlap[i])
+        for j in candidates:
             tmp = pc.box2poly(temp_list)
-            isect = tmp.intersect(ppp.regions[j], abs_tol)
-
-            #if pc.is_fulldim(isect):
-            rc, xc = pc.cheby_ball(isect)
+            if inside[i] >= 0:
+                isect = tmp
+            else:
+                isect = tmp.intersect(ppp.regions[j], abs_tol)
+                rc, xc = geom.cheby_ball(isect)
             if rc > abs_tol/2:
                 if rc < abs_tol:
                     print("Warning: "
@@ -384,25 +429,191 @@ def add_grid(ppp, grid_size=None, num_grid_pnts=None, abs_tol=1e-10):
                 isect.props = ppp.regions[j].props.copy()
                 new_list.append(isect)
                 parent.append(j)
-
-    adj = sp.lil_matrix((len(new_list), len(new_list)), dtype=np.int8)
+                cell_box.append(boxes[i])
+                whole.append(inside[i] >= 0)
+
+    # only cells in the same or touching grid boxes can be adjacent,
+    # and whole boxes that touch are adjacent
+    box_cells = dict()
+    for i, k in enumerate(cell_box):
+        box_cells.setdefault(k, list()).append(i)
+    offsets = list(itertools.product((-1, 0, 1), repeat=dim))
+    padj = sp.csr_matrix(ppp.adj)
+    pairs = list()
+    adjacent = list()
     for i in xrange(len(new_list)):
-        adj[i,i] = 1
-        for j in xrange(i+1, len(new_list)):
-            if (ppp.adj[parent[i], parent[j]] == 1) or \
-                    (parent[i] == parent[j]):
-                if pc.is_adjacent(new_list[i], new_list[j]):
-                    adj[i,j] = 1
-                    adj[j,i] = 1
+        for d in offsets:
+            k = tuple(a + b for a, b in zip(cell_box[i], d))
+            for j in box_cells.get(k, ()):
+                if j <= i:
+                    continue
+                if (padj[parent[i], parent[j]] == 1) or \
+                        (parent[i] == parent[j]):
+                    if whole[i] and whole[j]:
+                        adjacent.append((i, j))
+                    else:
+                        pairs.append((i, j))
+    adj = _adjacency(new_list, pairs, adjacent)
 
+    # the cells are subsets of the regions of ppp
     return PropPreservingPartition(
         domain = ppp.domain,
         regions = new_list,
         adj = adj,
-        prop_regions = ppp.prop_regions
+        prop_regions = ppp.prop_regions,
+        check = False
     )
 
 #### Helper functions ####
+def _polytopes(region):
+    """Return C{list} of the polytopes of a region or polytope."""
+    if len(region) == 0:
+        return [region]
+    return list(region)
+
+
+def _bounding_boxes(regions):
+    """Return arrays of lower and upper corners of bounding boxes.
+
+    @return: C{(lo, hi)}, each of shape C{(len(regions), dim)}
+    """
+    lo = list()
+    hi = list()
+    for region in regions:
+        l, u = geom.bounding_box(region)
+        lo.append(l.flatten())
+        hi.append(u.flatten())
+    return np.array(lo, dtype=float), np.array(hi, dtype=float)
+
+
+def _boxes_in_polytope(lo, hi, poly, abs_tol):
+    """Return C{bool} array, C{True} for boxes contained in C{poly}.
+
+    Box C{i} has corners C{lo[i]} and C{hi[i]}.
+    The maximum of C{a * x} over a box is attained at a corner,
+    so each constraint is checked at that corner only.
+    """
+    if not len(lo):
+        return np.zeros(0, dtype=bool)
+    A = poly.A[None, :, :]
+    m = np.maximum(A * lo[:, None, :], A * hi[:, None, :]).sum(axis=2)
+    return (m <= poly.b.flatten()[None, :] + abs_tol).all(axis=1)
+
+
+def _find_adjacent_regions(regions, processes=None):
+    """Return adjacency matrix of regions, as C{pc.is_adjacent}.
+
+    Same result as C{polytope.find_adjacent_regions},
+    but checks only the pairs from L{_candidate_pairs}.
+    """
+    return _adjacency(regions, _candidate_pairs(regions),
+                      processes=processes)
+
+
+def _candidate_pairs(regions, abs_tol=pc.polytope.ABS_TOL):
+    """Return pairs of regions that can be adjacent.
+
+    These are the pairs C{(i, j)}, with C{i < j}, whose bounding
+    boxes intersect, after enlarging each polytope by C{abs_tol},
+    as C{pc.is_adjacent} does. They are found by sorting the boxes
+    along the first axis (sweep and prune), so not all pairs are
+    compared.
+
+    @rtype: C{list} of C{tuple}
+    """
+    n = len(regions)
+    if n == 0:
+        return list()
+    lo = list()
+    hi = list()
+    for region in regions:
+        boxes = [geom.bounding_box(pc.Polytope(p.A, p.b + abs_tol))
+                 for p in _polytopes(region)]
+        lo.append(np.min([l.flatten() for l, u in boxes], axis=0))
+        hi.append(np.max([u.flatten() for l, u in boxes], axis=0))
+    lo = np.array(lo)
+    hi = np.array(hi)
+    order = np.argsort(lo[:, 0], kind='mergesort')
+    lo = lo[order]
+    hi = hi[order]
+    # boxes after k that start before box k ends on the first axis
+    ends = np.searchsorted(lo[:, 0], hi[:, 0], side='right')
+    pairs = list()
+    for k in xrange(n):
+        others = np.arange(k + 1, ends[k])
+        near = ((lo[others] <= hi[k]) & (hi[others] >= lo[k])).all(axis=1)
+        for m in others[near]:
+            i, j = order[k], order[m]
+            pairs.append((min(i, j), max(i, j)))
+    pairs.sort()
+    return pairs
+
+
+def _adjacency(regions, pairs, adjacent=(), processes=None):
+    """Return adjacency matrix from checking C{pairs} of regions.
+
+    Each region is adjacent to itself, and to the regions paired
+    with it in C{adjacent}, or in C{pairs} if C{pc.is_adjacent}
+    says so. The matrix is built at once from the adjacent pairs.
+
+    @param pairs: pairs C{(i, j)} of indices of C{regions} to check
+    @param adjacent: pairs C{(i, j)} known to be adjacent
+    @param processes: if not C{None}, then check the pairs in a
+        C{multiprocessing.Pool} of this many processes
+        (C{0} for the number of CPUs)
+
+    @rtype: C{scipy.sparse.lil_matrix}
+    """
+    n = len(regions)
+    pairs = list(pairs)
+    args = [(regions[i], regions[j]) for i, j in pairs]
+    if processes is None:
+        found = map(_is_adjacent, args)
+    else:
+        pool = mp.Pool(processes or None)
+        try:
+            found = pool.map(
+                _is_adjacent, args, chunksize=max(1, len(args) // 64))
+        finally:
+            pool.terminate()
+            pool.join()
+    adj_pairs = [x for x, y in zip(pairs, found) if y]
+    adj_pairs.extend(adjacent)
+    rows = range(n)
+    cols = range(n)
+    for i, j in adj_pairs:
+        rows.extend([i, j])
+        cols.extend([j, i])
+    adj = sp.coo_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+        shape=(n, n))
+    # duplicate entries would be summed
+    adj = adj.tocsr()
+    adj.data[:] = 1
+    return adj.tolil()
+
+
+def _is_adjacent(pair):
+    return pc.is_adjacent(*pair)
+
+
+def _intersect(pair):
+    """Return intersection of region and domain, and its Chebyshev radius.
+
+    @return: C{(isect, rc)}, with C{isect} a C{Region},
+        or C{(None, None)} if the intersection is not full dimensional
+    """
+    region, domain = pair
+    isect = region.intersect(domain)
+    if not pc.is_fulldim(isect):
+        return (None, None)
+    rc, xc = geom.cheby_ball(isect)
+    # not Region yet, but Polytope ?
+    if len(isect) == 0:
+        isect = pc.Region([isect])
+    return (isect, rc)
+
+
 def compute_interval(low_domain, high_domain, size, abs_tol=1e-7):
     """Helper implementing intervals computation for each dimension.
     """
@@ -35,9 +35,12 @@ Routines in this module are cross-cutting in the sense that they
 concern multiple aspects of solutions created by TuLiP and accordingly
 should not be placed under a specific subpackage, like tulip.transys.
 """
-from itertools import chain, repeat
+from itertools import chain, product, repeat
+import os
 import time
 
+import numpy as np
+
 
 def write_python_case(filename, *args, **kwargs):
     """Convenience wrapper for writing output of python_case to file.
@@ -175,3 +178,251 @@ def python_case(M, classname="TulipStrategy", start='Sinit'):
                 args=','.join('\n{t}{v}={v}'.format(v=v, t=4*tab)
                               for v in M.inputs))
     return code
+
+
+def write_python_table(filename, M, classname="TulipStrategy",
+                       start='Sinit', sidecar=False):
+    """Convenience wrapper for writing output of python_table to file.
+
+    @type  filename: str
+    @param filename: Name of file in which to place the code generated
+        by L{python_table}.
+    @param sidecar: if C{True}, then store the table in a file
+        next to C{filename}, with extension C{.npy}.
+    @type sidecar: bool
+    """
+    if sidecar:
+        sidecar = os.path.splitext(filename)[0] + '.npy'
+    else:
+        sidecar = None
+    with open(filename, 'w') as f:
+        f.write(python_table(M, classname=classname, start=start,
+                             sidecar=sidecar))
+
+
+def python_table(M, classname="TulipStrategy", start='Sinit', sidecar=None):
+    """Export MealyMachine as Python class based on lookup tables.
+
+    Alternative to L{python_case} for large machines.
+    For each state, a C{dict} maps tuples of input values
+    to the next state and the index of a tuple of output values.
+    An input missing from an edge label matches any value,
+    as in L{python_case}, so the edge is stored once for each
+    value in the input's domain.
+    So each move takes constant time,
+    and the generated module imports quickly.
+
+    If C{sidecar} is given, then the table is saved there instead,
+    as a C{numpy} array of shape C{(states, inputs, 2)},
+    and memory-mapped when the generated module is imported.
+    The generated code then requires C{numpy}.
+
+    The generated class has the interface of L{python_case},
+    and a method C{move_many} for a sequence of inputs.
+
+    @type M: L{MealyMachine}
+    @type classname: C{str}
+    @param start: initial node in C{M}
+    @param sidecar: path of C{.npy} file to write
+    @type sidecar: C{str}
+
+    @rtype: str
+    @return: valid Python code, see L{python_case}
+    """
+    tab = 4 * ' '
+    node_to_int = dict([(s, i) for i, s in enumerate(M)])
+    input_vars = [input_var for input_var in M.inputs] if M.inputs else []
+    output_vars = [output_var for output_var in M.outputs]
+    input_args = ', '.join(input_vars)
+    # interned value tuples
+    input_index = dict()
+    output_index = dict()
+    table = list()
+    for u in M:
+        row = dict()
+        for _, w, d in M.edges_iter(u, data=True):
+            y = tuple((k, d[k]) for k in output_vars if k in d)
+            j = output_index.setdefault(y, len(output_index))
+            for x in _input_values(d, input_vars, M.inputs):
+                i = input_index.setdefault(x, len(input_index))
+                # first edge wins, as in `python_case`
+                row.setdefault(i, (node_to_int[w], j))
+        table.append(row)
+    inputs = sorted(input_index, key=input_index.get)
+    outputs = sorted(output_index, key=output_index.get)
+    code = (
+        '{imports}'
+        'class {classname}(object):\n'
+        '{t}"""Mealy transducer.\n'
+        '\n'
+        '{t}Internal states are integers, the current state\n'
+        '{t}is stored in the attribute "state".\n'
+        '{t}To take a transition, call method "move",\n'
+        '{t}or "move_many" for several transitions.\n'
+        '\n'
+        '{t}The names of input variables are stored in the\n'
+        '{t}attribute "input_vars".\n'
+        '\n'
+        '{t}Automatically generated by tulip.dumpsmach on {date}\n'
+        '{t}To learn more about TuLiP, visit http://tulip-control.org\n'
+        '{t}"""\n'
+        '{t}input_vars = {input_vars!r}\n'
+        '{t}output_vars = {output_vars!r}\n'
+        '{t}# input values -> column of `_table`\n'
+        '{t}_inputs = {inputs}\n'
+        '{t}# output values, as `(name, value)` pairs\n'
+        '{t}_outputs = {outputs}\n'
+        '{table}'
+        '\n'
+        '{t}def __init__(self):\n'
+        '{t2}self.state = {sinit}\n'
+        '\n'
+        '{t}def move(self, {input_args}):\n'
+        '{t2}"""Given inputs, take move and return outputs.\n'
+        '\n'
+        '{t2}@rtype: dict\n'
+        '{t2}@return: dictionary with keys of the output variable names:\n'
+        '{t2}    {outputs_doc}\n'
+        '{t2}"""\n'
+        '{t2}x = ({input_args}{comma})\n'
+        '{t2}self.state, j = self._step(self.state, x)\n'
+        '{t2}return dict(self._outputs[j])\n'
+        '\n'
+        '{t}def move_many(self, inputs):\n'
+        '{t2}"""Take a move for each tuple of input values.\n'
+        '\n'
+        '{t2}@param inputs: tuples of values, ordered as "input_vars"\n'
+        '{t2}@rtype: list of dict\n'
+        '{t2}@return: outputs, as returned by "move"\n'
+        '\n'
+        '{t2}If an input is invalid, then the exception is raised\n'
+        '{t2}after the moves for the preceding inputs.\n'
+        '{t2}"""\n'
+        '{t2}state = self.state\n'
+        '{t2}step = self._step\n'
+        '{t2}js = list()\n'
+        '{t2}try:\n'
+        '{t3}for x in inputs:\n'
+        '{t4}state, j = step(state, tuple(x))\n'
+        '{t4}js.append(j)\n'
+        '{t2}finally:\n'
+        '{t3}self.state = state\n'
+        '{t2}return [dict(self._outputs[j]) for j in js]\n'
+        '\n'
+        '{step}'
+        '\n'
+        '{t}def _error(self, x):\n'
+        '{t2}raise ValueError("Unrecognized input: " + "; ".join(\n'
+        '{t3}"{{k}} = {{v}}".format(k=k, v=v)\n'
+        '{t3}for k, v in zip(self.input_vars, x)))\n'
+        ).format(
+            classname=classname,
+            t=tab,
+            t2=2*tab,
+            t3=3*tab,
+            t4=4*tab,
+            date=time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime()),
+            sinit=node_to_int[start],
+            input_vars=input_vars,
+            output_vars=output_vars,
+            inputs=_dict_literal(
+                (x, i) for i, x in enumerate(inputs)),
+            outputs=_list_literal(outputs, tab),
+            input_args=input_args,
+            comma=',' if len(input_vars) == 1 else '',
+            outputs_doc=[str(v) for v in M.outputs],
+            imports=_table_imports(sidecar),
+            table=_table_code(table, len(inputs), sidecar, tab),
+            step=_step_code(sidecar, tab))
+    return code
+
+
+def _input_values(d, input_vars, domains):
+    """Return tuples of input values that match edge label C{d}.
+
+    Inputs missing from C{d} range over their domain.
+    """
+    values = [
+        [d[k]] if k in d else sorted(domains[k])
+        for k in input_vars]
+    return product(*values)
+
+
+def _table_imports(sidecar):
+    if sidecar is None:
+        return ''
+    return (
+        'import os\n'
+        'import numpy\n'
+        '\n'
+        '\n'
+        'def _load_table():\n'
+        '    """Memory-map table, found next to this module."""\n'
+        '    path = {path!r}\n'
+        '    if \'__file__\' in globals():\n'
+        '        here = os.path.dirname(os.path.abspath(__file__))\n'
+        '        p = os.path.join(here, {name!r})\n'
+        '        if os.path.exists(p):\n'
+        '            path = p\n'
+        '    return numpy.load(path, mmap_mode=\'r\')\n'
+        '\n'
+        '\n').format(
+            path=os.path.abspath(sidecar),
+            name=os.path.basename(sidecar))
+
+
+def _table_code(table, n_inputs, sidecar, tab):
+    """Return code that defines C{_table}, write sidecar file."""
+    if sidecar is None:
+        rows = ''.join(
+            '{t2}{row},\n'.format(t2=2*tab, row=_dict_literal(
+                sorted(row.iteritems())))
+            for row in table)
+        return (
+            '{t}# for each state: input column -> (next state, outputs)\n'
+            '{t}_table = [\n'
+            '{rows}'
+            '{t}]\n').format(t=tab, rows=rows)
+    a = -np.ones((len(table), n_inputs, 2), dtype=np.int32)
+    for u, row in enumerate(table):
+        for i, (v, j) in row.iteritems():
+            a[u, i] = (v, j)
+    np.save(sidecar, a)
+    return (
+        '{t}# [state, input column] -> (next state, outputs), or -1\n'
+        '{t}_table = _load_table()\n').format(t=tab)
+
+
+def _step_code(sidecar, tab):
+    if sidecar is None:
+        lookup = (
+            '{t2}try:\n'
+            '{t3}return self._table[state][self._inputs[x]]\n'
+            '{t2}except KeyError:\n'
+            '{t3}pass\n'
+            '{t2}if not self._table[state]:\n')
+    else:
+        lookup = (
+            '{t2}i = self._inputs.get(x)\n'
+            '{t2}if i is not None:\n'
+            '{t3}v, j = self._table[state, i]\n'
+            '{t3}if v >= 0:\n'
+            '{t4}return int(v), int(j)\n'
+            '{t2}if (self._table[state, :, 0] < 0).all():\n')
+    code = (
+        '{t}def _step(self, state, x):\n'
+        '{t2}"""Return next state and index of outputs."""\n' +
+        lookup +
+        '{t3}raise Exception("Reached dead-end state !")\n'
+        '{t2}self._error(x)\n')
+    return code.format(t=tab, t2=2*tab, t3=3*tab, t4=4*tab)
+
+
+def _dict_literal(items):
+    return '{' + ', '.join(
+        '{k!r}: {v!r}'.format(k=k, v=v) for k, v in items) + '}'
+
+
+def _list_literal(items, tab):
+    return '[\n' + ''.join(
+        '{t2}{x!r},\n'.format(t2=2*tab, x=x) for x in items) + tab + ']'
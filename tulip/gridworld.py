@@ -41,6 +41,8 @@ import random
 import time
 
 import numpy as np
+from scipy import ndimage
+from scipy import sparse as sp
 
 from spec.form import GRSpec
 
@@ -146,6 +148,25 @@ class GridWorld(object):
                 str(key[1] + self.offset[1])
             return out
 
+    def _cell_formulas(self, use_next=False, nonbool=True):
+        """Return formulas of all cells, as nested C{list}.
+
+        Element C{[i][j]} equals C{self.__getitem__((i, j), ...)}
+        with the same C{use_next} and C{nonbool}.
+        """
+        rows = [str(i + self.offset[0]) for i in xrange(self.W.shape[0])]
+        cols = [str(j + self.offset[1]) for j in xrange(self.W.shape[1])]
+        if nonbool and use_next:
+            fmt = "((X ({p}_r = {r})) && (X ({p}_c = {c})))"
+        elif nonbool:
+            fmt = "(({p}_r = {r}) && ({p}_c = {c}))"
+        elif use_next:
+            fmt = "X {p}_{r}_{c}"
+        else:
+            fmt = "{p}_{r}_{c}"
+        p = str(self.prefix)
+        return [[fmt.format(p=p, r=r, c=c) for c in cols] for r in rows]
+
     def __copy__(self):
         return GridWorld(self.dumps(), prefix=self.prefix)
 
@@ -270,28 +291,8 @@ class GridWorld(object):
         # Quick sanity check
         if not (self.is_empty(start) and self.is_empty(stop)):
             return False
-
-        # Similar to depth-first search
-        OPEN = [start]
-        CLOSED = []
-        while len(OPEN) > 0:
-            current = OPEN.pop()
-            if current == stop:
-                return True
-            for (i, j) in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-                if (
-                        current[0] + i < 0 or
-                        current[0] + i >= self.W.shape[0] or
-                        current[1] + j < 0 or
-                        current[1] + j >= self.W.shape[1]):
-                    continue
-                if (
-                        self.is_empty((current[0] + i, current[1] + j)) and
-                        (current[0] + i, current[1] + j) not in CLOSED and
-                        (current[0] + i, current[1] + j) not in OPEN):
-                    OPEN.append((current[0] + i, current[1] + j))
-            CLOSED.append(current)
-        return False
+        labels = _free_components(self.W)
+        return labels[start] == labels[stop]
 
     def plot(self, font_pt=18, show_grid=False, grid_width=2,
              troll_list=None, axes=None):
@@ -725,7 +726,9 @@ class GridWorld(object):
           ((prefix_r = R) & (prefix_c = C))
 
         L{GridWorld.__getitem__} and L{extract_coord} provide
-        reference implementations.
+        reference implementations.  In the Boolean case, that exactly
+        one cell variable is true is expressed by clauses of size
+        C{O(n log n)} in the number C{n} of cells (see L{_at_most_one}).
 
         @param offset: index offset to apply when generating the
                  specification; e.g., given prefix of "Y",
@@ -742,110 +745,65 @@ class GridWorld(object):
         """
         if self.W is None:
             raise ValueError("Gridworld does not exist.")
-        row_low = 0
-        row_high = self.W.shape[0]
-        col_low = 0
-        col_high = self.W.shape[1]
-        spec_trans = []
         orig_offset = copy.copy(self.offset)
         if nonbool:
             self.offset = (0, 0)
         else:
             self.offset = offset
+        cur = self._cell_formulas(nonbool=nonbool)
+        nxt = self._cell_formulas(use_next=True, nonbool=nonbool)
+        occupied = (self.W == 1)
+        free = (self.W == 0)
+        # neighbor masks: is the cell above (left, below, right) free ?
+        up = np.zeros_like(free)
+        up[1:, :] = free[:-1, :]
+        left = np.zeros_like(free)
+        left[:, 1:] = free[:, :-1]
+        down = np.zeros_like(free)
+        down[:-1, :] = free[1:, :]
+        right = np.zeros_like(free)
+        right[:, :-1] = free[:, 1:]
         # Safety, transitions
-        for i in range(row_low, row_high):
-            for j in range(col_low, col_high):
-                if self.W[i][j] == 1:
-                    continue  # Cannot start from an occupied cell.
-                spec_trans.append(self.__getitem__(
-                    (i, j), nonbool=nonbool) + " -> (")
-                # Normal transitions:
-                spec_trans[-1] += self.__getitem__((i, j),
-                                                   use_next=True,
-                                                   nonbool=nonbool)
-                if i > row_low and self.W[i - 1][j] == 0:
-                    spec_trans[-1] += " || " + \
-                        self.__getitem__(
-                            (i - 1, j), use_next=True, nonbool=nonbool)
-                if j > col_low and self.W[i][j - 1] == 0:
-                    spec_trans[-1] += " || " + \
-                        self.__getitem__(
-                            (i, j - 1), use_next=True, nonbool=nonbool)
-                if i < row_high - 1 and self.W[i + 1][j] == 0:
-                    spec_trans[-1] += " || " + \
-                        self.__getitem__(
-                            (i + 1, j), use_next=True, nonbool=nonbool)
-                if j < col_high - 1 and self.W[i][j + 1] == 0:
-                    spec_trans[-1] += " || " + \
-                        self.__getitem__(
-                            (i, j + 1), use_next=True, nonbool=nonbool)
-                spec_trans[-1] += ")"
-
+        spec_trans = []
+        for i, j in zip(*np.nonzero(~occupied)):
+            moves = [nxt[i][j]]
+            if up[i, j]:
+                moves.append(nxt[i - 1][j])
+            if left[i, j]:
+                moves.append(nxt[i][j - 1])
+            if down[i, j]:
+                moves.append(nxt[i + 1][j])
+            if right[i, j]:
+                moves.append(nxt[i][j + 1])
+            spec_trans.append(
+                cur[i][j] + " -> (" + " || ".join(moves) + ")")
         # Safety, static
-        for i in range(row_low, row_high):
-            for j in range(col_low, col_high):
-                if self.W[i][j] == 1:
-                    spec_trans.append(
-                        "!(" + self.__getitem__((i, j), use_next=True,
-                                                nonbool=nonbool) + ")")
-
+        spec_trans.extend(
+            "!(" + nxt[i][j] + ")" for i, j in zip(*np.nonzero(occupied)))
         # Safety, mutex; only needed when using boolean variables for cells
         if not nonbool:
-            pos_indices = [k for k in itertools.product(
-                range(row_low, row_high), range(col_low, col_high))]
-            disj = []
-            for outer_ind in pos_indices:
-                conj = []
-                if (
-                        outer_ind != (-1, -1) and
-                        self.W[outer_ind[0]][outer_ind[1]] == 1):
-                    continue
-                if outer_ind == (-1, -1):
-                    conj.append(self.prefix + "_n_n'")
-                else:
-                    conj.append(
-                        self.__getitem__(
-                            (outer_ind[0], outer_ind[1]),
-                            use_next=True, nonbool=nonbool))
-                for inner_ind in pos_indices:
-                    if (
-                            (
-                                inner_ind != (-1, -1) and
-                                self.W[inner_ind[0]][inner_ind[1]] == 1) or
-                            outer_ind == inner_ind):
-                        continue
-                    if inner_ind == (-1, -1):
-                        conj.append("(!X " + self.prefix + "_n_n)")
-                    else:
-                        conj.append(
-                            "(!" +
-                            self.__getitem__(
-                                (inner_ind[0], inner_ind[1]),
-                                use_next=True,
-                                nonbool=nonbool) + ")")
-                disj.append("(" + " && ".join(conj) + ")")
-            spec_trans.append("\n|| ".join(disj))
+            moves = [nxt[i][j] for i, j in zip(*np.nonzero(~occupied))]
+            spec_trans.append(" || ".join(moves))
+            spec_trans.extend(_at_most_one(moves))
 
         if nonbool:
             sys_vars = {self.prefix + "_r": (0, self.W.shape[0] - 1),
                         self.prefix + "_c": (0, self.W.shape[1] - 1)}
         else:
-            sys_vars = set()
-            for i in range(row_low, row_high):
-                for j in range(col_low, col_high):
-                    sys_vars.add(self.__getitem__((i, j), nonbool=nonbool))
+            sys_vars = set(itertools.chain.from_iterable(cur))
 
         if nonbool:
             initspec = [self.__getitem__(loc, nonbool=nonbool)
                         for loc in self.init_list]
+            init_str = " || ".join(initspec)
+        elif self.init_list:
+            initspec = [self.__getitem__(loc, nonbool=nonbool)
+                        for loc in self.init_list]
+            init_str = " && ".join(
+                ["(" + " || ".join(initspec) + ")"] +
+                _at_most_one(sorted(sys_vars)))
         else:
-            initspec = []
-            for loc in self.init_list:
-                mutex = [self.__getitem__((loc[0], loc[1]), nonbool=nonbool)]
-                mutex.extend(["!" + ovar for ovar in sys_vars if ovar !=
-                              self.__getitem__(loc, nonbool=nonbool)])
-                initspec.append("(" + " && ".join(mutex) + ")")
-        init_str = " || ".join(initspec)
+            init_str = ""
 
         spec_goal = []
         for loc in self.goal_list:
@@ -863,6 +821,71 @@ class GridWorld(object):
                           env_safety=spec_trans,
                           env_prog=spec_goal)
 
+    def adjacency(self):
+        """Return adjacency matrix of the empty cells.
+
+        Cell C{(i, j)} has index C{i * ncols + j}, where C{ncols} is
+        the number of columns.  Each empty cell is adjacent to itself
+        and to its empty 4-neighbors.  The rows and columns of
+        occupied cells are zero.
+
+        @rtype: C{scipy.sparse.csr_matrix}
+        """
+        if self.W is None:
+            raise ValueError("Gridworld does not exist.")
+        (n, m) = self.W.shape
+        index = np.arange(n * m).reshape(n, m)
+        free = (self.W == 0)
+        # pairs of empty cells, each 4-neighbor pair in both directions
+        vert = free[:-1, :] & free[1:, :]
+        horiz = free[:, :-1] & free[:, 1:]
+        a = [index[free], index[:-1, :][vert], index[1:, :][vert],
+             index[:, :-1][horiz], index[:, 1:][horiz]]
+        b = [index[free], index[1:, :][vert], index[:-1, :][vert],
+             index[:, 1:][horiz], index[:, :-1][horiz]]
+        rows = np.concatenate(a)
+        cols = np.concatenate(b)
+        data = np.ones(len(rows), dtype=bool)
+        return sp.csr_matrix((data, (rows, cols)), shape=(n * m, n * m))
+
+    def to_fts(self):
+        """Return transition system of moves in this gridworld.
+
+        The states are the empty cells, as integers
+        C{i * ncols + j} (see L{adjacency}), and the transitions are
+        the moves to the same cell or an empty 4-neighbor.
+        The initial states are the cells in C{init_list},
+        and the cell of goal C{k} in C{goal_list} is labeled
+        with the atomic proposition C{"goal_k"}.
+
+        Pass the result to L{synth.sys_to_spec}, preferably with
+        C{compact=True}, for a specification with a single integer
+        state variable.
+
+        @rtype: L{transys.FTS}
+        """
+        from tulip import transys as trs
+        adj = self.adjacency()
+        (n, m) = self.W.shape
+        states = np.flatnonzero(self.W == 0).tolist()
+        goals = dict()
+        for k, (i, j) in enumerate(self.goal_list):
+            goals.setdefault(int(i) * m + int(j), set()).add(
+                'goal_' + str(k))
+        ts = trs.FTS()
+        ts.atomic_propositions.add_from(
+            ['goal_' + str(k) for k in xrange(len(self.goal_list))])
+        label = dict()
+        ts.add_nodes_bulk(
+            (u, {'ap': goals[u]} if u in goals else label) for u in states)
+        ts.states.initial.add_from(
+            [int(i) * m + int(j) for i, j in self.init_list])
+        label = dict()
+        u, v = adj.nonzero()
+        ts.add_edges_bulk(
+            (x, y, label) for x, y in zip(u.tolist(), v.tolist()))
+        return ts
+
     def scale(self, xf=1, yf=1):
         """Return a new gridworld equivalent to this but scaled by integer
         factor (xf, yf). In the new world, obstacles are increased in size but
@@ -922,79 +945,59 @@ def random_world(size, wall_density=.2, num_init=1, num_goals=2, prefix="Y",
              return a feasible random gridworld with the given
              parameters.  Note that "feasibility" does not account for
              nondeterminism (in particular, nonzero num_trolls
-             argument has no effect.)
+             argument has no effect.)  Each cell is tried once as a
+             wall, and feasibility is checked by labeling the
+             connected empty regions.
 
     @param timeout: if ensure_feasible, then quit if no correct random
              world is found before timeout seconds.  If timeout is
              None (default), then do not impose time constraints.
 
-    @rtype: L{GridWorld}, or None if timeout occurs.
+    @rtype: L{GridWorld}, or None if timeout occurs, or if no
+        feasible world is found.
 
     """
     if ensure_feasible and timeout is not None:
         st = time.time()
     num_cells = size[0] * size[1]
-    goal_list = []
-    init_list = []
-    troll_list = []
     W = np.zeros(num_cells, dtype=np.int32)
     num_blocks = int(np.round(wall_density * num_cells))
-    for i in range(num_goals):
-        avail_inds = np.array(range(num_cells))[W == 0]
-        avail_inds = [k for k in avail_inds if k not in goal_list]
-        goal_list.append(
-            avail_inds[np.random.randint(low=0, high=len(avail_inds))])
-    for i in range(num_init):
-        avail_inds = np.array(range(num_cells))[W == 0]
-        avail_inds = [
-            k for k in avail_inds if k not in goal_list and k not in init_list]
-        init_list.append(
-            avail_inds[np.random.randint(low=0, high=len(avail_inds))])
-    for i in range(num_trolls):
-        avail_inds = np.array(range(num_cells))[W == 0]
-        avail_inds = [
-            k for k in avail_inds
-            if (
-                k not in goal_list and
-                k not in init_list and
-                k not in troll_list)]
-        troll_list.append(
-            avail_inds[np.random.randint(low=0, high=len(avail_inds))])
-    bcounter = 0
-    while bcounter < num_blocks:  # Add blocks (or "wall cells")
-        avail_inds = np.array(range(num_cells))[W == 0]
-        avail_inds = [
-            k for k in avail_inds
-            if (
-                k not in goal_list and
-                k not in init_list and
-                k not in troll_list)]
-        changed_index = np.random.randint(low=0, high=len(avail_inds))
-        W[avail_inds[changed_index]] = 1
-        bcounter += 1
-        if ensure_feasible:
+    # distinct cells for goals, initial positions, and trolls
+    marked = np.random.choice(
+        num_cells, num_goals + num_init + num_trolls, replace=False)
+    goal_list = list(marked[:num_goals])
+    init_list = list(marked[num_goals:num_goals + num_init])
+    troll_list = list(marked[num_goals + num_init:])
+    avail_inds = np.setdiff1d(np.arange(num_cells), marked)
+    if not ensure_feasible:
+        W[np.random.choice(avail_inds, num_blocks, replace=False)] = 1
+    else:
+        # Try the free cells in random order.  Blocks are only added,
+        # so a block that separates the initial positions and goals
+        # would separate them later too, and each cell is tried once.
+        W = W.reshape(size)
+        points = tuple(np.unravel_index(
+            marked[:num_goals + num_init], size))
+        labels = _free_components(W)
+        bcounter = 0
+        for k in np.random.permutation(avail_inds):
+            if bcounter == num_blocks:
+                break
             if (timeout is not None) and (time.time() - st > timeout):
                 return None
-            # If feasibility must be guaranteed, then check whether
-            # the newly unreachable cell is permissible.
-            W_tmp = W.reshape(size)
-            goal_list_tmp = [(k / size[1], k % size[1]) for k in goal_list]
-            init_list_tmp = [(k / size[1], k % size[1]) for k in init_list]
-            troll_list_tmp = [(k / size[1], k % size[1]) for k in troll_list]
-            world = GridWorld(prefix=prefix)
-            world.W = W_tmp
-            chain_of_points = init_list_tmp[:]
-            chain_of_points.extend(goal_list_tmp)
-            is_feasible = True
-            for i in range(len(chain_of_points)):
-                if not world.is_reachable(
-                        chain_of_points[i],
-                        chain_of_points[(i + 1) % len(chain_of_points)]):
-                    is_feasible = False
-                    break
-            if not is_feasible:
-                W[avail_inds[changed_index]] = 0
-                bcounter -= 1
+            cell = np.unravel_index(k, size)
+            W[cell] = 1
+            c = labels[points]
+            if c.size and labels[cell] == c[0] and _may_separate(W, cell):
+                new_labels = _free_components(W)
+                c = new_labels[points]
+                if not (c == c[0]).all():
+                    W[cell] = 0
+                    continue
+                labels = new_labels
+            bcounter += 1
+        if bcounter < num_blocks:
+            return None
     # Reshape the gridworld to final form; build and return the result.
     W = W.reshape(size)
     goal_list = [(k / size[1], k % size[1]) for k in goal_list]
@@ -1150,34 +1153,100 @@ def add_trolls(Y, troll_list, prefix="X", start_anywhere=False, nonbool=True,
                            controlled_dyn=False, nonbool=nonbool)
 
     # Mutual exclusion
-    for i in range(Y.size()[0]):
-        for j in range(Y.size()[1]):
-            for Xi in X:
-                if (
-                        i >= Xi[0][0] and
-                        i < Xi[0][0] + Xi[1].size()[0] and
-                        j >= Xi[0][1] and
-                        j < Xi[0][1] + Xi[1].size()[1]):
-                    if nonbool:
-                        Xivar = (
-                            "((X " + Xi[1].prefix +
-                            "_r = " + str(i - Xi[0][0]) +
-                            ") & (X " + Xi[1].prefix + "_c = " +
-                            str(j - Xi[0][1]) + "))")
-                    else:
-                        Xivar = (
-                            "X " + Xi[1].prefix +
-                            "_" + str(i) + "_" + str(j))
-                    spec.sys_safety.append(
-                        "!(" + Y.__getitem__(
-                            (i, j), nonbool=nonbool, use_next=True) +
-                        " && " + Xivar + ")")
+    Ynext = Y._cell_formulas(use_next=True, nonbool=nonbool)
+    for (r0, c0), Xi in X:
+        (h, w) = Xi.size()
+        for i in xrange(r0, r0 + h):
+            for j in xrange(c0, c0 + w):
+                if nonbool:
+                    Xivar = (
+                        "((X " + Xi.prefix +
+                        "_r = " + str(i - r0) +
+                        ") & (X " + Xi.prefix + "_c = " +
+                        str(j - c0) + "))")
+                else:
+                    Xivar = (
+                        "X " + Xi.prefix +
+                        "_" + str(i) + "_" + str(j))
+                spec.sys_safety.append(
+                    "!(" + Ynext[i][j] + " && " + Xivar + ")")
 
     if get_moves_lists:
         return (spec, moves_N)
     return spec
 
 
+def _free_components(W):
+    """Return array of labels of the 4-connected empty regions of C{W}.
+
+    Occupied cells are labeled 0, empty cells with the positive
+    label of their region.
+
+    @type W: 2-dimensional C{numpy.ndarray}
+    """
+    labels, _ = ndimage.label(W == 0)
+    return labels
+
+
+# the 8 cells around a cell, in cyclic order
+_RING = [(-1, -1), (-1, 0), (-1, 1), (0, 1),
+         (1, 1), (1, 0), (1, -1), (0, -1)]
+
+
+def _may_separate(W, cell):
+    """Return C{False} if the newly occupied C{cell} separates nothing.
+
+    That is the case if the empty neighbors of C{cell} remain connected
+    through the empty cells around it.  Consecutive cells of L{_RING}
+    are adjacent, so it suffices that the empty neighbors are on a
+    single run of empty ring cells.
+    """
+    (n, m) = W.shape
+    free = [0 <= cell[0] + i < n and 0 <= cell[1] + j < m and
+            W[cell[0] + i, cell[1] + j] == 0 for i, j in _RING]
+    if all(free):
+        return False
+    # rotate so that the ring starts after an occupied cell
+    k = free.index(False)
+    free = free[k + 1:] + free[:k + 1]
+    neighbors = [(i, j) in _RING[1::2] for i, j in
+                 _RING[k + 1:] + _RING[:k + 1]]
+    runs = 0
+    run_has_neighbor = False
+    for f, nb in zip(free, neighbors):
+        if f:
+            run_has_neighbor = run_has_neighbor or nb
+        else:
+            runs += run_has_neighbor
+            run_has_neighbor = False
+    return runs > 1
+
+
+def _at_most_one(formulas):
+    """Return clauses whose conjunction means at most one is true.
+
+    Halves the list recursively, requiring that at most one in
+    each half holds, and not some in both halves.
+    So the clauses total C{O(n log n)} in size, without auxiliary
+    variables, instead of the C{O(n^2)} of pairwise exclusion.
+
+    @type formulas: C{list} of C{str}
+    @rtype: C{list} of C{str}
+    """
+    clauses = list()
+    stack = [formulas]
+    while stack:
+        x = stack.pop()
+        if len(x) < 2:
+            continue
+        k = len(x) // 2
+        a, b = x[:k], x[k:]
+        clauses.append("!((" + " || ".join(a) + ") && (" +
+                       " || ".join(b) + "))")
+        stack.extend([a, b])
+    return clauses
+
+
 def extract_coord(var_name):
     """Assuming prefix_R_C format, return (prefix,row,column) tuple.
 
@@ -0,0 +1,126 @@
+"""Incremental reading of large JSON objects from solvers.
+
+The strategies that solvers dump as JSON are a few header
+entries, followed by a (possibly huge) object of nodes.
+L{iterparse} yields the nodes one by one, so that the strategy
+can be built without first loading the whole document.
+"""
+from __future__ import absolute_import
+import json
+import re
+
+
+CHUNK_SIZE = 2**16
+_ws = re.compile(r'[ \t\n\r]*')
+# characters that can follow a complete number
+_delimiters = {',', ']', '}', ' ', '\t', '\n', '\r'}
+
+
+def iterparse(f, key, chunk_size=CHUNK_SIZE):
+    """Yield entries of the top-level JSON object in C{f}.
+
+    The value of C{key} is assumed to be an object,
+    and is yielded item by item, instead of as a whole.
+
+    @param f: file-like object with a C{read} method
+    @param key: top-level key whose value to stream
+    @type key: C{str}
+
+    @return: generator of C{((k,), value)} for each top-level entry,
+        and C{((key, k), value)} for each item of C{key}
+    """
+    r = _Reader(f, chunk_size)
+    r.expect('{')
+    if r.peek() == '}':
+        return
+    while True:
+        k = r.value()
+        r.expect(':')
+        if k == key:
+            for item in _iter_object(r, key):
+                yield item
+        else:
+            yield (k,), r.value()
+        if r.delimiter('}'):
+            return
+
+
+def _iter_object(r, key):
+    r.expect('{')
+    if r.peek() == '}':
+        r.pos += 1
+        return
+    while True:
+        k = r.value()
+        r.expect(':')
+        yield (key, k), r.value()
+        if r.delimiter('}'):
+            return
+
+
+class _Reader(object):
+    """Buffer over a file, for decoding one JSON value at a time."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def more(self):
+        """Read next chunk, return C{False} at end of file."""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return next non-whitespace character, or C{''} at end."""
+        while True:
+            self.pos = _ws.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ''
+
+    def expect(self, c):
+        d = self.peek()
+        if d != c:
+            raise ValueError(
+                'expected "{c}", found "{d}" at {i}'.format(
+                    c=c, d=d, i=self.pos))
+        self.pos += 1
+
+    def delimiter(self, end):
+        """Consume a comma or C{end}, return C{True} if C{end}."""
+        c = self.peek()
+        if c not in (',', end):
+            raise ValueError(
+                'expected "," or "{e}", found "{c}"'.format(e=end, c=c))
+        self.pos += 1
+        return c == end
+
+    def value(self):
+        """Decode and return next JSON value."""
+        self.peek()
+        while True:
+            try:
+                v, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.more():
+                    continue
+                raise
+            # a number may continue in the next chunk,
+            # for example "1" followed by ".5"
+            if (isinstance(v, (int, long, float)) and
+                    not isinstance(v, bool) and
+                    self.buf[end:end + 1] not in _delimiters and
+                    self.more()):
+                continue
+            self.pos = end
+            return v
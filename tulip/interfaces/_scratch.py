@@ -0,0 +1,47 @@
+"""Scratch directories for solvers that read and write named files.
+
+Each call gets a fresh directory, which is removed afterwards,
+also when the solver fails.
+The directory is created under the environment variable
+C{TULIP_SCRATCH_DIR} if set, otherwise under C{/dev/shm}
+if it exists (a C{tmpfs}, so the files never reach a disk,
+or a networked filesystem), otherwise under the default
+temporary directory.
+"""
+from __future__ import absolute_import
+import contextlib
+import os
+import shutil
+import tempfile
+
+
+SHM = '/dev/shm'
+
+
+def base_dir():
+    """Return directory under which scratch directories are created."""
+    d = os.environ.get('TULIP_SCRATCH_DIR')
+    if d:
+        return d
+    if os.path.isdir(SHM) and os.access(SHM, os.W_OK | os.X_OK):
+        return SHM
+    return None
+
+
+def mkdtemp():
+    """Return path of new scratch directory, see L{remove}."""
+    return tempfile.mkdtemp(prefix='tulip-', dir=base_dir())
+
+
+def remove(d):
+    shutil.rmtree(d, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Context manager of a scratch directory, removed on exit."""
+    d = mkdtemp()
+    try:
+        yield d
+    finally:
+        remove(d)
@@ -46,16 +46,21 @@ import logging
 import copy
 import os
 import subprocess
+import StringIO
 import tempfile
-import json
 import xml.etree.ElementTree as ET
 import networkx as nx
 from tulip.spec import GRSpec, translate
+from tulip.interfaces import _jsonstream
+from tulip.interfaces import pool
 
 
 GR1C_MIN_VERSION = '0.9.0'
 GR1C_BIN_PREFIX = ""
 DEFAULT_NAMESPACE = "http://tulip-control.sourceforge.net/ns/1"
+# queries written at once by `GR1CSession.iswinning_many`,
+# few enough for the answers to fit in the pipe buffer
+PIPELINE_SIZE = 1000
 _hl = 60 * '-'
 logger = logging.getLogger(__name__)
 
@@ -350,34 +355,61 @@ def _parse_vars(variables, vardict):
 def load_aut_json(x):
     """Return strategy constructed from output of gr1c
 
+    The JSON is read incrementally, and the graph built in one pass.
+    Nodes with the same variable values share the same C{'state'}
+    C{dict}, so it should not be modified.
+
     @param x: string or file-like object
 
     @return: strategy as C{networkx.DiGraph}, like the return value of
         L{load_aut_xml}
     """
-    try:
-        autjs = json.loads(x)
-    except TypeError:
-        autjs = json.load(x)
-    if autjs['version'] != 1:
-        raise ValueError('Only gr1c JSON format version 1 is supported.')
-    # convert to nx
+    if isinstance(x, basestring):
+        x = StringIO.StringIO(x)
     A = nx.DiGraph()
-    symtab = autjs['ENV'] + autjs['SYS']
-    A.env_vars = dict([v.items()[0] for v in autjs['ENV']])
-    A.sys_vars = dict([v.items()[0] for v in autjs['SYS']])
+    header = dict()
+    states = dict()
+    symtab = None
     omit = {'state', 'trans'}
-    for node_ID, d in autjs['nodes'].iteritems():
+    for path, d in _jsonstream.iterparse(x, 'nodes'):
+        if len(path) == 1:
+            (k,) = path
+            header[k] = d
+            if k == 'version' and d != 1:
+                raise ValueError(
+                    'Only gr1c JSON format version 1 is supported.')
+            continue
+        if symtab is None:
+            if 'ENV' not in header or 'SYS' not in header:
+                raise ValueError('variables must precede nodes')
+            symtab = [v.keys()[0] for v in header['ENV'] + header['SYS']]
+        _, node_ID = path
         node_label = {k: d[k] for k in d if k not in omit}
-        node_label['state'] = dict([(symtab[i].keys()[0],
-                                     autjs['nodes'][node_ID]['state'][i])
-                                    for i in range(len(symtab))])
+        node_label['state'] = _intern_state(d['state'], symtab, states)
         A.add_node(node_ID, node_label)
-    for node_ID, d in autjs['nodes'].iteritems():
         for to_node in d['trans']:
             A.add_edge(node_ID, to_node)
+    if header.get('version') != 1:
+        raise ValueError('Only gr1c JSON format version 1 is supported.')
+    A.env_vars = dict([v.items()[0] for v in header['ENV']])
+    A.sys_vars = dict([v.items()[0] for v in header['SYS']])
     return A
 
+
+def _intern_state(values, symtab, states):
+    """Return C{dict} from C{symtab} to C{values}, shared via C{states}.
+
+    @param states: map from tuples of values to the C{dict}s
+        returned so far
+    @type states: C{dict}
+    """
+    values = tuple(values)
+    state = states.get(values)
+    if state is None:
+        state = dict(zip(symtab, values))
+        states[values] = state
+    return state
+
 def check_syntax(spec_str):
     """Check whether given string has correct gr1c specification syntax.
 
@@ -445,13 +477,15 @@ def synthesize(spec):
     """
     _assert_gr1c()
     init_option = select_options(spec)
+    # spooled to a file, to be parsed incrementally
+    fout = tempfile.TemporaryFile()
     try:
         p = subprocess.Popen(
             [GR1C_BIN_PREFIX + "gr1c",
              "-n", init_option,
              "-t", "json"],
             stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+            stdout=fout, stderr=subprocess.STDOUT
         )
     except OSError as e:
         if e.errno == os.errno.ENOENT:
@@ -472,16 +506,64 @@ def synthesize(spec):
     except:
         logger.error('failed to write auxiliary file: "{f}"'.format(f=fname))
 
-    (stdoutdata, stderrdata) = p.communicate(s)
+    p.communicate(s)
+    return _load_output(p.returncode, fout)
+
+
+def synthesize_async(spec, loop, timeout=None):
+    """Return future of L{synthesize}, run by C{loop}.
+
+    @type loop: L{procloop.ProcessLoop}
+    @param timeout: seconds, after which C{gr1c} is killed
+    @rtype: L{procloop.Future}
+    """
+    _assert_gr1c()
+    init_option = select_options(spec)
+    s = translate(spec, 'gr1c')
+    logger.info('\n{hl}\n gr1c input:\n {s}\n{hl}'.format(s=s, hl=_hl))
+    f = loop.spawn(
+        [GR1C_BIN_PREFIX + "gr1c", "-n", init_option, "-t", "json"],
+        input=s, timeout=timeout, merge_stderr=True)
+    return f.then(lambda r: _load_output(r[0], r[1]))
+
+
+def check_realizable_async(spec, loop, timeout=None):
+    """Return future of L{check_realizable}, run by C{loop}.
 
+    cf. L{synthesize_async}
+    """
+    _assert_gr1c()
+    init_option = select_options(spec)
+    s = translate(spec, 'gr1c')
+    f = loop.spawn(
+        [GR1C_BIN_PREFIX + "gr1c", "-n", init_option, "-r"],
+        input=s, timeout=timeout, merge_stderr=True)
+
+    def realizable(r):
+        returncode, out, _ = r
+        with out:
+            if returncode != 0:
+                logger.info(out.read())
+        return returncode == 0
+
+    return f.then(realizable)
+
+
+def _load_output(returncode, fout):
+    """Return strategy from file with output of C{gr1c}, close file."""
+    with fout:
+        fout.seek(0)
+        if returncode == 0 and not logger.isEnabledFor(logging.DEBUG):
+            return load_aut_json(fout)
+        stdoutdata = fout.read()
     msg = (
         ('{spaces} gr1c return code: {c}\n\n'
          '{spaces} gr1c stdout, stderr:\n {out}\n\n').format(
-             c=p.returncode, out=stdoutdata, spaces=30 * ' '
+             c=returncode, out=stdoutdata, spaces=30 * ' '
         )
     )
 
-    if p.returncode == 0:
+    if returncode == 0:
         logger.debug(msg)
         strategy = load_aut_json(stdoutdata)
         return strategy
@@ -527,11 +609,12 @@ def load_mealy(filename, fformat='tulipxml'):
     @return: loaded strategy as an annotated graph.
     @rtype: C{networkx.Digraph}
     """
-    s = open(filename, 'r').read()
     if fformat.lower() == 'tulipxml':
+        s = open(filename, 'r').read()
         strategy = load_aut_xml(s)
     elif fformat.lower() == 'json':
-        strategy = load_aut_json(s)
+        with open(filename, 'r') as f:
+            strategy = load_aut_json(f)
     else:
         ValueError('gr1c.load_mealy() : Unrecognized file format, "'
                    +str(fformat)+'"')
@@ -583,20 +666,41 @@ class GR1CSession:
         (strings) and values of the value taken by that variable in
         this state, e.g., as in nodes of the Automaton class.
         """
-        state_vector = range(len(state))
-        for ind in range(len(self.env_vars)):
-            state_vector[ind] = state[self.env_vars[ind]]
-        for ind in range(len(self.sys_vars)):
-            state_vector[ind+len(self.env_vars)] = state[self.sys_vars[ind]]
-        self.p.stdin.write(
-            "winning " +
-            " ".join([str(i) for i in state_vector])+"\n"
-        )
-        if "True\n" in self.p.stdout.readline():
+        self.p.stdin.write(self._winning_command(state))
+        if "True\n" in self._readline():
             return True
         else:
             return False
 
+    def iswinning_many(self, states):
+        """Return list of results of iswinning for each state.
+
+        The queries are written in batches of C{PIPELINE_SIZE},
+        before reading the answers, to save round-trips.
+        """
+        answers = list()
+        states = list(states)
+        for i in xrange(0, len(states), PIPELINE_SIZE):
+            batch = states[i:i + PIPELINE_SIZE]
+            self.p.stdin.write(
+                "".join(self._winning_command(s) for s in batch))
+            answers.extend(
+                "True\n" in self._readline() for s in batch)
+        return answers
+
+    def _winning_command(self, state):
+        state_vector = (
+            [state[k] for k in self.env_vars] +
+            [state[k] for k in self.sys_vars])
+        return "winning " + " ".join(str(i) for i in state_vector) + "\n"
+
+    def _readline(self):
+        """Return line from gr1c, raise EOFError if it exited."""
+        line = self.p.stdout.readline()
+        if not line:
+            raise EOFError('gr1c process ended')
+        return line
+
     def getindex(self, state, goal_mode):
         if goal_mode < 0 or goal_mode > self.numgoals()-1:
             raise ValueError("Invalid goal mode requested: "+str(goal_mode))
@@ -609,7 +713,7 @@ class GR1CSession:
             [str(i) for i in state_vector]) +" " +
             str(goal_mode) +"\n"
         )
-        line = self.p.stdout.readline()
+        line = self._readline()
         if len(self.prompt) > 0:
                 loc = line.find(self.prompt)
                 if loc >= 0:
@@ -630,7 +734,7 @@ class GR1CSession:
             "envnext " +" ".join([str(i) for i in state_vector]) +"\n"
         )
         env_moves = []
-        line = self.p.stdout.readline()
+        line = self._readline()
         while "---\n" not in line:
             if len(self.prompt) > 0:
                 loc = line.find(self.prompt)
@@ -640,7 +744,7 @@ class GR1CSession:
                 (k, int(s)) for (k,s) in
                 zip(self.env_vars, line.split())
             ]))
-            line = self.p.stdout.readline()
+            line = self._readline()
         return env_moves
 
     def sys_nextfeas(self, state, env_move, goal_mode):
@@ -665,7 +769,7 @@ class GR1CSession:
             [str(i) for i in emove_vector]
         )+" "+str(goal_mode)+"\n")
         sys_moves = []
-        line = self.p.stdout.readline()
+        line = self._readline()
         while "---\n" not in line:
             if len(self.prompt) > 0:
                 loc = line.find(self.prompt)
@@ -675,7 +779,7 @@ class GR1CSession:
                 (k, int(s)) for (k,s)
                 in zip(self.sys_vars, line.split())
             ]))
-            line = self.p.stdout.readline()
+            line = self._readline()
         return sys_moves
 
     def sys_nexta(self, state, env_move):
@@ -698,7 +802,7 @@ class GR1CSession:
             [str(i) for i in emove_vector])+"\n"
         )
         sys_moves = []
-        line = self.p.stdout.readline()
+        line = self._readline()
         while "---\n" not in line:
             if len(self.prompt) > 0:
                 loc = line.find(self.prompt)
@@ -708,7 +812,7 @@ class GR1CSession:
                 (k, int(s)) for (k,s) in
                 zip(self.sys_vars, line.split())
             ]))
-            line = self.p.stdout.readline()
+            line = self._readline()
         return sys_moves
 
     def getvars(self):
@@ -717,7 +821,7 @@ class GR1CSession:
         Indices are indicated in parens.
         """
         self.p.stdin.write("var\n")
-        line = self.p.stdout.readline()
+        line = self._readline()
         if len(self.prompt) > 0:
                 loc = line.find(self.prompt)
                 if loc >= 0:
@@ -726,7 +830,7 @@ class GR1CSession:
 
     def numgoals(self):
         self.p.stdin.write("numgoals\n")
-        line = self.p.stdout.readline()
+        line = self._readline()
         if len(self.prompt) > 0:
                 loc = line.find(self.prompt)
                 if loc >= 0:
@@ -759,6 +863,12 @@ class GR1CSession:
             self.p = None
         return True
 
+    def kill(self):
+        """Kill gr1c child process, without waiting for it to quit."""
+        if self.p is not None:
+            self.p.kill()
+            self.p.wait()
+
     def close(self):
         """End session, and kill gr1c child process.
         """
@@ -769,3 +879,44 @@ class GR1CSession:
             return False
         else:
             return True
+
+
+def session_pool(spec, size=2, timeout=None):
+    """Return pool of interactive gr1c sessions for C{spec}.
+
+    The spec is written once to a temporary file,
+    which is removed when the pool is closed.
+    Consult L{GR1CSession} about the queries,
+    for example:
+
+      >>> p = session_pool(spec, size=4, timeout=0.5)
+      >>> p.call('iswinning', dict(x=0, y=1))
+      >>> p.close()
+
+    @type spec: L{GRSpec}
+    @param size: number of C{gr1c} processes
+    @param timeout: seconds, after which a query is abandoned
+        and its process restarted
+
+    @rtype: L{pool.SessionPool}
+    """
+    _assert_gr1c()
+    fd, fname = tempfile.mkstemp(suffix='.spc')
+    with os.fdopen(fd, 'w') as f:
+        f.write(translate(spec, 'gr1c'))
+
+    def factory():
+        s = GR1CSession(fname, sys_vars=[])
+        # order of variables in state vectors, as gr1c reports it
+        names = [x.split()[0] for x in s.getvars().split(',')]
+        s.env_vars = [k for k in names if k in spec.env_vars]
+        s.sys_vars = [k for k in names if k in spec.sys_vars]
+        return s
+
+    try:
+        return pool.SessionPool(
+            factory, size=size, timeout=timeout,
+            cleanup=lambda: os.remove(fname))
+    except Exception:
+        os.remove(fname)
+        raise
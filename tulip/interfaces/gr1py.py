@@ -39,9 +39,14 @@ import logging
 from tulip.spec import translate
 from tulip.interfaces.gr1c import load_aut_json
 from tulip.interfaces.gr1c import select_options
+from tulip.interfaces import pool
 try:
     import gr1py
     import gr1py.cli
+    from gr1py.form import gr1c as gr1py_gr1c
+    from gr1py.form import util as gr1py_util
+    from gr1py.minnx import DiGraph as _DiGraph
+    from gr1py.tstruct import AnnTransitionSystem
 except ImportError:
     gr1py = None
 
@@ -77,6 +82,139 @@ def synthesize(spec):
     return load_aut_json(s)
 
 
+def synthesize_batch(spec, variants):
+    """Yield strategy for each variant of C{spec}.
+
+    The transition relations of C{spec} are enumerated once.
+    Variants that differ from C{spec} only in initial conditions
+    and progress clauses reuse them, and are only re-annotated.
+    Other variants are enumerated from scratch.
+
+    @type spec: L{GRSpec}
+    @type variants: iterable of L{GRSpec}
+    @return: generator of C{networkx.DiGraph} or C{None},
+        cf. L{synthesize}
+    """
+    tsys, exprtab = _spec_to_gr1py(spec)
+    for variant in variants:
+        init_option = select_options(variant)
+        s = translate(variant, 'gr1c')
+        symtab, vexprtab = gr1py_util.gen_expr(gr1py_gr1c.parse(s))
+        vexprtab = gr1py_util.fill_empty(vexprtab)
+        if (symtab == tsys.symtab and
+                vexprtab['ENVTRANS'] == exprtab['ENVTRANS'] and
+                vexprtab['SYSTRANS'] == exprtab['SYSTRANS']):
+            vtsys = _annotate(tsys, vexprtab)
+        else:
+            logger.info('transitions differ, enumerate variant')
+            vtsys = gr1py.tstruct.ts_from_expr(symtab, vexprtab)
+        strategy = gr1py.solve.synthesize(
+            vtsys, vexprtab, init_flags=init_option)
+        if strategy is None:
+            yield None
+            continue
+        s = gr1py.output.dump_json(vtsys.symtab, strategy)
+        yield load_aut_json(s)
+
+
+class GR1PySession(object):
+    """In-process stand-in for L{gr1c.GR1CSession}.
+
+    Answers the queries C{iswinning}, C{iswinning_many},
+    C{env_next}, C{sys_nexta} and C{numgoals}
+    in the same format, using C{gr1py}.
+    Useful for testing code that queries C{gr1c},
+    for example through L{session_pool}.
+
+    @param tsys: as returned by C{gr1py.cli.loads}
+    @param winning: winning set of C{tsys}, computed if C{None}
+    """
+
+    def __init__(self, tsys, winning=None):
+        if winning is None:
+            winning = gr1py.solve.get_winning_set(tsys)
+        self.tsys = tsys
+        self.winning = winning
+        names = [v['name'] for v in tsys.symtab]
+        self.env_vars = [names[i] for i in tsys.ind_uncontrolled]
+        self.sys_vars = [k for k in names if k not in self.env_vars]
+        self._names = names
+
+    def iswinning(self, state):
+        return self._state(state) in self.winning
+
+    def iswinning_many(self, states):
+        return [self.iswinning(s) for s in states]
+
+    def env_next(self, state):
+        return [dict(zip(self.env_vars, e))
+                for e in self.tsys.envtrans[self._state(state)]]
+
+    def sys_nexta(self, state, env_move):
+        u = self._state(state)
+        e = tuple(env_move[k] for k in self.env_vars)
+        if u not in self.tsys.G:
+            return list()
+        moves = list()
+        for v in self.tsys.G.successors(u):
+            if tuple(v[i] for i in self.tsys.ind_uncontrolled) != e:
+                continue
+            d = dict(zip(self._names, v))
+            moves.append({k: d[k] for k in self.sys_vars})
+        return moves
+
+    def numgoals(self):
+        return self.tsys.num_sgoals
+
+    def close(self):
+        return True
+
+    def _state(self, state):
+        return tuple(int(state[k]) for k in self._names)
+
+
+def session_pool(spec, size=2, timeout=None):
+    """Return pool of L{GR1PySession} for C{spec}.
+
+    The sessions share one transition system and winning set.
+    cf. L{gr1c.session_pool}
+
+    @rtype: L{pool.SessionPool}
+    """
+    tsys, exprtab = _spec_to_gr1py(spec)
+    winning = gr1py.solve.get_winning_set(tsys)
+    return pool.SessionPool(
+        lambda: GR1PySession(tsys, winning),
+        size=size, timeout=timeout)
+
+
+def _annotate(tsys, exprtab):
+    """Return copy of C{tsys} annotated with clauses of C{exprtab}.
+
+    Same as C{gr1py.tstruct.ts_from_expr},
+    except that the transitions are copied from C{tsys}.
+    """
+    identifiers = [v['name'] for v in tsys.symtab]
+    evalglobals = {'__builtins__': None, 'True': True, 'False': False}
+    G = _DiGraph()
+    G.add_edges_from(tsys.G.edges())
+    for nd in G.nodes():
+        sat = list()
+        stated = dict(zip(identifiers, nd))
+        for subformula in ['ENVINIT', 'SYSINIT']:
+            if eval(exprtab[subformula], evalglobals, stated):
+                sat.append(subformula)
+        for subformula in ['ENVGOAL', 'SYSGOAL']:
+            for i, goalexpr in enumerate(exprtab[subformula]):
+                if eval(goalexpr, evalglobals, stated):
+                    sat.append(subformula + str(i))
+        G.node[nd]['sat'] = sat
+    return AnnTransitionSystem(
+        tsys.symtab, G, tsys.envtrans,
+        num_egoals=len(exprtab['ENVGOAL']),
+        num_sgoals=len(exprtab['SYSGOAL']))
+
+
 def _spec_to_gr1py(spec):
     if gr1py is None:
         raise ValueError('Import of gr1py interface failed.\n'
@@ -35,6 +35,7 @@ Interface to the JTLV implementation of GR(1) synthesis
 Relevant links:
   - U{JTLV<http://jtlv.ysaar.net/>}
 """
+from collections import OrderedDict
 import logging
 import os
 import re
@@ -43,12 +44,17 @@ import tempfile
 import warnings
 import networkx as nx
 from tulip.spec import translation
+from tulip.interfaces import _scratch
 
 
 logger = logging.getLogger(__name__)
 DEBUG_SMV_FILE = 'smv.txt'
 DEBUG_LTL_FILE = 'ltl.txt'
 DEBUG_AUT_FILE = 'aut.txt'
+# translated specs, so that checking realizability
+# and then synthesizing translates once
+TRANSLATION_CACHE_SIZE = 8
+_translated = OrderedDict()
 
 
 def check_realizable(spec, heap_size='-Xmx128m', priority_kind=-1,
@@ -59,13 +65,10 @@ def check_realizable(spec, heap_size='-Xmx128m', priority_kind=-1,
     """
     assert not spec.moore
     assert not spec.plus_one
-    fSMV, fLTL, fAUT = create_files(spec)
-    realizable = solve_game(spec, fSMV, fLTL, fAUT, heap_size,
-                            priority_kind, init_option)
-    os.unlink(fSMV)
-    os.unlink(fLTL)
-    os.unlink(fAUT)
-    return realizable
+    with _scratch.scratch_dir() as d:
+        fSMV, fLTL, fAUT = create_files(spec, d)
+        return solve_game(spec, fSMV, fLTL, fAUT, heap_size,
+                          priority_kind, init_option)
 
 
 def solve_game(
@@ -122,8 +125,12 @@ def solve_game(
                 starting from which the system can satisfy the specification.
     """
     priority_kind = get_priority(priority_kind)
+    init_option = _get_init_option(init_option)
+    call_jtlv(heap_size, fSMV, fLTL, fAUT, priority_kind, init_option)
+    return _read_realizable(fAUT, priority_kind)
+
 
-    # init_option
+def _get_init_option(init_option):
     if (isinstance(init_option, int)):
         if (init_option < 0 or init_option > 2):
             warnings.warn("Unknown init_option. Setting it to the default (1)")
@@ -131,19 +138,21 @@ def solve_game(
     else:
         warnings.warn("Unknown init_option. Setting it to the default (1)")
         init_option = 1
+    return init_option
 
-    call_jtlv(heap_size, fSMV, fLTL, fAUT, priority_kind, init_option)
 
+def _read_realizable(fAUT, priority_kind):
+    """Return C{True} if JTLV wrote that the spec is realizable."""
     realizable = False
 
-    f = open(fAUT, 'r')
-    for line in f:
-        if ("Specification is realizable" in line):
-            realizable = True
-            break
-        elif ("Specification is unrealizable" in line):
-            realizable = False
-            break
+    with open(fAUT, 'r') as f:
+        for line in f:
+            if ("Specification is realizable" in line):
+                realizable = True
+                break
+            elif ("Specification is unrealizable" in line):
+                realizable = False
+                break
 
     if (realizable and priority_kind > 0):
         print("\nAutomaton successfully synthesized.\n")
@@ -166,11 +175,48 @@ def synthesize(
     """
     assert not spec.moore
     assert not spec.plus_one
-    fSMV, fLTL, fAUT = create_files(spec)
+    with _scratch.scratch_dir() as d:
+        fSMV, fLTL, fAUT = create_files(spec, d)
+        realizable = solve_game(spec, fSMV, fLTL, fAUT, heap_size,
+                                priority_kind, init_option)
+        return _load_result(spec, realizable, fAUT)
 
-    realizable = solve_game(spec, fSMV, fLTL, fAUT, heap_size,
-                            priority_kind, init_option)
 
+def synthesize_async(
+    spec, loop, heap_size='-Xmx128m', priority_kind=3,
+    init_option=1, timeout=None
+):
+    """Return future of L{synthesize}, run by C{loop}.
+
+    @type loop: L{procloop.ProcessLoop}
+    @param timeout: seconds, after which JTLV is killed
+    @rtype: L{procloop.Future}
+    """
+    assert not spec.moore
+    assert not spec.plus_one
+    d = _scratch.mkdtemp()
+    try:
+        fSMV, fLTL, fAUT = create_files(spec, d)
+        priority_kind = get_priority(priority_kind)
+        init_option = _get_init_option(init_option)
+        f = call_jtlv_async(loop, heap_size, fSMV, fLTL, fAUT,
+                            priority_kind, init_option, timeout=timeout)
+    except Exception:
+        _scratch.remove(d)
+        raise
+
+    def load(r):
+        r[1].close()
+        realizable = _read_realizable(fAUT, priority_kind)
+        return _load_result(spec, realizable, fAUT)
+
+    f = f.then(load)
+    f.add_done_callback(lambda f: _scratch.remove(d))
+    return f
+
+
+def _load_result(spec, realizable, fAUT):
+    """Return strategy or counterexamples."""
     if realizable:
         logger.info('loading JTLV output...')
 
@@ -179,28 +225,39 @@ def synthesize(
 
         logger.info('JTLV returned:\n' + '\n'.join(lines))
 
-        aut = jtlv_output_to_networkx(lines, spec)
-
-        os.unlink(fSMV)
-        os.unlink(fLTL)
-        os.unlink(fAUT)
-        return aut
+        return jtlv_output_to_networkx(lines, spec)
     else:
-        counter_examples = get_counterexamples(fAUT)
-        os.unlink(fSMV)
-        os.unlink(fLTL)
-        os.unlink(fAUT)
-        return counter_examples
+        return get_counterexamples(fAUT)
+
+
+def create_files(spec, dirname=None):
+    """Create files for read/write by JTLV.
 
+    The translation of C{spec} is reused
+    if C{spec} was translated recently.
 
-def create_files(spec):
-    """Create temporary files for read/write by JTLV."""
+    @param dirname: directory for the files,
+        which the caller removes.
+        If C{None}, then create temporary files,
+        which the caller deletes.
+
+    @return: paths of SMV, LTL and automaton files
+    """
+    smv, ltl = _translate(spec)
+    if dirname is not None:
+        fSMV = os.path.join(dirname, 'spec.smv')
+        fLTL = os.path.join(dirname, 'spec.ltl')
+        fAUT = os.path.join(dirname, 'spec.aut')
+        for name, s in ((fSMV, smv), (fLTL, ltl), (fAUT, '')):
+            with open(name, 'w') as f:
+                f.write(s)
+        return fSMV, fLTL, fAUT
     fSMV = tempfile.NamedTemporaryFile(delete=False, suffix='smv')
-    fSMV.write(generate_jtlv_smv(spec))
+    fSMV.write(smv)
     fSMV.close()
 
     fLTL = tempfile.NamedTemporaryFile(delete=False, suffix="ltl")
-    fLTL.write(generate_jtlv_ltl(spec))
+    fLTL.write(ltl)
     fLTL.close()
 
     fAUT = tempfile.NamedTemporaryFile(delete=False)
@@ -208,6 +265,21 @@ def create_files(spec):
     return fSMV.name, fLTL.name, fAUT.name
 
 
+def _translate(spec):
+    """Return SMV and LTL input for JTLV, memoized by spec contents."""
+    key = (
+        repr(sorted(spec.env_vars.items())),
+        repr(sorted(spec.sys_vars.items())),
+        tuple(tuple(getattr(spec, p)) for p in sorted(spec._parts)))
+    r = _translated.pop(key, None)
+    if r is None:
+        r = (generate_jtlv_smv(spec), generate_jtlv_ltl(spec))
+    _translated[key] = r
+    while len(_translated) > TRANSLATION_CACHE_SIZE:
+        _translated.popitem(last=False)
+    return r
+
+
 def get_priority(priority_kind):
     """Validate and convert priority_kind to the corresponding integer.
 
@@ -255,6 +327,36 @@ def get_priority(priority_kind):
 
 def call_jtlv(heap_size, fSMV, fLTL, fAUT, priority_kind, init_option):
     """Subprocess calls to JTLV."""
+    cmd = _jtlv_command(heap_size, fSMV, fLTL, fAUT,
+                        priority_kind, init_option)
+    try:
+        subprocess.call(cmd)
+    except OSError as e:
+        if e.errno == os.errno.ENOENT:
+            raise Exception('Java not found in path: cannot run jtlv.')
+        else:
+            raise
+
+
+def call_jtlv_async(loop, heap_size, fSMV, fLTL, fAUT, priority_kind,
+                    init_option, timeout=None):
+    """Return future of L{call_jtlv}, run by C{loop}.
+
+    The result is as from L{procloop.ProcessLoop.spawn}.
+    """
+    cmd = _jtlv_command(heap_size, fSMV, fLTL, fAUT,
+                        priority_kind, init_option)
+    try:
+        return loop.spawn(cmd, timeout=timeout, merge_stderr=True)
+    except OSError as e:
+        if e.errno == os.errno.ENOENT:
+            raise Exception('Java not found in path: cannot run jtlv.')
+        else:
+            raise
+
+
+def _jtlv_command(heap_size, fSMV, fLTL, fAUT, priority_kind, init_option):
+    """Return arguments for calling JTLV."""
     JTLV_PATH = os.path.abspath(os.path.dirname(__file__))
     JTLV_EXE = 'jtlv_grgame.jar'
     logger.info(
@@ -280,13 +382,7 @@ def call_jtlv(heap_size, fSMV, fLTL, fAUT, priority_kind, init_option):
         shutil.copyfile(fSMV, DEBUG_SMV_FILE)
         shutil.copyfile(fLTL, DEBUG_LTL_FILE)
         shutil.copyfile(fAUT, DEBUG_AUT_FILE)
-    try:
-        subprocess.call(cmd)
-    except OSError as e:
-        if e.errno == os.errno.ENOENT:
-            raise Exception('Java not found in path: cannot run jtlv.')
-        else:
-            raise
+    return cmd
 
 
 def canon_to_jtlv_domain(dom):
@@ -273,8 +273,34 @@ def call_ltl2ba(formula, prefix=''):
         stderr=subprocess.STDOUT)
     p.wait()
     ltl2ba_output = p.stdout.read()
+    return _check_output(p.returncode, ltl2ba_output)
+
+
+def call_ltl2ba_async(formula, loop, prefix='', timeout=None):
+    """Return future of L{call_ltl2ba}, run by C{loop}.
+
+    @type loop: L{procloop.ProcessLoop}
+    @param timeout: seconds, after which C{ltl2ba} is killed
+    @rtype: L{procloop.Future}
+    """
+    try:
+        f = loop.spawn(
+            [prefix + 'ltl2ba', '-f', '"{f}"'.format(f=formula)],
+            timeout=timeout, merge_stderr=True)
+    except OSError:
+        raise Exception('cannot find ltl2ba on path')
+
+    def read(r):
+        returncode, out, _ = r
+        with out:
+            return _check_output(returncode, out.read())
+
+    return f.then(read)
+
+
+def _check_output(returncode, ltl2ba_output):
     logger.info('ltl2ba output:\n\n{s}\n'.format(s=ltl2ba_output))
-    if p.returncode != 0:
+    if returncode != 0:
         raise Exception('Error when converting LTL to Buchi.')
     return ltl2ba_output
 
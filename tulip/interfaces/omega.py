@@ -6,11 +6,13 @@
 `omega` constructs symbolic transducers,
 represented as binary decision diagrams.
 This module applies enumeration,
-to return enumerated transducers.
+to return enumerated transducers,
+or wraps them as `SymbolicMealy` machines.
 
 U{https://pypi.python.org/pypi/omega}
 """
 from __future__ import absolute_import
+import collections
 import logging
 import time
 
@@ -28,45 +30,445 @@ try:
     from omega.games import gr1
     from omega.symbolic import symbolic as sym
     from omega.games import enumeration as enum
+    from omega.logic import syntax as stx
+    from omega.symbolic import fol as _fol
 except ImportError:
     omega = None
 import networkx as nx
+from tulip.transys.machines import create_machine_ports, guided_run
 
 
 log = logging.getLogger(__name__)
 
 
+# max number of sessions kept by `_session`,
+# each with its BDD manager, until `clear_sessions` is called.
+# Set to 0 to release the BDDs after each call.
+SESSION_CACHE_SIZE = 1
+_sessions = collections.OrderedDict()
+
+
 def is_realizable(spec, use_cudd=False):
     """Return `True` if, and only if, realizable.
 
     See `synthesize_enumerated_streett` for more details.
     """
-    aut = _grspec_to_automaton(spec)
-    sym.fill_blanks(aut)
-    bdd = _init_bdd(use_cudd)
-    aut.bdd = bdd
-    a = aut.build()
-    t0 = time.time()
-    z, _, _ = gr1.solve_streett_game(a)
-    t1 = time.time()
-    return gr1.is_realizable(z, a)
+    return _session(spec, use_cudd).is_realizable()
 
 
 def synthesize_enumerated_streett(spec, use_cudd=False):
     """Return transducer enumerated as a graph.
 
+    The compiled specification and winning set are cached,
+    so calling `is_realizable` first does not repeat them
+    (see `clear_sessions`).
+
     @type spec: `tulip.spec.form.GRSpec`
     @param use_cudd: efficient BDD computations with `dd.cudd`
     @rtype: `networkx.DiGraph`
     """
-    aut = _grspec_to_automaton(spec)
-    sym.fill_blanks(aut)
-    bdd = _init_bdd(use_cudd)
-    aut.bdd = bdd
-    a = aut.build()
+    return _session(spec, use_cudd).synthesize()
+
+
+def synthesize_enumerated_streett_batch(spec, variants, use_cudd=False):
+    """Yield enumerated transducer for each variant of `spec`.
+
+    The variables and clauses of `spec` are compiled once,
+    to a single BDD manager.
+    For each variant, only the clauses not in `spec` are compiled,
+    and conjoined (init, safety) or added (progress)
+    to the compiled `spec`.
+
+    @type spec: `tulip.spec.form.GRSpec`
+    @param variants: specifications with the same
+        variables as `spec`, and a superset of its clauses.
+        Any other variant is synthesized from scratch.
+    @type variants: iterable of `GRSpec`
+    @return: generator of `networkx.DiGraph` or `None`
+    """
+    base = Session(spec, use_cudd)
+    for variant in variants:
+        if not _is_extension(variant, spec):
+            log.info('variant does not extend spec, compile from scratch')
+            yield Session(variant, use_cudd).synthesize()
+            continue
+        a = _extend_built(base.aut, spec, variant)
+        yield _synthesize_built(a)
+
+
+def synthesize_symbolic(spec, use_cudd=False):
+    """Return symbolic transducer, without enumerating it.
+
+    @type spec: `tulip.spec.form.GRSpec`
+    @param use_cudd: efficient BDD computations with `dd.cudd`
+    @return: `SymbolicMealy`, or `None` if unrealizable
+    """
+    return _session(spec, use_cudd).symbolic()
+
+
+def is_circular(spec, use_cudd=False):
+    """Return `True` if trivial winning set non-empty.
+
+    @type spec: `tulip.spec.form.GRSpec`
+    @param use_cudd: efficient BDD computations with `dd.cudd`
+    @rtype: `bool`
+    """
+    return _session(spec, use_cudd).is_circular()
+
+
+def clear_sessions():
+    """Release the sessions kept between calls, and their BDDs.
+
+    The functions of this module keep the `Session` of the
+    last `SESSION_CACHE_SIZE` specifications, so that calling
+    `is_realizable` and then `synthesize_enumerated_streett`
+    compiles and solves once.
+    """
+    _sessions.clear()
+
+
+class Session(object):
+    """Specification compiled to BDDs, for repeated use.
+
+    One BDD manager and compiled automaton are kept,
+    together with the winning set once computed.
+    So deciding realizability and then synthesizing
+    solves the game once, and any variable reordering
+    carries over to later calls.
+
+    Clauses can be added with `add`,
+    which compiles only the new clauses.
+
+    Example::
+
+      s = Session(spec)
+      if s.is_realizable():
+          g = s.synthesize()
+      s.add(sys_prog=['x = 2'])
+      g = s.synthesize()
+
+    @ivar spec: specification currently compiled
+    @type spec: `tulip.spec.form.GRSpec`
+    @ivar aut: compiled automaton
+    @type aut: `omega.symbolic.symbolic.Automaton`
+    """
+
+    def __init__(self, spec, use_cudd=False):
+        """Compile `spec`.
+
+        @type spec: `tulip.spec.form.GRSpec`
+        @param use_cudd: efficient BDD computations with `dd.cudd`
+        """
+        aut = _grspec_to_automaton(spec)
+        sym.fill_blanks(aut)
+        aut.bdd = _init_bdd(use_cudd)
+        self.spec = spec
+        self.aut = aut.build()
+        self._win = None
+
+    @property
+    def bdd(self):
+        return self.aut.bdd
+
+    def add(self, **clauses):
+        """Add clauses to the compiled specification.
+
+        Only the new clauses are compiled.
+        The winning set is recomputed when next needed.
+
+        @param clauses: map from names of parts
+            (`'env_init'`, `'sys_prog'`, etc.)
+            to clause or `list` of clauses
+        """
+        spec = self.spec.copy()
+        spec._ast.update(self.spec._ast)
+        spec._bool_int.update(self.spec._bool_int)
+        for part, c in clauses.iteritems():
+            if part not in spec._parts:
+                raise ValueError('unknown part "{p}"'.format(p=part))
+            if isinstance(c, basestring):
+                c = [c]
+            getattr(spec, part).extend(c)
+        self.aut = _extend_built(self.aut, self.spec, spec)
+        self.spec = spec
+        self._win = None
+
+    def solve(self):
+        """Return `(z, yij, xijk)` of the GR(1) game, cached."""
+        if self._win is None:
+            t0 = time.time()
+            self._win = gr1.solve_streett_game(self.aut)
+            t1 = time.time()
+            log.info('Winning set computed in {t} sec.'.format(t=t1 - t0))
+        return self._win
+
+    def is_realizable(self):
+        """Return `True` if, and only if, realizable."""
+        z, _, _ = self.solve()
+        return gr1.is_realizable(z, self.aut)
+
+    def synthesize(self):
+        """Return transducer enumerated as a graph, or `None`.
+
+        @rtype: `networkx.DiGraph`
+        """
+        return _synthesize_built(self.aut, self.solve())
+
+    def symbolic(self):
+        """Return `SymbolicMealy`, or `None` if unrealizable."""
+        if not self.is_realizable():
+            return None
+        z, yij, xijk = self.solve()
+        t = gr1.make_streett_transducer(z, yij, xijk, self.aut)
+        return SymbolicMealy(t, self.spec)
+
+    def is_circular(self):
+        """Return `True` if trivial winning set non-empty.
+
+        Same as `omega.games.gr1.trivial_winning_set`,
+        but reusing the Streett winning set.
+        """
+        z, _, _ = self.solve()
+        streett = _grspec_to_automaton(self.spec)
+        sym.fill_blanks(streett)
+        rabin = sym.Automaton()
+        for var, d in self.aut.vars.iteritems():
+            d = dict(d)
+            d['owner'] = 'env' if d['owner'] == 'sys' else 'sys'
+            rabin.vars[var] = d
+        rabin.action['env'] = streett.action['sys']
+        rabin.action['sys'] = streett.action['env']
+        rabin.win['[]<>'] = [
+            '!({w})'.format(w=w) for w in streett.win['<>[]']]
+        sym.fill_blanks(rabin, rabin=True)
+        rabin.bdd = self.bdd
+        rabin = rabin.build()
+        zk, _, _ = gr1.solve_rabin_game(rabin)
+        triv = self.bdd.apply('diff', z, zk[-1])
+        return triv != self.bdd.false
+
+
+class SymbolicMealy(object):
+    """Mealy machine with transitions represented by BDDs.
+
+    Implements the interface of `tulip.transys.MealyMachine`
+    for executing a controller (`reaction`, `run`),
+    by substituting values in, and picking values from, the BDDs.
+    So controllers with too many states to enumerate
+    can still be simulated.
+
+    A machine state is a `tuple` of `(var, value)` pairs,
+    sorted by variable, that includes the goal counter `_goal`.
+    Values of string variables are `int` in states,
+    and strings in inputs and outputs.
+    The initial state is `'Sinit'`.
+
+    @ivar aut: transducer from `gr1.make_streett_transducer`
+    @type aut: `omega.symbolic.symbolic.Automaton`
+    """
+
+    initial_state = 'Sinit'
+
+    def __init__(self, t, spec):
+        """Wrap transducer `t` synthesized from `spec`.
+
+        @type t: `omega.symbolic.symbolic.Automaton`
+        @type spec: `tulip.spec.form.GRSpec`
+        """
+        self.aut = t
+        self.inputs = create_machine_ports(spec.env_vars)
+        self.outputs = create_machine_ports(spec.sys_vars)
+        self.states = _InitialStates(self.initial_state)
+        self._str_vars = {
+            k: v for k, v in spec.env_vars.items() + spec.sys_vars.items()
+            if isinstance(v, list)}
+        fol = _fol.Context()
+        fol.bdd = t.bdd
+        fol.vars = sym._prime_and_order_table(t.vars)
+        self._fol = fol
+        self._control, self._primed = enum._split_vars_per_quantifier(
+            t.vars, t.players)
+
+    def reaction(self, from_state, inputs, lazy=False):
+        """Return next state and output, when reacting to given inputs.
+
+        Same as `tulip.transys.MealyMachine.reaction`.
+        If more than one reaction is possible,
+        then any one of them is returned.
+
+        @param from_state: `'Sinit'` or a state returned by
+            an earlier reaction
+        @param inputs: `dict` assigning a value to each input port
+        @param lazy: if `True`, then pick values for
+            any inputs missing from `inputs`
+        @return: `(next_state, outputs)`
+        """
+        missing = set(self.inputs).difference(inputs)
+        if missing and not lazy:
+            raise ValueError(
+                'missing input port(s): {m}'.format(m=missing))
+        fol = self._fol
+        bdd = self.aut.bdd
+        env = self._to_int(inputs)
+        if from_state == self.initial_state:
+            (u,) = self.aut.init['env']
+            u = fol.replace(u, env)
+            care = self._control['env'] | self._control['sys']
+            rename = dict()
+        else:
+            values = dict(from_state)
+            values.update(
+                (stx.prime(k), v) for k, v in env.iteritems())
+            (env_action,) = self.aut.action['env']
+            (sys_action,) = self.aut.action['sys']
+            u = fol.replace(sys_action, values)
+            e = fol.replace(env_action, values)
+            u = bdd.apply('and', u, e)
+            care = self._primed['env'] | self._primed['sys']
+            rename = {stx.prime(k): k for k in self.aut.vars}
+        if u == bdd.false:
+            raise Exception(
+                'not a valid input {i} at state {s}'.format(
+                    i=inputs, s=from_state))
+        d = fol.pick(u, full=True, care_vars=care)
+        state = {rename.get(k, k): v for k, v in d.iteritems()}
+        state.update(env)
+        outputs = self._to_str({k: state[k] for k in self.outputs})
+        next_state = tuple(sorted(state.iteritems()))
+        return (next_state, outputs)
+
+    def reactionpart(self, from_state, inputs):
+        """Wraps reaction() with lazy=True
+        """
+        return self.reaction(from_state, inputs, lazy=True)
+
+    def run(self, from_state=None, input_sequences=None):
+        """Run reacting to given inputs.
+
+        See `tulip.transys.machines.guided_run`.
+        """
+        return guided_run(self, from_state=from_state,
+                          input_sequences=input_sequences)
+
+    def _to_int(self, values):
+        """Replace strings by their index in the variable's domain."""
+        d = dict(values)
+        for k, v in d.iteritems():
+            if k in self._str_vars:
+                d[k] = self._str_vars[k].index(v)
+        return d
+
+    def _to_str(self, values):
+        """Inverse of `_to_int`."""
+        d = dict(values)
+        for k, v in d.iteritems():
+            if k in self._str_vars:
+                d[k] = self._str_vars[k][v]
+        return d
+
+
+class _InitialStates(object):
+    """Minimal `states` of `SymbolicMealy`, for `guided_run`."""
+
+    def __init__(self, initial):
+        self.initial = {initial}
+
+
+def _session(spec, use_cudd):
+    """Return cached `Session` for `spec`, or a new one.
+
+    A new session compiles a copy of `spec`,
+    so changing `spec` later does not affect the cached session.
+    """
+    key = _session_key(spec, use_cudd)
+    s = _sessions.pop(key, None)
+    if s is None:
+        s = Session(spec.copy(), use_cudd)
+    _sessions[key] = s
+    while len(_sessions) > SESSION_CACHE_SIZE:
+        _sessions.popitem(last=False)
+    return s
+
+
+def _session_key(spec, use_cudd):
+    """Return hashable description of `spec`."""
+    dvars = tuple(
+        tuple(sorted((k, repr(v)) for k, v in d.iteritems()))
+        for d in (spec.env_vars, spec.sys_vars))
+    parts = tuple(tuple(getattr(spec, p)) for p in spec._parts)
+    return (dvars, parts, spec.moore, spec.plus_one,
+            spec.qinit, use_cudd)
+
+
+def _is_extension(variant, spec):
+    """Return `True` if `variant` has same vars and more clauses."""
+    if variant.env_vars != spec.env_vars:
+        return False
+    if variant.sys_vars != spec.sys_vars:
+        return False
+    for attr in ('moore', 'plus_one', 'qinit'):
+        if getattr(variant, attr) != getattr(spec, attr):
+            return False
+    return all(
+        set(getattr(spec, p)).issubset(getattr(variant, p))
+        for p in spec._parts)
+
+
+def _extend_built(base, spec, variant):
+    """Return copy of compiled `base` with clauses of `variant` added.
+
+    @type base: compiled `symbolic.Automaton` of `spec`
+    @rtype: compiled `symbolic.Automaton`
+    """
+    variant.str_to_int()
+    bdd = base.bdd
+    a = sym.Automaton()
+    a.__dict__.update(base.__dict__)
+    a.init = {k: list(v) for k, v in base.init.iteritems()}
+    a.action = {k: list(v) for k, v in base.action.iteritems()}
+    a.win = {k: list(v) for k, v in base.win.iteritems()}
+
+    def new_clauses(part):
+        old = set(getattr(spec, part))
+        return [
+            variant._bool_int[x] for x in getattr(variant, part)
+            if x not in old]
+
+    for part, attr, owner in [
+            ('env_init', a.init, 'env'),
+            ('sys_init', a.init, 'sys'),
+            ('env_safety', a.action, 'env'),
+            ('sys_safety', a.action, 'sys')]:
+        (u,) = attr[owner]
+        for e in new_clauses(part):
+            u = bdd.apply('and', u, base.add_expr(e))
+        attr[owner] = [u]
+    for part, key, fmt in [
+            ('env_prog', '<>[]', '!({s})'),
+            ('sys_prog', '[]<>', '{s}')]:
+        c = [base.add_expr(fmt.format(s=e)) for e in new_clauses(part)]
+        if not c:
+            continue
+        # replace blank filled by `fill_blanks`
+        if not getattr(spec, part):
+            a.win[key] = c
+        else:
+            a.win[key].extend(c)
+    return a
+
+
+def _synthesize_built(a, win=None):
+    """Return enumerated transducer for compiled automaton `a`.
+
+    @param win: `(z, yij, xijk)` from `gr1.solve_streett_game`,
+        computed if `None`
+    """
+    bdd = a.bdd
     assert a.action['sys'][0] != bdd.false
     t0 = time.time()
-    z, yij, xijk = gr1.solve_streett_game(a)
+    if win is None:
+        win = gr1.solve_streett_game(a)
+    z, yij, xijk = win
     t1 = time.time()
     # unrealizable ?
     if not gr1.is_realizable(z, a):
@@ -76,7 +478,7 @@ def synthesize_enumerated_streett(spec, use_cudd=False):
     t2 = time.time()
     (u,) = t.action['sys']
     assert u != bdd.false
-    g = enum.action_to_steps(t, qinit=spec.qinit)
+    g = enum.action_to_steps(t, qinit=a.qinit)
     h = _strategy_to_state_annotated(g, a)
     del u, yij, xijk
     t3 = time.time()
@@ -90,21 +492,6 @@ def synthesize_enumerated_streett(spec, use_cudd=False):
     return h
 
 
-def is_circular(spec, use_cudd=False):
-    """Return `True` if trivial winning set non-empty.
-
-    @type spec: `tulip.spec.form.GRSpec`
-    @param use_cudd: efficient BDD computations with `dd.cudd`
-    @rtype: `bool`
-    """
-    aut = _grspec_to_automaton(spec)
-    sym.fill_blanks(aut)
-    bdd = _init_bdd(use_cudd)
-    aut.bdd = bdd
-    triv, t = gr1.trivial_winning_set(aut)
-    return triv != t.bdd.false
-
-
 def _init_bdd(use_cudd):
     if _bdd is None:
         raise ImportError(
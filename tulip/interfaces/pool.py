@@ -0,0 +1,242 @@
+"""Pool of interactive solver sessions.
+
+A L{SessionPool} keeps a fixed number of sessions alive,
+for example L{gr1c.GR1CSession} objects, each owned by a thread.
+Queries are queued and answered by the first idle session,
+so the cost of starting the solver is paid once per session,
+not once per query.
+
+A session is any object with query methods and a C{close} method.
+If it also has a C{kill} method, then a query that times out
+is interrupted by calling it.
+A session that raises C{EnvironmentError} or C{EOFError},
+or whose query timed out, is closed and replaced.
+"""
+from __future__ import absolute_import
+import logging
+import Queue
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class Timeout(Exception):
+    """A query was not answered in time."""
+
+
+class SessionPool(object):
+    """Fixed number of sessions, serving queries from a queue.
+
+    Example, with 4 C{gr1c} processes:
+
+      >>> pool = gr1c.session_pool(spec, size=4, timeout=1.0)
+      >>> pool.call('iswinning', state)
+      >>> r = pool.submit('sys_nexta', state, env_move)
+      >>> moves = r.result()
+      >>> pool.close()
+
+    @param factory: callable that returns a new session
+    @param size: number of sessions
+    @type size: C{int}
+    @param timeout: seconds that L{call} waits for an answer,
+        or C{None} to wait until answered
+    @type timeout: C{float}
+    @param cleanup: callable to call after closing the sessions
+    """
+
+    def __init__(self, factory, size=2, timeout=None, cleanup=None):
+        if size < 1:
+            raise ValueError('size must be positive, got: {s}'.format(
+                s=size))
+        self.factory = factory
+        self.timeout = timeout
+        self.restarts = 0
+        self._cleanup = cleanup
+        self._queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = list()
+        try:
+            for i in xrange(size):
+                self._workers.append(_Worker(self))
+        except Exception:
+            for w in self._workers:
+                w._stop_session()
+            raise
+        for w in self._workers:
+            w.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, method, *args, **kwargs):
+        """Queue a query, and return its L{Request}.
+
+        @param method: name of session method to call
+        @type method: C{str}
+        @param args, kwargs: passed to the session method
+        @rtype: L{Request}
+        """
+        if self._closed:
+            raise ValueError('pool is closed')
+        r = Request(self, method, args, kwargs)
+        self._queue.put(r)
+        return r
+
+    def call(self, method, *args, **kwargs):
+        """Return answer to query, waiting at most C{self.timeout}.
+
+        @raise Timeout: if not answered in time
+        """
+        r = self.submit(method, *args, **kwargs)
+        return r.result(self.timeout)
+
+    def map(self, method, args_list):
+        """Return answers to several queries, served concurrently.
+
+        @param args_list: iterable of argument tuples
+        @rtype: C{list}
+        """
+        requests = [self.submit(method, *args) for args in args_list]
+        return [r.result(self.timeout) for r in requests]
+
+    def close(self):
+        """Stop workers and close sessions."""
+        if self._closed:
+            return
+        self._closed = True
+        for w in self._workers:
+            self._queue.put(None)
+        for w in self._workers:
+            w.join()
+        if self._cleanup is not None:
+            self._cleanup()
+
+
+class Request(object):
+    """Query submitted to a L{SessionPool}."""
+
+    def __init__(self, pool, method, args, kwargs):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.expired = False
+        self._pool = pool
+        self._worker = None
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+
+    def done(self):
+        """Return C{True} if answered."""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Return answer, waiting at most C{timeout} seconds.
+
+        After a timeout, the query is cancelled,
+        and the session that is serving it (if any) is killed.
+
+        @raise Timeout: if not answered in time
+        """
+        if not self._done.wait(timeout):
+            self.cancel()
+            raise Timeout('{m} not answered within {t} sec'.format(
+                m=self.method, t=timeout))
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def cancel(self):
+        """Drop query if queued, or interrupt its session if running."""
+        with self._pool._lock:
+            if self._done.is_set():
+                return
+            self.expired = True
+            # under the lock, so the worker is still serving this query
+            if self._worker is not None:
+                self._worker.kill()
+
+    def _set(self, value=None, error=None):
+        self._value = value
+        self._error = error
+        self._done.set()
+
+
+class _Worker(threading.Thread):
+    """Thread that owns one session."""
+
+    def __init__(self, pool):
+        super(_Worker, self).__init__()
+        self.daemon = True
+        self.pool = pool
+        # pre-spawned, so that errors are raised to the caller
+        self.session = pool.factory()
+
+    def run(self):
+        pool = self.pool
+        while True:
+            r = pool._queue.get()
+            if r is None:
+                break
+            with pool._lock:
+                if r.expired:
+                    continue
+                r._worker = self
+            self._serve(r)
+        self._stop_session()
+
+    def _serve(self, r):
+        restart = False
+        try:
+            if self.session is None:
+                self.session = self.pool.factory()
+            f = getattr(self.session, r.method)
+            value = f(*r.args, **r.kwargs)
+        except (EnvironmentError, EOFError) as e:
+            restart = True
+            error = e
+        except Exception as e:
+            error = e
+        else:
+            error = None
+        with self.pool._lock:
+            r._worker = None
+            restart = restart or r.expired
+            if restart:
+                self.pool.restarts += 1
+            if not r.expired:
+                r._set(value=None if error is not None else value,
+                       error=error)
+        if restart:
+            logger.info('restarting session after: {m}'.format(
+                m=r.method))
+            self._stop_session()
+            self._start_session()
+
+    def _start_session(self):
+        # if this fails, then the next query retries
+        try:
+            self.session = self.pool.factory()
+        except Exception:
+            logger.exception('failed to start session')
+
+    def kill(self):
+        """Interrupt the session, if it can be."""
+        kill = getattr(self.session, 'kill', None)
+        if kill is not None:
+            kill()
+
+    def _stop_session(self):
+        s = self.session
+        self.session = None
+        if s is None:
+            return
+        try:
+            s.close()
+        except Exception:
+            logger.debug('closing session failed', exc_info=True)
@@ -0,0 +1,328 @@
+"""Run many solver processes concurrently, from one thread.
+
+A L{ProcessLoop} starts solver executables and multiplexes their
+pipes with C{select}, so many calls to solvers can be in flight
+without a thread (or blocking call) for each.
+Each call returns a L{Future}. Output is spooled to a temporary
+file as it arrives, so large outputs neither fill the pipe buffer
+nor memory, and are parsed incrementally when the process exits.
+
+Example, with two C{gr1c} runs:
+
+  >>> loop = ProcessLoop()
+  >>> f1 = gr1c.synthesize_async(spec1, loop, timeout=60)
+  >>> f2 = gr1c.check_realizable_async(spec2, loop)
+  >>> loop.run()
+  >>> strategy = f1.result()
+
+The interfaces use this module for their C{*_async} functions.
+"""
+from __future__ import absolute_import
+import errno
+import logging
+import os
+import select
+import subprocess
+import tempfile
+import time
+
+from tulip.interfaces.pool import Timeout
+
+
+logger = logging.getLogger(__name__)
+CHUNK_SIZE = 2**16
+
+
+class Cancelled(Exception):
+    """The call was cancelled before it completed."""
+
+
+class Future(object):
+    """Result of a call that completes when its loop runs."""
+
+    def __init__(self):
+        self._done = False
+        self._value = None
+        self._error = None
+        self._callbacks = list()
+        self._on_cancel = None
+
+    def done(self):
+        """Return C{True} if result or exception is set."""
+        return self._done
+
+    def cancelled(self):
+        return self._done and isinstance(self._error, Cancelled)
+
+    def result(self):
+        """Return result, or raise exception of the call.
+
+        @raise ValueError: if not done yet
+        """
+        if not self._done:
+            raise ValueError('not done yet, run the loop')
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def exception(self):
+        """Return exception of the call, or C{None}."""
+        if not self._done:
+            raise ValueError('not done yet, run the loop')
+        return self._error
+
+    def cancel(self):
+        """Kill the process of this call, if still running.
+
+        @return: C{False} if already done
+        """
+        if self._done:
+            return False
+        if self._on_cancel is not None:
+            self._on_cancel()
+        if not self._done:
+            self.set_exception(Cancelled())
+        return True
+
+    def set_result(self, value):
+        self._set(value, None)
+
+    def set_exception(self, error):
+        self._set(None, error)
+
+    def add_done_callback(self, fn):
+        """Call C{fn(self)} when done."""
+        if self._done:
+            fn(self)
+        else:
+            self._callbacks.append(fn)
+
+    def then(self, fn):
+        """Return future of C{fn(result)}.
+
+        If C{fn} returns a L{Future}, then the returned future
+        completes with it. Exceptions skip C{fn}.
+        Cancelling the returned future cancels the pending stage.
+        """
+        nxt = Future()
+        stage = [self]
+        nxt._on_cancel = lambda: stage[0].cancel()
+
+        def chain(f):
+            if nxt.done():
+                return
+            if f._error is not None:
+                nxt.set_exception(f._error)
+                return
+            try:
+                r = fn(f._value)
+            except Exception as e:
+                nxt.set_exception(e)
+                return
+            if isinstance(r, Future):
+                stage[0] = r
+                r.add_done_callback(lambda g: _copy_future(g, nxt))
+            else:
+                nxt.set_result(r)
+
+        self.add_done_callback(chain)
+        return nxt
+
+    def _set(self, value, error):
+        if self._done:
+            return
+        self._done = True
+        self._value = value
+        self._error = error
+        callbacks, self._callbacks = self._callbacks, list()
+        for fn in callbacks:
+            fn(self)
+
+
+def _copy_future(src, dst):
+    if src._error is not None:
+        dst.set_exception(src._error)
+    else:
+        dst.set_result(src._value)
+
+
+class ProcessLoop(object):
+    """Multiplex pipes of solver processes.
+
+    Nothing happens between calls to L{run},
+    which returns when the requested calls are done.
+    """
+
+    def __init__(self):
+        self._procs = list()
+
+    def spawn(self, args, input=None, timeout=None, merge_stderr=False,
+              **kw):
+        """Start process, and return future of its outputs.
+
+        The result is a C{tuple} C{(returncode, out, err)}, where
+        C{out} is a temporary file with stdout, at position 0,
+        to be closed by the caller, and C{err} a C{str}.
+
+        @param args: passed to C{subprocess.Popen}
+        @param input: written to stdin, which is then closed
+        @type input: C{str}
+        @param timeout: seconds, after which the process is killed,
+            and the future raises L{Timeout}
+        @param merge_stderr: if C{True}, then stderr goes to C{out}
+        @param kw: passed to C{subprocess.Popen}
+        @rtype: L{Future}
+        """
+        stderr = subprocess.STDOUT if merge_stderr else subprocess.PIPE
+        stdin = subprocess.PIPE if input is not None else None
+        p = subprocess.Popen(
+            args, stdin=stdin, stdout=subprocess.PIPE,
+            stderr=stderr, **kw)
+        proc = _Proc(p, args, input, timeout)
+        proc.future._on_cancel = lambda: self._kill(proc)
+        self._procs.append(proc)
+        return proc.future
+
+    def run(self, until=None, timeout=None):
+        """Serve processes until the calls in C{until} are done.
+
+        @param until: futures, or all running calls if C{None}
+        @type until: iterable of L{Future}
+        @param timeout: return after this many seconds,
+            even if not done
+        @return: C{True} if the calls in C{until} are done
+        """
+        if until is not None:
+            until = list(until)
+        end = None if timeout is None else time.time() + timeout
+        while True:
+            if until is None:
+                if not self._procs:
+                    return True
+            elif all(f.done() for f in until):
+                return True
+            elif not self._procs:
+                raise ValueError('futures pending, but no processes')
+            now = time.time()
+            if end is not None and now >= end:
+                return False
+            deadlines = [p.deadline for p in self._procs
+                         if p.deadline is not None]
+            if end is not None:
+                deadlines.append(end)
+            wait = max(0, min(deadlines) - now) if deadlines else None
+            self._step(wait)
+
+    def _step(self, wait):
+        readers = dict()
+        writers = dict()
+        for proc in self._procs:
+            for fd, sink in proc.readers.iteritems():
+                readers[fd] = (proc, sink)
+            if proc.stdin is not None:
+                writers[proc.stdin] = proc
+        try:
+            r, w, _ = select.select(list(readers), list(writers), [], wait)
+        except select.error as e:
+            if e.args[0] == errno.EINTR:
+                return
+            raise
+        for fd in w:
+            writers[fd].write()
+        for fd in r:
+            proc, sink = readers[fd]
+            data = os.read(fd, CHUNK_SIZE)
+            if data:
+                sink.write(data)
+            else:
+                del proc.readers[fd]
+        now = time.time()
+        for proc in list(self._procs):
+            # callbacks of other calls may have killed it
+            if proc not in self._procs:
+                continue
+            if not proc.readers:
+                self._finish(proc)
+            elif proc.deadline is not None and now >= proc.deadline:
+                self._kill(proc)
+                proc.future.set_exception(Timeout(
+                    '{cmd} killed after {t} sec'.format(
+                        cmd=proc.cmd, t=proc.timeout)))
+
+    def _finish(self, proc):
+        self._procs.remove(proc)
+        proc.p.wait()
+        proc.close_pipes()
+        proc.out.seek(0)
+        err = proc.err.getvalue() if proc.err is not None else ''
+        logger.debug('{cmd} returned {c}'.format(
+            cmd=proc.cmd, c=proc.p.returncode))
+        proc.future.set_result((proc.p.returncode, proc.out, err))
+
+    def _kill(self, proc):
+        if proc not in self._procs:
+            return
+        self._procs.remove(proc)
+        try:
+            proc.p.kill()
+        except OSError:
+            pass
+        proc.p.wait()
+        proc.close_pipes()
+        proc.out.close()
+
+
+class _Proc(object):
+    """Pipes and spool files of one process."""
+
+    def __init__(self, p, args, input, timeout):
+        self.cmd = args if isinstance(args, basestring) else ' '.join(args)
+        self.p = p
+        self.future = Future()
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.time() + timeout
+        self.input = input or ''
+        self.pos = 0
+        self.stdin = None
+        if p.stdin is not None:
+            self.stdin = p.stdin.fileno()
+            if not self.input:
+                self._close_stdin()
+        self.out = tempfile.TemporaryFile()
+        self.readers = {p.stdout.fileno(): self.out}
+        self.err = None
+        if p.stderr is not None:
+            self.err = _Buffer()
+            self.readers[p.stderr.fileno()] = self.err
+
+    def write(self):
+        try:
+            self.pos += os.write(
+                self.stdin, buffer(self.input, self.pos, select.PIPE_BUF))
+        except OSError as e:
+            # exited without reading its input
+            if e.errno != errno.EPIPE:
+                raise
+            self.pos = len(self.input)
+        if self.pos == len(self.input):
+            self._close_stdin()
+
+    def _close_stdin(self):
+        self.p.stdin.close()
+        self.stdin = None
+
+    def close_pipes(self):
+        for f in (self.p.stdin, self.p.stdout, self.p.stderr):
+            if f is not None:
+                f.close()
+
+
+class _Buffer(object):
+    def __init__(self):
+        self.chunks = list()
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def getvalue(self):
+        return ''.join(self.chunks)
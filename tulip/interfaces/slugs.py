@@ -36,12 +36,15 @@ Relevant links:
 """
 from __future__ import absolute_import
 import logging
-import json
+from collections import OrderedDict
 import os
 import subprocess
 import tempfile
 import networkx as nx
 from tulip.spec import GRSpec, translate
+from tulip.interfaces import _jsonstream
+from tulip.interfaces import _scratch
+from tulip.interfaces import procloop
 
 
 # If this path begins with '/', then it is considered to be absolute.
@@ -49,6 +52,12 @@ from tulip.spec import GRSpec, translate
 SLUGS_COMPILER_PATH = '../tools/StructuredSlugsParser/compiler.py'
 
 BDD_FILE = 'strategy_bdd.txt'
+STRUCT_FILE = 'spec.structuredslugs'
+SLUGSIN_FILE = 'spec.slugsin'
+# compiled inputs, so that checking realizability
+# and then synthesizing compiles once
+COMPILED_CACHE_SIZE = 8
+_compiled = OrderedDict()
 logger = logging.getLogger(__name__)
 
 
@@ -59,15 +68,8 @@ def check_realizable(spec):
 
     @return: True if realizable, False if not, or an error occurs.
     """
-    if isinstance(spec, GRSpec):
-        assert not spec.moore
-        assert not spec.plus_one
-        struct = translate(spec, 'slugs')
-    else:
-        struct = spec
-    with tempfile.NamedTemporaryFile(delete=False) as fin:
-        fin.write(struct)
-    realizable, out = _call_slugs(fin.name, synth=False)
+    realizable, out = _call_slugs(_to_struct(spec), synth=False)
+    out.close()
     return realizable
 
 
@@ -78,43 +80,59 @@ def synthesize(spec, symbolic=False):
     @return: If realizable return synthesized strategy, otherwise C{None}.
     @rtype: C{networkx.DiGraph}
     """
-    if isinstance(spec, GRSpec):
-        assert not spec.moore
-        assert not spec.plus_one
-        struct = translate(spec, 'slugs')
-    else:
-        struct = spec
-    with tempfile.NamedTemporaryFile(delete=False) as fin:
-        fin.write(struct)
-    realizable, out = _call_slugs(fin.name, synth=True, symbolic=symbolic)
+    realizable, out = _call_slugs(
+        _to_struct(spec), synth=True, symbolic=symbolic)
     if not realizable:
+        out.close()
         return None
-    os.unlink(fin.name)
     # collect int vars
     vrs = dict(spec.sys_vars)
     vrs.update(spec.env_vars)
-    dout = json.loads(out)
+    with out:
+        h = _load_strategy(out, vrs)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            ('loaded strategy with vertices:\n  {v}\n'
+             'and edges:\n {e}\n').format(
+                v='\n  '.join(str(x) for x in h.nodes(data=True)),
+                e=h.edges()))
+    return h
+
+
+def _load_strategy(f, vrs):
+    """Return strategy read incrementally from slugs JSON output.
+
+    Bitfields are converted to integers while reading,
+    once for each distinct bit vector.
+    Nodes with the same values share the same C{'state'} C{dict}.
+
+    @param f: file-like object
+    @param vrs: map from variable names to domains
+    @type vrs: C{dict}
+    @rtype: C{networkx.DiGraph}
+    """
     g = nx.DiGraph()
-    dvars = dout['variables']
-    for stru, d in dout['nodes'].iteritems():
+    dvars = None
+    states = dict()
+    for path, d in _jsonstream.iterparse(f, 'nodes'):
+        if path == ('variables',):
+            dvars = d
+            continue
+        if len(path) == 1:
+            continue
+        if dvars is None:
+            raise ValueError('variables must precede nodes')
+        _, stru = path
         u = int(stru)
-        state = dict(zip(dvars, d['state']))
+        bits = tuple(d['state'])
+        state = states.get(bits)
+        if state is None:
+            state = _bitfields_to_ints(dict(zip(dvars, bits)), vrs)
+            states[bits] = state
         g.add_node(u, state=state)
         for v in d['trans']:
             g.add_edge(u, v)
-    h = nx.DiGraph()
-    for u, d in g.nodes_iter(data=True):
-        bit_state = d['state']
-        int_state = _bitfields_to_ints(bit_state, vrs)
-        h.add_node(u, state=int_state)
-    for u, v in g.edges_iter():
-        h.add_edge(u, v)
-    logger.debug(
-        ('loaded strategy with vertices:\n  {v}\n'
-         'and edges:\n {e}\n').format(
-            v='\n  '.join(str(x) for x in h.nodes(data=True)),
-            e=h.edges()))
-    return h
+    return g
 
 
 def _bitfields_to_ints(bit_state, vrs):
@@ -139,7 +157,16 @@ def _bitfields_to_ints(bit_state, vrs):
     return int_state
 
 
-def _call_slugs(filename, synth=True, symbolic=True, slugs_compiler_path=None):
+def _to_struct(spec):
+    """Return C{spec} in structured slugs syntax."""
+    if isinstance(spec, GRSpec):
+        assert not spec.moore
+        assert not spec.plus_one
+        return translate(spec, 'slugs')
+    return spec
+
+
+def _call_slugs(struct, synth=True, symbolic=True, slugs_compiler_path=None):
     """Call `slugs` and return results.
 
     slugs_compiler_path is the path to the slugsin converter format.
@@ -147,7 +174,153 @@ def _call_slugs(filename, synth=True, symbolic=True, slugs_compiler_path=None):
     identifier SLUGS_COMPILER_PATH.  If this path begins with '/',
     then it is considered to be absolute.  Otherwise, it is relative
     to the path of the `slugs` executable.
+
+    The input files live in a scratch directory, see L{_scratch},
+    which is removed before returning.
+
+    @param struct: specification in structured slugs syntax
+    @type struct: C{str}
+    @return: C{(realizable, out)}, where C{out} is a temporary
+        file with the output of C{slugs}, to be closed by the caller
+    """
+    slugs_path, slugs_compiler_path = _find_slugs(slugs_compiler_path)
+    with _scratch.scratch_dir() as d:
+        infile = _compile(struct, d, slugs_compiler_path)
+        options = _slugs_options(slugs_path, infile, synth, symbolic)
+        # spooled to a file, to be parsed incrementally
+        fout = tempfile.TemporaryFile()
+        try:
+            p = subprocess.Popen(
+                options,
+                stdin=subprocess.PIPE,
+                stdout=fout,
+                stderr=subprocess.PIPE)
+        except OSError as e:
+            fout.close()
+            if e.errno == os.errno.ENOENT:
+                raise Exception('slugs not found in path.')
+            else:
+                raise
+        _, err = p.communicate()
+    return _slugs_result(p.returncode, fout, err)
+
+
+def _compile(struct, d, slugs_compiler_path):
+    """Write input of C{slugs} in directory C{d}, return its path.
+
+    The compiled input is reused if C{struct} was compiled recently.
     """
+    key = (slugs_compiler_path, struct)
+    slugsin = _compiled.pop(key, None)
+    if slugsin is None:
+        fname = _write(d, STRUCT_FILE, struct)
+        slugsin = subprocess.check_output(
+            [slugs_compiler_path, fname], stderr=subprocess.STDOUT)
+    _remember(key, slugsin)
+    return _write(d, SLUGSIN_FILE, slugsin)
+
+
+def _compile_async(struct, d, slugs_compiler_path, loop, timeout):
+    """Return future of L{_compile}, run by C{loop}."""
+    key = (slugs_compiler_path, struct)
+    slugsin = _compiled.get(key)
+    if slugsin is not None:
+        _remember(key, slugsin)
+        f = procloop.Future()
+        f.set_result(_write(d, SLUGSIN_FILE, slugsin))
+        return f
+    fname = _write(d, STRUCT_FILE, struct)
+    compiled = loop.spawn(
+        [slugs_compiler_path, fname],
+        timeout=timeout, merge_stderr=True)
+
+    def write(r):
+        returncode, out, _ = r
+        with out:
+            slugsin = out.read()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(
+                returncode, slugs_compiler_path, slugsin)
+        _remember(key, slugsin)
+        return _write(d, SLUGSIN_FILE, slugsin)
+
+    return compiled.then(write)
+
+
+def _remember(key, slugsin):
+    _compiled.pop(key, None)
+    _compiled[key] = slugsin
+    while len(_compiled) > COMPILED_CACHE_SIZE:
+        _compiled.popitem(last=False)
+
+
+def _write(d, name, s):
+    path = os.path.join(d, name)
+    with open(path, 'w') as f:
+        f.write(s)
+    return path
+
+
+def check_realizable_async(spec, loop, timeout=None):
+    """Return future of L{check_realizable}, run by C{loop}.
+
+    @type loop: L{procloop.ProcessLoop}
+    @param timeout: seconds, after which each of
+        the compiler and C{slugs} is killed
+    @rtype: L{procloop.Future}
+    """
+    def realizable(r):
+        realizable, out = r
+        out.close()
+        return realizable
+
+    return _call_slugs_async(spec, loop, False, False, timeout).then(
+        realizable)
+
+
+def synthesize_async(spec, loop, symbolic=False, timeout=None):
+    """Return future of L{synthesize}, run by C{loop}.
+
+    cf. L{check_realizable_async}
+    """
+    def load(r):
+        realizable, out = r
+        with out:
+            if not realizable:
+                return None
+            vrs = dict(spec.sys_vars)
+            vrs.update(spec.env_vars)
+            return _load_strategy(out, vrs)
+
+    return _call_slugs_async(spec, loop, True, symbolic, timeout).then(
+        load)
+
+
+def _call_slugs_async(spec, loop, synth, symbolic, timeout,
+                      slugs_compiler_path=None):
+    """Return future of L{_call_slugs} for C{spec}, run by C{loop}."""
+    struct = _to_struct(spec)
+    slugs_path, slugs_compiler_path = _find_slugs(slugs_compiler_path)
+    d = _scratch.mkdtemp()
+    try:
+        compiled = _compile_async(
+            struct, d, slugs_compiler_path, loop, timeout)
+    except Exception:
+        _scratch.remove(d)
+        raise
+
+    def call_slugs(infile):
+        options = _slugs_options(slugs_path, infile, synth, symbolic)
+        f = loop.spawn(options, timeout=timeout)
+        return f.then(lambda r: _slugs_result(*r))
+
+    f = compiled.then(call_slugs)
+    f.add_done_callback(lambda f: _scratch.remove(d))
+    return f
+
+
+def _find_slugs(slugs_compiler_path=None):
+    """Return paths of C{slugs} and its compiler, cf. L{_call_slugs}."""
     if slugs_compiler_path is None:
         slugs_compiler_path = SLUGS_COMPILER_PATH
 
@@ -167,13 +340,11 @@ def _call_slugs(filename, synth=True, symbolic=True, slugs_compiler_path=None):
 
     if not os.path.exists(slugs_compiler_path):
         raise Exception('slugs/compiler.py not found.')
+    return slugs_path, slugs_compiler_path
 
-    with tempfile.NamedTemporaryFile(delete=False) as slugs_infile:
-        subprocess.check_call([slugs_compiler_path, filename],
-                              stdout=slugs_infile,
-                              stderr=subprocess.STDOUT)
 
-    options = [slugs_path, slugs_infile.name]
+def _slugs_options(slugs_path, filename, synth, symbolic):
+    options = [slugs_path, filename]
     if synth:
         if symbolic:
             options.extend(['--symbolicStrategy', BDD_FILE])
@@ -189,28 +360,26 @@ def _call_slugs(filename, synth=True, symbolic=True, slugs_compiler_path=None):
         # `slugs`: "Error: Parameter '--onlyRealizability' is unknown."
         pass
     logger.debug('Calling: ' + ' '.join(options))
-    try:
-        p = subprocess.Popen(
-            options,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
-    except OSError as e:
-        if e.errno == os.errno.ENOENT:
-            raise Exception('slugs not found in path.')
-        else:
-            raise
-    out, err = p.communicate()
-    msg = (
-        '\n slugs return code: {c}\n\n'.format(c=p.returncode) +
-        '\n slugs stderr: {c}\n\n'.format(c=err) +
-        '\n slugs stdout:\n\n {out}\n\n'.format(out=out))
-    logger.debug(msg)
+    return options
+
+
+def _slugs_result(returncode, fout, err):
+    """Return C{(realizable, fout)}, given outputs of C{slugs}."""
+    fout.seek(0)
+    if returncode != 0 or logger.isEnabledFor(logging.DEBUG):
+        out = fout.read()
+        fout.seek(0)
+        msg = (
+            '\n slugs return code: {c}\n\n'.format(c=returncode) +
+            '\n slugs stderr: {c}\n\n'.format(c=err) +
+            '\n slugs stdout:\n\n {out}\n\n'.format(out=out))
+        logger.debug(msg)
     # error ?
-    if p.returncode != 0:
+    if returncode != 0:
+        fout.close()
         raise Exception(msg)
     realizable = 'Specification is realizable' in err
     # check sanity
     if not realizable:
         assert 'Specification is unrealizable' in err
-    return realizable, out
+    return realizable, fout
@@ -37,6 +37,8 @@ http://spot.lip6.fr/wiki/LtlSyntax
 """
 import logging
 logger = logging.getLogger(__name__)
+import copy
+import weakref
 from abc import ABCMeta, abstractmethod
 
 
@@ -91,6 +93,9 @@ def make_nodes(opmap=None):
         #
         # The default for user-defined classes is
         # C{__hash__ == _}
+        #
+        # Shared nodes (see `share`) are identified by structure,
+        # so for them identity is structural equality.
         __metaclass__ = ABCMeta
         opmap = None
 
@@ -103,8 +108,21 @@ def make_nodes(opmap=None):
             pass
 
         @abstractmethod
-        def flatten(self):
-            pass
+        def flatten_parts(self, *arg, **kw):
+            """Return C{list} of the pieces of the flattened node.
+
+            Each piece is a C{str}, or a C{tuple} C{(node, arg, kw)}
+            for a node to be flattened with those arguments.
+            Subclasses override this method, instead of L{flatten}.
+            """
+
+        def flatten(self, *arg, **kw):
+            """Return formula as C{str}.
+
+            Uses an explicit stack instead of recursion,
+            so the depth of the tree is not limited.
+            """
+            return _join(self, 'flatten_parts', arg, kw)
 
     Node.opmap = opmap
 
@@ -139,6 +157,12 @@ def make_nodes(opmap=None):
             # *arg accommodates "depth" arg of Operator.__str__
             return self.value
 
+        def _repr_parts(self):
+            return [repr(self)]
+
+        def _str_parts(self, depth=None):
+            return [self.value]
+
         def __len__(self):
             """Return the number of operators and terminals.
 
@@ -152,8 +176,8 @@ def make_nodes(opmap=None):
             return (isinstance(other, type(self)) and
                     self.value == other.value)
 
-        def flatten(self, *arg, **kw):
-            return self.value
+        def flatten_parts(self, *arg, **kw):
+            return [self.value]
 
     class Operator(Node):
         """Takes a non-zero number of operands and returns a result.
@@ -179,52 +203,69 @@ def make_nodes(opmap=None):
             self.operator = operator
             self.operands = list(operands)
 
-        # ''.join would be faster, but __repr__ is for debugging,
-        # not for flattening, so readability takes precedence
+        # these methods use an explicit stack, as `flatten` does,
+        # so that they work for deep trees, also when logging
         def __repr__(self):
-            return '{t}({op}, {xyz})'.format(
-                t=type(self).__name__,
-                op=repr(self.operator),
-                xyz=', '.join(repr(x) for x in self.operands))
-
-        # more readable recursive counterpart of __repr__
+            return _join(self, '_repr_parts', (), dict())
+
+        def _repr_parts(self):
+            parts = ['{t}({op}, '.format(
+                t=type(self).__name__, op=repr(self.operator))]
+            for i, x in enumerate(self.operands):
+                if i:
+                    parts.append(', ')
+                parts.append((x, (), dict()))
+            parts.append(')')
+            return parts
+
+        # more readable counterpart of __repr__
         # depth allows limiting recursion to see a shallower view
         def __str__(self, depth=None):
+            return _join(self, '_str_parts', (), dict(depth=depth))
+
+        def _str_parts(self, depth=None):
             if depth is not None:
                 depth = depth - 1
             if depth == 0:
-                return '...'
-            return '({op} {xyz})'.format(
-                op=self.operator,
-                xyz=' '.join(x.__str__(depth=depth)
-                             for x in self.operands))
+                return ['...']
+            parts = ['(', self.operator]
+            for x in self.operands:
+                parts.extend([' ', (x, (), dict(depth=depth))])
+            parts.append(')')
+            return parts
 
         def __len__(self):
-            return 1 + sum(len(x) for x in self.operands)
-
-        def flatten(self, *arg, **kw):
-            return ' '.join([
-                '(',
-                self.opmap[self.operator],
-                ', '.join(x.flatten(*arg, **kw) for x in self.operands),
-                ')'])
+            n = 0
+            Q = [self]
+            while Q:
+                u = Q.pop()
+                n += 1
+                Q.extend(getattr(u, 'operands', ()))
+            return n
+
+        def flatten_parts(self, *arg, **kw):
+            parts = ['( ', self.opmap[self.operator], ' ']
+            for i, x in enumerate(self.operands):
+                if i:
+                    parts.append(', ')
+                parts.append((x, arg, kw))
+            parts.append(' )')
+            return parts
 
     # Distinguish operators by arity
     class Unary(Operator):
         pass
 
     class Binary(Operator):
-        def flatten(self, *arg, **kw):
+        def flatten_parts(self, *arg, **kw):
             """Infix flattener for consistency with parser.
 
             Override it if you want prefix or postfix.
             """
-            return ' '.join([
-                '(',
-                self.operands[0].flatten(*arg, **kw),
-                self.opmap[self.operator],
-                self.operands[1].flatten(*arg, **kw),
-                ')'])
+            return [
+                '( ', (self.operands[0], arg, kw),
+                ' ', self.opmap[self.operator], ' ',
+                (self.operands[1], arg, kw), ' )']
 
     class Nodes(object):
         """AST nodes for a generic grammar."""
@@ -269,8 +310,8 @@ def make_fol_nodes(opmap=None):
             self.value = 'True' if (value.lower() == 'true') else 'False'
             self.type = 'bool'
 
-        def flatten(self, *arg, **kw):
-            return self.opmap[self.value]
+        def flatten_parts(self, *arg, **kw):
+            return [self.opmap[self.value]]
 
     class Num(nodes.Terminal):
         """A 0-ary function."""
@@ -308,3 +349,115 @@ def make_fol_nodes(opmap=None):
 
 
 nodes = make_fol_nodes()
+
+
+def _join(u, method, arg, kw):
+    """Return C{str} of the pieces of C{u}, see L{Node.flatten_parts}.
+
+    @param method: name of the method that returns the pieces
+    """
+    out = list()
+    stack = [(u, arg, kw)]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, tuple):
+            v, a, k = x
+            stack.extend(reversed(getattr(v, method)(*a, **k)))
+        else:
+            out.append(x)
+    return ''.join(out)
+
+
+def fold(u, f, memo=None):
+    """Return C{f(u, results)}, applying C{f} bottom-up.
+
+    C{results} is the C{list} of values of C{f} at the
+    operands of C{u} (empty at terminals).
+    Uses an explicit stack instead of recursion,
+    so the depth of the tree is not limited.
+    Each node is visited once, also when shared by several parents.
+
+    @type u: L{Node}
+    @param f: callable
+    @param memo: maps nodes to values of C{f},
+        from earlier calls with the same C{f}, updated in place
+    @type memo: C{dict}
+    """
+    if memo is None:
+        memo = dict()
+    stack = [u]
+    while stack:
+        v = stack[-1]
+        if v in memo:
+            stack.pop()
+            continue
+        operands = getattr(v, 'operands', ())
+        pending = [x for x in operands if x not in memo]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        memo[v] = f(v, [memo[x] for x in operands])
+    return memo[u]
+
+
+# hash-consing table of shared nodes, see `share`
+_shared = weakref.WeakValueDictionary()
+
+
+def share(u, memo=None):
+    """Return shared AST structurally equal to C{u}.
+
+    Structurally equal subtrees of all trees passed to this
+    function are represented by the same object (hash-consing).
+    So identical subformulas of different clauses and specs
+    are stored once, and transformations can be memoized per node,
+    using nodes as C{dict} keys.
+
+    Shared nodes must not be mutated.
+    Nodes of C{u} can become shared nodes,
+    so C{u} must not be mutated afterwards either.
+    A shared node is kept as long as it is referenced elsewhere.
+
+    @type u: L{Node}
+    @param memo: maps nodes of C{u} to shared nodes, see L{fold}
+    @type memo: C{dict}
+    @rtype: L{Node}
+    """
+    return fold(u, _share, memo)
+
+
+def rebuild(u, operands):
+    """Return shared node as C{u}, but with C{operands}.
+
+    Returns C{u} itself if the operands are the same.
+
+    @param u: shared operator node
+    @param operands: shared nodes
+    @type operands: C{list}
+    """
+    if all(x is y for x, y in zip(operands, u.operands)):
+        return u
+    w = copy.copy(u)
+    w.operands = operands
+    return _share(w, operands)
+
+
+def _share(u, operands):
+    if hasattr(u, 'value'):
+        key = (type(u), u.value)
+    elif hasattr(u, 'operator'):
+        # shared operands are identified by their `id`,
+        # and kept alive by the node that has them as operands
+        key = (type(u), u.operator) + tuple(id(x) for x in operands)
+    else:
+        raise TypeError('unknown node type: {u}'.format(u=u))
+    w = _shared.get(key)
+    if w is not None:
+        return w
+    w = u
+    if operands and any(x is not y for x, y in zip(operands, u.operands)):
+        w = copy.copy(u)
+        w.operands = operands
+    _shared[key] = w
+    return w
@@ -45,7 +45,9 @@ import pprint
 import time
 import re
 import copy
+import numpy as np
 from tulip.spec import parser
+from tulip.spec import ast as sast
 from tulip.spec import transformation as tx
 from tulip.spec import translation as ts
 
@@ -355,12 +357,17 @@ class GRSpec(LTL):
         """
         self.parser = parser
         self._ast = dict()
+        # clauses translated to each language,
+        # see `translation.translate_clauses`
         self._cache = {
             'string': dict(),
             'jtlv': dict(),
             'gr1c': dict(),
             'slugs': dict()
         }
+        # variables that the translations in `_cache` are valid for
+        self._cache_vars = (dict(), dict())
+        self._primed = dict()
         self._bool_int = dict()
         self._parts = {
             x + y
@@ -526,8 +533,7 @@ class GRSpec(LTL):
         self._assert_no_primed(self.env_prog, 'liveness assumption')
         self._assert_no_primed(self.env_prog, 'liveness guarantee')
         for f in self.env_safety:
-            a = self.ast(f)
-            primed = tx.collect_primed_vars(a)
+            primed = self._primed_vars(f)
             for var in primed:
                 if var in self.sys_vars:
                     raise AssertionError(
@@ -538,14 +544,21 @@ class GRSpec(LTL):
     def _assert_no_primed(self, formulae, name):
         """Raise `AssertionError` if primed vars in `formulae`."""
         for f in formulae:
-            a = self.ast(f)
-            primed = tx.collect_primed_vars(a)
+            primed = self._primed_vars(f)
             if primed:
                 raise AssertionError(
                     'Syntax error: ' +
                     'primed variables: {primed}'.format(primed=primed) +
                     ' found in {name}: {f}'.format(f=f, name=name))
 
+    def _primed_vars(self, f):
+        """Return primed variables of clause C{f}, cached."""
+        primed = self._primed.get(f)
+        if primed is None:
+            primed = tx.collect_primed_vars(self.ast(f))
+            self._primed[f] = primed
+        return primed
+
     def copy(self):
         """Return a copy of `self`."""
         r = GRSpec(
@@ -560,6 +573,13 @@ class GRSpec(LTL):
         r.moore = self.moore
         r.plus_one = self.plus_one
         r.qinit = self.qinit
+        # share caches, so that only new clauses are parsed and translated
+        r._ast.update(self._ast)
+        r._bool_int.update(self._bool_int)
+        r._primed.update(self._primed)
+        for lang, cache in self._cache.iteritems():
+            r._cache.setdefault(lang, dict()).update(cache)
+        r._cache_vars = self._cache_vars
         return r
 
     def __or__(self, other):
@@ -589,7 +609,11 @@ class GRSpec(LTL):
 
         for x in self._parts:
             getattr(result, x).extend(getattr(other, x))
-
+        # reuse the ASTs of `other`, but translate its clauses again,
+        # as they are not in the translation caches of `self`
+        result._ast.update(other._ast)
+        result._bool_int.update(other._bool_int)
+        result._primed.update(other._primed)
         return result
 
     def to_canon(self):
@@ -642,17 +666,16 @@ class GRSpec(LTL):
 
         @return: C{dict} of ASTs after the substitutions,
             keyed by original clause (before substitution).
+            The ASTs are shared (see L{ast.share}), do not mutate them.
         """
         logger.info('substitute values for variables...')
-        a = copy.deepcopy(self._ast)
-        for formula, tree in a.iteritems():
-            g = tx.Tree.from_recursive_ast(tree)
-            tx.sub_values(g, var_values)
-            a[formula] = g.to_recursive_ast()
+        memo = dict()
+        a = {formula: tx.sub_values_ast(tree, var_values, memo)
+             for formula, tree in self._ast.iteritems()}
         logger.info('done with substitutions.\n')
         return a
 
-    def compile_init(self, no_str):
+    def compile_init(self, no_str, vectorized=False):
         """Compile python expression for initial conditions.
 
         The returned bytecode can be used with C{eval}
@@ -670,28 +693,96 @@ class GRSpec(LTL):
             where all string variables have been replaced by integers.
             Otherwise compile the original formula containing strings.
 
+        @param vectorized: if True, then compile for evaluating
+            many valuations at once. The C{dict} values are
+            C{numpy} arrays, and C{numpy} must be in the globals,
+            for example::
+
+              eval(code, {'numpy': numpy}, columns)
+
         @return: python expression compiled for C{eval}
         @rtype: C{code}
         """
         self.str_to_int()
         init = {'env': self.env_init, 'sys': self.sys_init}
+        lang = 'numpy' if vectorized else 'python'
+        op = '&' if vectorized else 'and'
         pyinit = dict()
+        memo = dict()
         for side, clauses in init.iteritems():
             if no_str:
                 clauses = [self._bool_int[x] for x in clauses]
             logger.info('clauses to compile: ' + str(clauses))
-            c = [ts.translate_ast(self.ast(x), 'python').flatten()
+            c = [ts.translate_ast(self.ast(x), lang, memo).flatten()
                  for x in clauses]
-            logger.info('after translation to python: ' + str(c))
-            s = _conj(c, op='and')
+            logger.info('after translation to {lang}: {c}'.format(
+                lang=lang, c=c))
+            s = _conj(c, op=op)
             if not s:
                 s = 'True'
             pyinit[side] = s
-        s = 'not ({assumption}) or ({assertion})'.format(
+        if vectorized:
+            s = 'numpy.logical_not({assumption}) | ({assertion})'
+        else:
+            s = 'not ({assumption}) or ({assertion})'
+        s = s.format(
             assumption=pyinit['env'],
             assertion=pyinit['sys'])
         return compile(s, '<string>', 'eval')
 
+    def compile_vectorized(self, part, no_str=True, each=False):
+        """Return function that evaluates clauses over many valuations.
+
+        The clauses of C{part} are compiled once to C{numpy}
+        expressions. The returned function evaluates them over a batch
+        of valuations in one call, for example the nodes of a
+        strategy, or the steps of a simulation trace::
+
+          >>> f = spec.compile_vectorized('sys_safety')
+          >>> ok = f(dict(x=x, y=y), dict(x=x_next, y=y_next))
+
+        The function takes the arguments:
+
+          - C{columns}: C{dict} that maps each variable to
+            a C{numpy} array of its values, one per valuation
+            (arrays of C{bool} for Boolean variables,
+            of C{int} for integer variables, and
+            of C{int} or C{str} for arbitrary finite types,
+            depending on C{no_str})
+
+          - C{next_columns}: as C{columns}, for the next values
+            of the primed variables (safety clauses only),
+            or C{None}
+
+        and returns an array of C{bool}, one per valuation.
+
+        @param part: name of part, for example C{'sys_safety'}
+        @type part: C{str}
+        @param no_str: if C{True}, then compile the clauses
+            with string variables replaced by integers
+        @param each: if C{True}, then the function returns
+            a 2-dimensional array with a row per clause, for example
+            one for each goal of C{'sys_prog'}.
+            Otherwise, the conjunction of the clauses.
+        @rtype: callable
+        """
+        if part not in self._parts:
+            raise ValueError('unknown part "{p}"'.format(p=part))
+        clauses = getattr(self, part)
+        if no_str:
+            self.str_to_int()
+            clauses = [self._bool_int[x] for x in clauses]
+        memo = dict()
+        c = [ts.translate_ast(self.ast(x), 'numpy', memo).flatten(
+             now='_now', next='_next') for x in clauses]
+        if each:
+            s = '[{c}]'.format(c=', '.join(c))
+        else:
+            s = _conj(c, op='&') or 'True'
+        code = compile(s, '<string>', 'eval')
+        return lambda columns, next_columns=None: _eval_vectorized(
+            code, each, len(c), columns, next_columns)
+
     def str_to_int(self):
         """Replace arbitrary finite vars with int vars.
 
@@ -703,6 +794,9 @@ class GRSpec(LTL):
         vars_dict = dict(self.env_vars)
         vars_dict.update(self.sys_vars)
         fvars = {v: d for v, d in vars_dict.iteritems() if isinstance(d, list)}
+        self._check_cache_vars()
+        # shared subformulas are converted once
+        memo = dict()
         # replace symbols by ints
         for p in self._parts:
             for x in getattr(self, p):
@@ -713,10 +807,8 @@ class GRSpec(LTL):
                     logger.debug(str(x) + ' is not in _bool_int cache')
                 # get AST
                 a = self.ast(x)
-                # create AST copy with int and bool vars only
-                g = tx.Tree.from_recursive_ast(a)
-                tx.sub_constants(g, fvars)
-                b = g.to_recursive_ast()
+                # AST with int and bool vars only
+                b = tx.sub_constants_ast(a, fvars, memo)
                 # formula of int/bool AST
                 f = b.flatten()
                 self._ast[f] = b  # cache
@@ -747,10 +839,13 @@ class GRSpec(LTL):
 
         The AST resulting from each clause is stored
         in the C{dict} attribute C{ast}.
+        The ASTs are shared (see L{ast.share}),
+        so identical subformulas are stored and checked once.
         """
         logger.info('parsing ASTs to cache them...')
         vardoms = dict(self.env_vars)
         vardoms.update(self.sys_vars)
+        checked = set()
         # parse new clauses and cache the resulting ASTs
         for p in self._parts:
             s = getattr(self, p)
@@ -759,14 +854,56 @@ class GRSpec(LTL):
                     logger.debug(str(x) + ' is already in cache')
                     continue
                 logger.debug('parse: ' + str(x))
-                tree = self.parser.parse(x)
-                g = tx.Tree.from_recursive_ast(tree)
-                tx.check_for_undefined_identifiers(g, vardoms)
+                tree = sast.share(self.parser.parse(x))
+                tx.check_identifiers_ast(tree, vardoms, checked)
                 self._ast[x] = tree
         # rm cached ASTs that correspond to deleted clauses
         self._collect_cache_garbage(self._ast)
+        self._collect_cache_garbage(self._primed)
+        for cache in self._cache.itervalues():
+            self._collect_cache_garbage(cache)
         logger.info('done parsing ASTs.\n')
 
+    def _translation_cache(self, lang):
+        """Return C{dict} that maps clauses to their translation.
+
+        See L{_check_cache_vars} for when translations are dropped.
+
+        @type lang: C{str}
+        """
+        self._check_cache_vars()
+        return self._cache.setdefault(lang, dict())
+
+    def _check_cache_vars(self):
+        """Drop translations and integer forms if variables changed.
+
+        All translations, and the clauses with string variables
+        replaced by integers, are dropped if the domain of a variable
+        changed, or a variable was removed, or moved between
+        C{env_vars} and C{sys_vars}. Adding variables keeps them.
+        """
+        env_vars, sys_vars = self._cache_vars
+        changed = (
+            any(self.env_vars.get(var, self) != dom
+                for var, dom in env_vars.iteritems()) or
+            any(self.sys_vars.get(var, self) != dom
+                for var, dom in sys_vars.iteritems()))
+        if changed:
+            logger.info('variables changed, dropping translations')
+            for cache in self._cache.itervalues():
+                cache.clear()
+            # the integer encoding of string variables changed too
+            clauses = set()
+            for p in self._parts:
+                clauses.update(getattr(self, p))
+            for f in set(self._bool_int.itervalues()) - clauses:
+                self._ast.pop(f, None)
+            self._bool_int.clear()
+        if changed or len(env_vars) != len(self.env_vars) or (
+                len(sys_vars) != len(self.sys_vars)):
+            self._cache_vars = (copy.deepcopy(self.env_vars),
+                                copy.deepcopy(self.sys_vars))
+
     def _collect_cache_garbage(self, cache):
         logger.info('collecting garbage from GRSpec cache...')
         # rm cached ASTs that correspond to deleted clauses
@@ -800,7 +937,8 @@ def replace_dependent_vars(spec, bool2form):
         else:
             logger.debug('spec does not contain var: ' + str(boolvar))
         tree = parser.parse(formula)
-        bool2subtree[boolvar] = tx.Tree.from_recursive_ast(tree)
+        bool2subtree[boolvar] = sast.share(tree)
+    memo = dict()
     for s in {'env_init', 'env_safety', 'env_prog',
               'sys_init', 'sys_safety', 'sys_prog'}:
         part = getattr(spec, s)
@@ -808,14 +946,37 @@ def replace_dependent_vars(spec, bool2form):
         for clause in part:
             logger.debug('replacing in clause:\n\t' + clause)
             tree = spec.ast(clause)
-            g = tx.Tree.from_recursive_ast(tree)
-            tx.sub_bool_with_subtree(g, bool2subtree)
-            f = g.to_recursive_ast().flatten()
+            f = tx.sub_vars_ast(tree, bool2subtree, memo).flatten()
             new.append(f)
             logger.debug('caluse tree after replacement:\n\t' + f)
         setattr(spec, s, new)
 
 
+def _eval_vectorized(code, each, m, columns, next_columns):
+    """Evaluate code from L{GRSpec.compile_vectorized}."""
+    if next_columns is None:
+        next_columns = dict()
+    n = 1
+    for d in (columns, next_columns):
+        for v in d.itervalues():
+            n = len(v)
+            break
+    g = {'numpy': np, '_now': columns, '_next': next_columns}
+    try:
+        r = eval(code, g)
+    except KeyError as e:
+        raise ValueError(
+            'no values given for variable: {v}'.format(v=e.args[0]))
+    if each:
+        a = np.zeros((m, n), dtype=bool)
+        for i, x in enumerate(r):
+            a[i] = x
+        return a
+    a = np.zeros(n, dtype=bool)
+    a[:] = r
+    return a
+
+
 def _conj(iterable, unary='', op='&&'):
     return ' {op} '.format(op=op).join(
         ['{u}({s})'.format(u=unary, s=s) for s in iterable])
@@ -32,6 +32,12 @@
 #
 """PLY-based parser for TuLiP LTL syntax,
 using AST classes from spec.ast
+
+The parser tables are pregenerated in the module C{ltl_parsetab},
+so building a L{Parser} only loads them.
+If the grammar changes, then PLY detects that the tables are stale
+and regenerates them in memory. To update the shipped tables,
+run this module as a script.
 """
 from __future__ import absolute_import
 import logging
@@ -46,6 +52,8 @@ TABMODULE = 'tulip.spec.ltl_parsetab'
 LEX_LOGGER = 'tulip.ltl_lex_log'
 YACC_LOGGER = 'tulip.ltl_yacc_log'
 PARSER_LOGGER = 'tulip.ltl_parser_log'
+# built once per process, see `shared_parser`
+_parser = None
 # TODO: add past fragment of LTL
 
 
@@ -227,11 +235,16 @@ class Parser(object):
     def parse(self, formula, debuglog=None):
         """Parse formula string and create abstract syntax tree (AST).
 
-        @param logger: defaults to logger C{"ltl_parser_log"}.
+        @param logger: defaults to logger C{"ltl_parser_log"},
+            if it is enabled for C{DEBUG}.
+            Otherwise PLY parses without logging,
+            which is faster, and formats no intermediate results.
         @type logger: C{logging.Logger}
         """
         if debuglog is None:
             debuglog = logging.getLogger(PARSER_LOGGER)
+            if not debuglog.isEnabledFor(logging.DEBUG):
+                debuglog = False
         root = self.parser.parse(
             formula,
             lexer=self.lexer.lexer,
@@ -334,10 +347,24 @@ class Parser(object):
             'remaining input:\n{s}\n'.format(s=' '.join(s)))
 
 
+def shared_parser():
+    """Return the L{Parser} of this process, building it once.
+
+    Calling this before forking a pool of worker processes
+    lets the workers inherit the parser, instead of building one each.
+    A L{Parser} is not thread-safe.
+
+    @rtype: L{Parser}
+    """
+    global _parser
+    if _parser is None:
+        _parser = Parser()
+    return _parser
+
+
 def parse(formula):
-    warnings.warn('Deprecated: Better to instantiate a Parser once only.')
-    parser = Parser()
-    return parser.parse(formula)
+    """Parse formula string with the L{shared_parser}."""
+    return shared_parser().parse(formula)
 
 
 if __name__ == '__main__':
@@ -348,9 +375,9 @@ if __name__ == '__main__':
     log.addHandler(h)
     import os
     tabmodule = TABMODULE.split('.')[-1]
-    outputdir = './'
-    tablepy = tabmodule + '.py'
-    tablepyc = tabmodule + '.pyc'
+    outputdir = os.path.dirname(os.path.abspath(__file__))
+    tablepy = os.path.join(outputdir, tabmodule + '.py')
+    tablepyc = tablepy + 'c'
     try:
         os.remove(tablepy)
     except:
@@ -51,7 +51,7 @@ def parse(formula, full_operators=False):
     if full_operators:
         formula = _replace_full_name_operators(formula)
     if parsers.get('ply') is None:
-        parsers['ply'] = lexyacc.Parser()
+        parsers['ply'] = lexyacc.shared_parser()
     spec = parsers['ply'].parse(formula)
     # did ply fail merely printing warnings ?
     if spec is None:
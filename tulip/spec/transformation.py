@@ -36,7 +36,7 @@ import copy
 import os
 import warnings
 import networkx as nx
-from tulip.spec.ast import nodes
+from tulip.spec.ast import nodes, share, fold, rebuild
 from tulip.spec import parser
 
 
@@ -309,6 +309,133 @@ def sub_bool_with_subtree(tree, bool2subtree):
             # tree.write(str(id(tree)) + '_after.png')
 
 
+def check_identifiers_ast(u, domains, checked=None):
+    """Raise C{ValueError} if C{u} has a variable missing from C{domains}.
+
+    Counterpart of L{check_for_undefined_identifiers}
+    for shared recursive ASTs.
+
+    @param u: shared AST, see L{ast.share}
+    @param domains: variable definitions, as in L{GRSpec}
+    @type domains: C{dict}
+    @param checked: nodes already checked with these C{domains},
+        updated in place
+    @type checked: C{set}
+    """
+    if checked is None:
+        checked = set()
+    Q = [u]
+    while Q:
+        x = Q.pop()
+        if x in checked:
+            continue
+        checked.add(x)
+        if x.type == 'var' and x.value not in domains:
+            raise ValueError(
+                ('Undefined variable "{var}" missing from '
+                 'symbol table:\n\t{doms}\n'
+                 'in subformula:\n\t{f}').format(
+                     var=x.value, f=u, doms=domains))
+        Q.extend(getattr(x, 'operands', ()))
+
+
+def sub_vars_ast(u, var2node, memo=None):
+    """Return shared AST with variables replaced by ASTs.
+
+    Counterpart of L{sub_bool_with_subtree} for shared recursive
+    ASTs. Nodes not affected by the substitution are reused.
+
+    @param u: shared AST, see L{ast.share}
+    @param var2node: maps variable names to shared ASTs
+    @type var2node: C{dict}
+    @param memo: results for nodes, from earlier calls
+        with the same C{var2node}, updated in place
+    @type memo: C{dict}
+    """
+    def f(v, operands):
+        if hasattr(v, 'value'):
+            return var2node.get(v.value, v) if v.type == 'var' else v
+        return rebuild(v, operands)
+    return fold(u, f, memo)
+
+
+def sub_values_ast(u, var_values, memo=None):
+    """Return shared AST with values substituted for variables.
+
+    Counterpart of L{sub_values} for shared recursive ASTs.
+    Variables missing from C{var_values} are left in place.
+
+    @param u: shared AST, see L{ast.share}
+    @param var_values: maps variable names to
+        C{bool}, C{int}, or C{str} values
+    @type var_values: C{dict}
+    @param memo: as for L{sub_vars_ast}, with the same C{var_values}
+    """
+    var2node = dict()
+    for var, val in var_values.iteritems():
+        if isinstance(val, bool):
+            v = nodes.Bool(str(val))
+        elif isinstance(val, (int, long)):
+            v = nodes.Num(str(val))
+        elif isinstance(val, basestring):
+            v = nodes.Str(val)
+        else:
+            raise TypeError(
+                'value of "{var}" must be bool, int, or str, '
+                'got: {val}'.format(var=var, val=val))
+        var2node[var] = share(v)
+    return sub_vars_ast(u, var2node, memo)
+
+
+def sub_constants_ast(u, var_str2int, memo=None):
+    """Return shared AST with string constants replaced by integers.
+
+    Counterpart of L{sub_constants} for shared recursive ASTs.
+    As there, a constant is paired with the variable in the
+    other operand of the nearest L{Binary} operator above it.
+
+    @param u: shared AST, see L{ast.share}
+    @param var_str2int: C{{'varname':['const_val0', ...], ...}}
+    @type var_str2int: C{dict} of C{list}
+    @param memo: as for L{sub_vars_ast}, with the same C{var_str2int}
+    """
+    def f(v, operands):
+        if hasattr(v, 'value'):
+            return v
+        if len(operands) == 2:
+            for i, (x, y) in enumerate((v.operands, v.operands[::-1])):
+                if _unary_leaf(x).type == 'str':
+                    var = str(_first_leaf(y))
+                    operands[i] = _sub_constant(x, var_str2int[var])
+        return rebuild(v, operands)
+    return fold(u, f, memo)
+
+
+def _sub_constant(u, values):
+    """Replace the constant under unary operators C{u} by its index."""
+    chain = list()
+    while hasattr(u, 'operands'):
+        chain.append(u)
+        u = u.operands[0]
+    w = share(nodes.Num(str(values.index(u.value))))
+    for v in reversed(chain):
+        w = rebuild(v, [w])
+    return w
+
+
+def _unary_leaf(u):
+    """Return first node below C{u} that is not a unary operator."""
+    while hasattr(u, 'operands') and len(u.operands) == 1:
+        u = u.operands[0]
+    return u
+
+
+def _first_leaf(u):
+    while hasattr(u, 'operands'):
+        u = u.operands[0]
+    return u
+
+
 def pair_node_to_var(tree, c):
     """Find variable under L{Binary} operator above given node.
 
@@ -434,7 +561,6 @@ def collect_primed_vars(t):
 
     @type t: recursive AST
     """
-    g = Tree.from_recursive_ast(t)
     # (node, context)
     Q = [(t, False)]
     primed = set()
@@ -446,7 +572,7 @@ def collect_primed_vars(t):
             c = (u.operator == 'X') or c
         except AttributeError:
             pass
-        Q.extend((v, c) for v in g.successors_iter(u))
+        Q.extend((v, c) for v in getattr(u, 'operands', ()))
     return primed
 
 
@@ -38,6 +38,7 @@
   - SPIN: http://spinroot.com/spin/Man/ltl.html
           http://spinroot.com/spin/Man/operators.html
   - python (Boolean formulas only)
+  - numpy (Boolean formulas only, over arrays of values)
   - WRING: http://vlsi.colorado.edu/~rbloem/wring.html
         (see top of file: LTL.pm)
 """
@@ -60,11 +61,11 @@ def make_jtlv_nodes():
     nodes = ast.make_fol_nodes(opmap)
 
     class Str(nodes.Str):
-        def flatten(self, **kw):
-            return '({c})'.format(c=self)
+        def flatten_parts(self, **kw):
+            return ['({c})'.format(c=self)]
 
     class Var(nodes.Var):
-        def flatten(self, env_vars=None, sys_vars=None, **kw):
+        def flatten_parts(self, env_vars=None, sys_vars=None, **kw):
             v = self.value
             if v in env_vars:
                 player = 'e'
@@ -72,7 +73,7 @@ def make_jtlv_nodes():
                 player = 's'
             else:
                 raise ValueError('{v} neither env nor sys var'.format(v))
-            return '({player}.{value})'.format(player=player, value=v)
+            return ['({player}.{value})'.format(player=player, value=v)]
 
     nodes.Str = Str
     nodes.Var = Var
@@ -91,16 +92,16 @@ def make_gr1c_nodes(opmap=None):
     nodes = ast.make_fol_nodes(opmap)
 
     class Var(nodes.Var):
-        def flatten(self, prime=None, **kw):
-            return '{v}{prime}'.format(
-                v=self.value, prime="'" if prime else '')
+        def flatten_parts(self, prime=None, **kw):
+            return ['{v}{prime}'.format(
+                v=self.value, prime="'" if prime else '')]
 
     class Unary(nodes.Unary):
-        def flatten(self, *arg, **kw):
+        def flatten_parts(self, *arg, **kw):
             if self.operator == 'X':
                 kw.update(prime=True)
-                return self.operands[0].flatten(*arg, **kw)
-            return super(Unary, self).flatten(*arg, **kw)
+                return [(self.operands[0], arg, kw)]
+            return super(Unary, self).flatten_parts(*arg, **kw)
 
     nodes.Var = Var
     nodes.Unary = Unary
@@ -130,7 +131,9 @@ def make_promela_nodes():
 
 
 def make_smv_nodes():
-    opmap = {'X': 'X', 'G': 'G', 'F': 'F', 'U': 'U', 'R': 'V'}
+    opmap = dict(ast.OPMAP)
+    opmap.update({'True': 'TRUE', 'False': 'FALSE',
+                  '^': 'xor', 'R': 'V'})
     return ast.make_fol_nodes(opmap)
 
 def make_wring_nodes():
@@ -142,7 +145,7 @@ def make_wring_nodes():
     nodes = ast.make_fol_nodes(opmap)
 
     class Var(nodes.Var):
-        def flatten(self, *arg, **kw):
+        def flatten_parts(self, *arg, **kw):
             if kw.has_key('env_vars') or kw.has_key('sys_vars'):
                 env_vars = kw['env_vars']
                 sys_vars = kw['sys_vars']
@@ -158,7 +161,7 @@ def make_wring_nodes():
                 if this_type != 'boolean':
                     raise TypeError('"{v}" is not Boolean, but {type}'.format(
                         v=self.val, type=this_type))
-            return '({var}=1)'.format(var=self.value)
+            return ['({var}=1)'.format(var=self.value)]
 
     nodes.Var = Var
     return nodes
@@ -172,18 +175,88 @@ def make_python_nodes():
              '+': '+', '-': '-'}
     nodes = ast.make_fol_nodes(opmap)
 
+    class Unary(nodes.Unary):
+        def flatten_parts(self, *arg, **kw):
+            if self.operator == 'X':
+                raise ValueError(
+                    'next operator unsupported in python, '
+                    'use "numpy" instead')
+            return super(Unary, self).flatten_parts(*arg, **kw)
+
+    class Imp(nodes.Binary):
+        def flatten_parts(self, *arg, **kw):
+            l, r = self.operands
+            return ['((not (', (l, (), {}), ')) or ', (r, (), {}), ')']
+
+    class BiImp(nodes.Binary):
+        def flatten_parts(self, *arg, **kw):
+            l, r = self.operands
+            return ['(', (l, (), {}), ' == ', (r, (), {}), ')']
+
+    nodes.Unary = Unary
+    nodes.Imp = Imp
+    nodes.BiImp = BiImp
+    return nodes
+
+
+def make_numpy_nodes():
+    """Return AST nodes that flatten to expressions over arrays.
+
+    Evaluate the result with C{numpy} as a global,
+    and variables bound to arrays of their values,
+    Boolean variables as arrays of C{bool}.
+
+    If flattened with the keyword argument C{now},
+    then each variable C{x} becomes C{now['x']},
+    and with C{next}, each primed variable becomes C{next['x']},
+    where C{now} and C{next} are names of C{dict}s of arrays.
+    Without C{next}, the next operator is unsupported.
+    """
+    opmap = {'True': 'True', 'False': 'False',
+             '!': 'numpy.logical_not', '&': '&', '|': '|',
+             '^': '^', '=': '==', '!=': '!=',
+             '<': '<',
+             '>=': '>=', '<=': '<=', '>': '>',
+             '+': '+', '-': '-'}
+    nodes = ast.make_fol_nodes(opmap)
+
+    class Var(nodes.Var):
+        def flatten_parts(self, prime=False, now=None, next=None, **kw):
+            name = next if prime else now
+            if prime and name is None:
+                raise ValueError(
+                    'primed variable "{v}", but no `next`'.format(
+                        v=self.value))
+            if name is None:
+                return [self.value]
+            return ['{name}[{v!r}]'.format(name=name, v=self.value)]
+
+    class Str(nodes.Str):
+        def flatten_parts(self, *arg, **kw):
+            return [repr(self.value)]
+
+    class Unary(nodes.Unary):
+        def flatten_parts(self, *arg, **kw):
+            if self.operator == 'X':
+                kw.update(prime=True)
+                return [(self.operands[0], arg, kw)]
+            return [self.opmap[self.operator] + '(',
+                    (self.operands[0], arg, kw), ')']
+
     class Imp(nodes.Binary):
-        def flatten(self, *arg, **kw):
-            return '((not ({l})) or {r})'.format(
-                l=self.operands[0].flatten(),
-                r=self.operands[1].flatten())
+        def flatten_parts(self, *arg, **kw):
+            l, r = self.operands
+            return ['(numpy.logical_not(', (l, arg, kw), ') | ',
+                    (r, arg, kw), ')']
 
     class BiImp(nodes.Binary):
-        def flatten(self, *arg, **kw):
-            return '({l} == {r})'.format(
-                l=self.operands[0].flatten(),
-                r=self.operands[1].flatten())
+        def flatten_parts(self, *arg, **kw):
+            l, r = self.operands
+            return ['(', (l, arg, kw), ' == ', (r, arg, kw), ')']
 
+    nodes.Var = Var
+    nodes.Str = Str
+    nodes.Unary = Unary
     nodes.Imp = Imp
     nodes.BiImp = BiImp
     return nodes
@@ -196,6 +269,7 @@ lang2nodes = {
     'promela': make_promela_nodes(),
     'smv': make_smv_nodes(),
     'python': make_python_nodes(),
+    'numpy': make_numpy_nodes(),
     'wring': make_wring_nodes()}
 
 
@@ -397,46 +471,82 @@ def translate(spec, lang):
     if not isinstance(spec, tulip.spec.form.GRSpec):
         raise TypeError('translate requires first argument (spec) to be of type GRSpec')
     spec.check_syntax()
-    spec.str_to_int()
-    # pprint.pprint(spec._bool_int)
-    d = {p: [translate_ast(spec.ast(spec._bool_int[x]), lang).flatten(
-             env_vars=spec.env_vars, sys_vars=spec.sys_vars)
-         for x in getattr(spec, p)] for p in spec._parts}
-    # pprint.pprint(d)
+    d = translate_clauses(spec, lang)
     d['env_vars'] = spec.env_vars
     d['sys_vars'] = spec.sys_vars
     return to_lang[lang](d)
 
 
-def translate_ast(tree, lang):
+def translate_clauses(spec, lang):
+    """Return clauses of C{spec} translated to C{lang}.
+
+    Each translated clause is cached in C{spec},
+    so calling this again after adding clauses
+    translates only the new clauses.
+
+    @type spec: L{GRSpec}
+    @type lang: as for L{translate_ast}
+
+    @return: map from each part of C{spec}
+        (C{'env_init'}, C{'sys_safety'}, etc.)
+        to C{list} of translated clauses
+    @rtype: C{dict} of C{list} of C{str}
+    """
+    spec.str_to_int()
+    cache = spec._translation_cache(lang)
+    memo = dict()
+    d = dict()
+    for p in spec._parts:
+        c = list()
+        for x in getattr(spec, p):
+            s = cache.get(x)
+            if s is None:
+                t = translate_ast(spec.ast(spec._bool_int[x]), lang, memo)
+                s = t.flatten(env_vars=spec.env_vars, sys_vars=spec.sys_vars)
+                cache[x] = s
+            c.append(s)
+        d[p] = c
+    return d
+
+
+def translate_ast(tree, lang, memo=None):
     """Return AST of formula C{tree}.
 
+    Uses an explicit stack instead of recursion,
+    so the depth of C{tree} is not limited.
+
     @type tree: L{Nodes.Node}
     @type lang: 'gr1c' or 'slugs' or 'jtlv' or
-      'promela' or 'smv' or 'python' or 'wring'
+      'promela' or 'smv' or 'python' or 'numpy' or 'wring'
+    @param memo: translated nodes of shared ASTs (see L{ast.share}),
+        from earlier calls with the same C{lang}, updated in place.
+        Pass it when translating several clauses of a spec,
+        so that subformulas they share are translated once.
+    @type memo: C{dict}
 
     @return: tree using AST nodes of C{lang}
     @rtype: L{FOL.Node}
     """
-    if lang == 'python':
-        return _ast_to_python(tree, lang2nodes[lang])
+    nodes = lang2nodes[lang]
+    if lang in ('python', 'numpy'):
+        f = lambda u, xyz: _ast_to_python(u, xyz, nodes)
     else:
-        return _ast_to_lang(tree, lang2nodes[lang])
+        f = lambda u, xyz: _ast_to_lang(u, xyz, nodes)
+    return ast.fold(tree, f, memo)
 
 
-def _ast_to_lang(u, nodes):
+def _ast_to_lang(u, xyz, nodes):
     cls = getattr(nodes, type(u).__name__)
     if hasattr(u, 'value'):
         return cls(u.value)
     elif hasattr(u, 'operator'):
-        xyz = [_ast_to_lang(x, nodes) for x in u.operands]
         return cls(u.operator, *xyz)
     else:
         raise TypeError('Unknown node type "{t}"'.format(
             t=type(u).__name__))
 
 
-def _ast_to_python(u, nodes):
+def _ast_to_python(u, xyz, nodes):
     cls = getattr(nodes, type(u).__name__)
     if hasattr(u, 'value'):
         return cls(u.value)
@@ -445,8 +555,8 @@ def _ast_to_python(u, nodes):
             'AST node: {u}'.format(u=type(u).__name__) +
             ', is neither terminal nor operator.')
     elif len(u.operands) == 1:
-        assert u.operator == '!'
-        return cls(u.operator, _ast_to_python(u.operands[0], nodes))
+        assert u.operator in {'!', 'X'}
+        return cls(u.operator, *xyz)
     elif len(u.operands) == 2:
         assert u.operator in {'&', '|', '^', '->', '<->',
                               '>', '>=', '=', '!=', '<=', '<',
@@ -455,9 +565,7 @@ def _ast_to_python(u, nodes):
             cls = nodes.Imp
         elif u.operator == '<->':
             cls = nodes.BiImp
-        return cls(u.operator,
-                   _ast_to_python(u.operands[0], nodes),
-                   _ast_to_python(u.operands[1], nodes))
+        return cls(u.operator, *xyz)
     else:
         raise ValueError(
             'Operator: {u}, is neither unary nor binary.'.format(u=u))
@@ -32,10 +32,22 @@
 """Interface to library of synthesis tools, e.g., JTLV, gr1c"""
 from __future__ import absolute_import
 import copy
+import gzip
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
 import pprint
+import Queue
+import signal
+import tempfile
+import time
+import traceback
 import warnings
 
+import networkx as nx
+import numpy as np
 from tulip.interfaces import gr1c
 from tulip.interfaces import gr1py
 from tulip.interfaces import jtlv
@@ -45,11 +57,18 @@ try:
 except ImportError:
     slugs = None
 from tulip.spec import GRSpec
+from tulip.spec.translation import translate_clauses
 from tulip import transys
 
 
 logger = logging.getLogger(__name__)
 _hl = '\n' + 60 * '-'
+# solver name -> list of wall-clock times (sec) in portfolio runs
+solver_timings = dict()
+# solver name -> number of portfolio runs in which the solver failed
+solver_failures = dict()
+# seconds between checks of portfolio workers
+PORTFOLIO_POLL = 0.2
 
 
 def _pstr(s):
@@ -106,6 +125,94 @@ def _conj_neg_diff(set0, set1, parenth=True):
             if x not in set1])
 
 
+def _disj_states(subset, state_ids, statevar=None):
+    """Return disjunction that holds exactly at states in C{subset}.
+
+    If C{statevar} is given and the states are integers
+    represented as C{statevar = i}, then maximal runs of
+    consecutive integers are expressed as range predicates,
+    for example C{(loc >= 2) && (loc <= 7)}.
+    """
+    subset = list(subset)
+    if statevar is None or not _is_int_statevar(subset, state_ids, statevar):
+        return _disj([state_ids[s] for s in subset])
+    ranges = list()
+    values = sorted(subset)
+    start = prev = values[0]
+    for x in values[1:]:
+        if x == prev + 1:
+            prev = x
+            continue
+        ranges.append((start, prev))
+        start = prev = x
+    ranges.append((start, prev))
+    return _disj([
+        state_ids[a] if a == b else
+        '({v} >= {a}) && ({v} <= {b})'.format(v=statevar, a=a, b=b)
+        for a, b in ranges])
+
+
+def _is_int_statevar(states, state_ids, statevar):
+    """Return C{True} if C{states} are integers of C{statevar}."""
+    for s in states:
+        if not isinstance(s, int) or isinstance(s, bool):
+            return False
+        if state_ids[s] != '{v} = {s}'.format(v=statevar, s=s):
+            return False
+    return True
+
+
+def _factor_trans(states, succ, state_ids, statevar=None):
+    """Return one clause per distinct post-condition in C{succ}.
+
+    States with identical post-conditions share a clause
+    C{(s0 || s1 || ...) -> (post)}.
+
+    @param succ: map from each state in C{states}
+        to the post-condition for that state
+    @type succ: C{dict} of C{str}
+    """
+    groups = dict()
+    order = list()
+    for s in states:
+        post = succ[s]
+        if post not in groups:
+            groups[post] = list()
+            order.append(post)
+        groups[post].append(s)
+    return [
+        _pstr(_disj_states(groups[post], state_ids, statevar)) +
+        ' -> (' + post + ')'
+        for post in order]
+
+
+def _factor_successors(edges, state_ids, statevar=None):
+    """Return disjunction of post-conditions, grouped by actions.
+
+    Successor states reached with the same actions are merged
+    into C{X(s1 || s2 || ...) && actions}.
+
+    @param edges: pairs C{(to_state, actions)},
+        where C{actions} is the conjunction of the edge's actions
+    @type edges: C{list} of C{tuple}
+    """
+    groups = dict()
+    order = list()
+    for to_state, actions in edges:
+        if actions not in groups:
+            groups[actions] = list()
+            order.append(actions)
+        if to_state not in groups[actions]:
+            groups[actions].append(to_state)
+    terms = list()
+    for actions in order:
+        post = 'X' + _pstr(_disj_states(groups[actions], state_ids, statevar))
+        if actions:
+            post += ' && ' + _pstr(actions)
+        terms.append(post)
+    return _disj(terms)
+
+
 def mutex(iterable):
     """Mutual exclusion for all time."""
     iterable = filter(lambda x: x != '', iterable)
@@ -376,7 +483,7 @@ def _fts2spec(
 
 def sys_to_spec(
     ofts, ignore_initial, statevar,
-    bool_states=False, bool_actions=False
+    bool_states=False, bool_actions=False, compact=False
 ):
     """Convert transition system to GR(1) fragment of LTL.
 
@@ -441,6 +548,13 @@ def sys_to_spec(
           - Otherwise use a single integer variable,
             that ranges over the possible action values.
 
+    @param compact: factor the transition relation,
+        so that states with the same successors and actions
+        share clauses, and integer states are grouped into ranges.
+        This yields smaller formulas for the solver.
+        For details see L{_sys_trans_from_ts}.
+    @type compact: C{bool}
+
     @return: logic formula in GR(1) form representing C{ofts}.
     @rtype: L{GRSpec}
     """
@@ -487,7 +601,8 @@ def sys_to_spec(
     sys_init += _sys_init_from_ts(states, state_ids, aps, ignore_initial)
     sys_trans += _sys_trans_from_ts(
         states, state_ids, trans,
-        sys_action_ids=sys_action_ids, env_action_ids=env_action_ids)
+        sys_action_ids=sys_action_ids, env_action_ids=env_action_ids,
+        statevar=statevar, compact=compact)
     tmp_init, tmp_trans = _ap_trans_from_ts(states, state_ids, aps)
     sys_init += tmp_init
     sys_trans += tmp_trans
@@ -501,7 +616,7 @@ def sys_to_spec(
 
 def env_to_spec(
     ofts, ignore_initial, statevar,
-    bool_states=False, bool_actions=False
+    bool_states=False, bool_actions=False, compact=False
 ):
     """Convert env transition system to GR(1) representation.
 
@@ -564,7 +679,8 @@ def env_to_spec(
     env_init += _sys_init_from_ts(states, state_ids, aps, ignore_initial)
     env_trans += _env_trans_from_env_ts(
         states, state_ids, trans,
-        env_action_ids=env_action_ids, sys_action_ids=sys_action_ids)
+        env_action_ids=env_action_ids, sys_action_ids=sys_action_ids,
+        statevar=statevar, compact=compact)
     tmp_init, tmp_trans = _ap_trans_from_ts(states, state_ids, aps)
     env_init += tmp_init
     env_trans += tmp_trans
@@ -597,7 +713,8 @@ def _sys_init_from_ts(states, state_ids, aps, ignore_initial=False):
 
 def _sys_trans_from_ts(
     states, state_ids, trans,
-    action_ids=None, sys_action_ids=None, env_action_ids=None
+    action_ids=None, sys_action_ids=None, env_action_ids=None,
+    statevar=None, compact=False
 ):
     """Convert transition relation to GR(1) sys_safety.
 
@@ -652,9 +769,26 @@ def _sys_trans_from_ts(
             where C{i} corresponds to that particular  C{action_type}.
 
     @param env_action_ids: same as C{sys-action_ids}
+
+    @param statevar: name of the integer or string variable
+        that represents the current state.
+        Used by C{compact} to express integer states as ranges.
+
+    @param compact: factor the transition relation:
+
+          - successors reached with the same actions are merged
+            into C{X(s1 || s2 || ...) && actions}
+          - states with identical post-conditions share one clause
+            C{(s0 || s3 || ...) -> (...)}
+          - if C{statevar} is integer-valued, then runs of
+            consecutive states become range predicates
+
+        Otherwise, one clause per state and one disjunct per edge.
+    @type compact: C{bool}
     """
     logger.debug('modeling sys transitions in logic')
     sys_trans = list()
+    succ = dict()
     # Transitions
     for from_state in states:
         from_state_id = state_ids[from_state]
@@ -666,12 +800,14 @@ def _sys_trans_from_ts(
         # no successor states ?
         if not cur_trans:
             logger.debug('state: ' + str(from_state) + ' is deadend !')
+            succ[from_state] = 'X(False)'
             sys_trans += [precond + ' -> X(False)']
             continue
         cur_str = list()
+        cur_edges = list()
         for (from_state, to_state, label) in cur_trans:
             to_state_id = state_ids[to_state]
-            postcond = ['X' + _pstr(to_state_id)]
+            postcond = list()
             logger.debug('label = ' + str(label))
             if 'previous' in label:
                 previous = label['previous']
@@ -706,13 +842,20 @@ def _sys_trans_from_ts(
             else:
                 postcond += [_conj_action(label, 'actions',
                                           ids=action_ids, nxt=True)]
-            cur_str += [_conj(postcond)]
+            cur_edges.append((to_state, _conj(postcond)))
+            cur_str += [_conj(['X' + _pstr(to_state_id)] + postcond)]
             msg = (
                 'guard to state: ' + str(to_state) +
                 ', with state_id: ' + str(to_state_id) +
                 ', has post-conditions: ' + str(postcond))
             logger.debug(msg)
-        sys_trans += [precond + ' -> (' + _disj(cur_str) + ')']
+        if compact:
+            succ[from_state] = _factor_successors(
+                cur_edges, state_ids, statevar)
+        else:
+            sys_trans += [precond + ' -> (' + _disj(cur_str) + ')']
+    if compact:
+        return _factor_trans(states, succ, state_ids, statevar)
     return sys_trans
 
 
@@ -768,7 +911,8 @@ def _env_trans_from_sys_ts(states, state_ids, trans, env_action_ids):
 
 def _env_trans_from_env_ts(
     states, state_ids, trans,
-    action_ids=None, env_action_ids=None, sys_action_ids=None
+    action_ids=None, env_action_ids=None, sys_action_ids=None,
+    statevar=None, compact=False
 ):
     """Convert environment TS transitions to GR(1) representation.
 
@@ -776,14 +920,18 @@ def _env_trans_from_env_ts(
     i.e., constrains the next environment state variables' valuation
     depending on the previous environment state variables valuation
     and the previous system action (system output).
+
+    For C{statevar} and C{compact} see L{_sys_trans_from_ts}.
     """
     env_trans = list()
+    succ = dict()
     for from_state in states:
         from_state_id = state_ids[from_state]
         precond = _pstr(from_state_id)
         cur_trans = trans.find([from_state])
         # no successor states ?
         if not cur_trans:
+            succ[from_state] = 'X(False)'
             env_trans += [precond + ' -> X(False)']
             msg = (
                 'Environment dead-end found.\n'
@@ -793,11 +941,12 @@ def _env_trans_from_env_ts(
             warnings.warn(msg)
             continue
         cur_list = list()
+        cur_edges = list()
         found_free = False  # any environment transition
         # not conditioned on the previous system output ?
         for (from_state, to_state, label) in cur_trans:
             to_state_id = state_ids[to_state]
-            postcond = ['X' + _pstr(to_state_id)]
+            postcond = list()
             env_actions = {k: v for k, v in label.iteritems() if 'env' in k}
             postcond += [_conj_actions(env_actions, env_action_ids, nxt=True)]
             # remember: this is an environment FTS, so no next for sys
@@ -808,7 +957,10 @@ def _env_trans_from_env_ts(
             # todo: test this claus
             if not sys_actions:
                 found_free = True
-            cur_list += [_conj(postcond)]
+            cur_edges.append((to_state, _conj(postcond)))
+            cur_list += [_conj(['X' + _pstr(to_state_id)] + postcond)]
+        if compact:
+            cur_list = [_factor_successors(cur_edges, state_ids, statevar)]
         # can sys kill env by setting all previous sys outputs to False ?
         # then env assumption becomes False,
         # so the spec trivially True: avoid this
@@ -824,7 +976,12 @@ def _env_trans_from_env_ts(
                     'with codomain: ' + str(codomain) + '\n' +
                     'the negated conjunction is: ' + str(conj))
                 logger.debug(msg)
-        env_trans += [_pstr(precond) + ' -> (' + _disj(cur_list) + ')']
+        if compact:
+            succ[from_state] = _disj(cur_list)
+        else:
+            env_trans += [_pstr(precond) + ' -> (' + _disj(cur_list) + ')']
+    if compact:
+        return _factor_trans(states, succ, state_ids, statevar)
     return env_trans
 
 
@@ -1020,7 +1177,8 @@ def synthesize_many(specs, ts=None, ignore_init=None,
 def synthesize(
     option, specs, env=None, sys=None,
     ignore_env_init=False, ignore_sys_init=False,
-    rm_deadends=True
+    rm_deadends=True, cache=None, symbolic=False, minimize=False,
+    timeout=None
 ):
     """Function to call the appropriate synthesis tool on the specification.
 
@@ -1080,6 +1238,14 @@ def synthesize(
             Java, symbolic
             (deprecated)
 
+        For running several solvers in parallel:
+
+          - C{"portfolio"}: all solvers in L{available_solvers}
+          - C{list} of the above names: these solvers
+
+          The first solver to answer is used,
+          the others are terminated. See L{portfolio}.
+
     @type specs: L{spec.GRSpec}
 
     @param env: A transition system describing the environment:
@@ -1113,37 +1279,51 @@ def synthesize(
     @param rm_deadends: return a strategy that contains no terminal states.
     @type rm_deadends: bool
 
+    @param cache: if given, then look up the strategy in C{cache},
+        and call the solver only if not found there.
+    @type cache: L{StrategyCache}
+
+    @param symbolic: return the strategy as BDDs, without enumerating it.
+        Only for C{option="omega"}, and C{rm_deadends}
+        and C{cache} are ignored.
+    @type symbolic: bool
+
+    @param minimize: merge equivalent states of the strategy,
+        using L{transys.machines.minimize}.
+    @type minimize: bool
+
+    @param timeout: seconds to wait for an answer,
+        if C{option} is a portfolio of solvers (see L{portfolio})
+    @type timeout: C{float}
+
     @return: If spec is realizable,
         then return a Mealy machine implementing the strategy.
         Otherwise return None.
-    @rtype: L{MealyMachine} or None
+    @rtype: L{MealyMachine}, or L{interfaces.omega.SymbolicMealy}
+        if C{symbolic}, or None
     """
     specs = _spec_plus_sys(
         specs, env, sys,
         ignore_env_init,
         ignore_sys_init)
-    if option == 'gr1c':
-        strategy = gr1c.synthesize(specs)
-    elif option == 'slugs':
-        if slugs is None:
-            raise ValueError('Import of slugs interface failed. ' +
-                             'Please verify installation of "slugs".')
-        strategy = slugs.synthesize(specs)
-    elif option == 'gr1py':
-        strategy = gr1py.synthesize(specs)
-    elif option == 'omega':
-        strategy = omega_int.synthesize_enumerated_streett(specs)
-    elif option == 'jtlv':
-        strategy = jtlv.synthesize(specs)
-        if isinstance(strategy, list):
-            # Discard counter-examples, because here we only care that
-            # it is not realizable.
-            strategy = None
+    if symbolic:
+        if option != 'omega':
+            raise ValueError(
+                'symbolic strategies are returned only by "omega"')
+        return omega_int.synthesize_symbolic(specs)
+    hit = False
+    if cache is not None:
+        key = cache.key(option, specs)
+        hit, strategy = cache.get(key)
+    if hit:
+        logger.info('strategy found in cache')
+    elif _is_portfolio(option):
+        option, strategy = portfolio(
+            _synthesize, option, specs, timeout=timeout)
     else:
-        raise Exception('Undefined synthesis option. ' +
-                        'Current options are "gr1c", ' +
-                        '"slugs", "gr1py", "omega", and "jtlv".')
-
+        strategy = _synthesize(option, specs)
+    if cache is not None and not hit:
+        cache.put(key, strategy)
     # While the return values of the solver interfaces vary, we expect
     # here that strategy is either None to indicate unrealizable or a
     # networkx.DiGraph ready to be passed to strategy2mealy().
@@ -1156,12 +1336,16 @@ def synthesize(
 
     if rm_deadends:
         ctrl.remove_deadends()
+    if minimize:
+        ctrl = transys.machines.minimize(ctrl)
+        logger.debug('minimal Mealy machine has: n = ' +
+                     str(len(ctrl.states)) + ' states.')
     return ctrl
 
 
 def is_realizable(
     option, specs, env=None, sys=None,
-    ignore_env_init=False, ignore_sys_init=False
+    ignore_env_init=False, ignore_sys_init=False, timeout=None
 ):
     """Check realizability.
 
@@ -1170,6 +1354,47 @@ def is_realizable(
     specs = _spec_plus_sys(
         specs, env, sys,
         ignore_env_init, ignore_sys_init)
+    if _is_portfolio(option):
+        option, r = portfolio(
+            _is_realizable, option, specs, timeout=timeout)
+    else:
+        r = _is_realizable(option, specs)
+    if r:
+        logger.debug('is realizable')
+    else:
+        logger.debug('is not realizable')
+    return r
+
+
+def _synthesize(option, specs):
+    """Return strategy from solver C{option}, or C{None}."""
+    if option == 'gr1c':
+        strategy = gr1c.synthesize(specs)
+    elif option == 'slugs':
+        if slugs is None:
+            raise ValueError('Import of slugs interface failed. ' +
+                             'Please verify installation of "slugs".')
+        strategy = slugs.synthesize(specs)
+    elif option == 'gr1py':
+        strategy = gr1py.synthesize(specs)
+    elif option == 'omega':
+        strategy = omega_int.synthesize_enumerated_streett(specs)
+    elif option == 'jtlv':
+        strategy = jtlv.synthesize(specs)
+        if isinstance(strategy, list):
+            # Discard counter-examples, because here we only care that
+            # it is not realizable.
+            strategy = None
+    else:
+        raise Exception('Undefined synthesis option. ' +
+                        'Current options are "gr1c", ' +
+                        '"slugs", "gr1py", "omega", "jtlv", ' +
+                        'and "portfolio".')
+    return strategy
+
+
+def _is_realizable(option, specs):
+    """Return C{True} if solver C{option} finds C{specs} realizable."""
     if option == 'gr1c':
         r = gr1c.check_realizable(specs)
     elif option == 'slugs':
@@ -1186,14 +1411,319 @@ def is_realizable(
     else:
         raise Exception('Undefined synthesis option. ' +
                         'Current options are "jtlv", "gr1c", ' +
-                        '"slugs", and "gr1py"')
-    if r:
-        logger.debug('is realizable')
-    else:
-        logger.debug('is not realizable')
+                        '"slugs", "gr1py", "omega", and "portfolio"')
     return r
 
 
+def _is_portfolio(option):
+    return option == 'portfolio' or isinstance(option, (list, tuple))
+
+
+def available_solvers():
+    """Return names of GR(1) solvers found in this environment.
+
+    The names are valid values of the argument C{option}
+    of L{synthesize} and L{is_realizable}.
+    JTLV is omitted, because it is deprecated.
+
+    @rtype: C{list} of C{str}
+    """
+    solvers = list()
+    if gr1c.check_gr1c():
+        solvers.append('gr1c')
+    if slugs is not None and _find_executable('slugs'):
+        solvers.append('slugs')
+    if gr1py.gr1py is not None:
+        solvers.append('gr1py')
+    if omega_int.omega is not None:
+        solvers.append('omega')
+    return solvers
+
+
+def _find_executable(name):
+    """Return C{True} if executable C{name} is in C{$PATH}."""
+    for path in os.environ.get('PATH', '').split(os.pathsep):
+        if os.path.isfile(os.path.join(path, name)):
+            return True
+    return False
+
+
+def portfolio(f, options, specs, timeout=None):
+    """Run solvers in parallel processes, return first answer.
+
+    Each solver in C{options} is called in a separate process.
+    The first solver to return without raising an exception
+    wins, and the other processes are terminated.
+    The time taken by each solver is appended to C{solver_timings},
+    for selecting solvers later (see L{rank_solvers}).
+    Solvers that were terminated are counted as taking
+    the whole portfolio run, so at least as long as the winner.
+    Solvers that failed are counted in C{solver_failures} instead.
+
+    A worker process that exits without an answer
+    (for example, if the solver crashes) counts as failed.
+
+    @param f: L{_synthesize} or L{_is_realizable}
+    @type f: callable with arguments C{(option, specs)}
+
+    @param options: solver names, or C{"portfolio"}
+        for all solvers returned by L{available_solvers}.
+    @type options: C{list} of C{str}, or C{str}
+
+    @type specs: L{GRSpec}
+
+    @param timeout: seconds to wait for an answer,
+        or wait indefinitely if C{None}.
+    @type timeout: C{float}
+
+    @return: name of winning solver and its result
+    @rtype: C{tuple}
+    """
+    if options == 'portfolio':
+        options = available_solvers()
+    if not options:
+        raise ValueError('no solvers found for portfolio')
+    queue = multiprocessing.Queue()
+    procs = dict()
+    t0 = time.time()
+    for option in options:
+        p = multiprocessing.Process(
+            target=_portfolio_worker,
+            args=(f, option, specs, queue))
+        p.daemon = True
+        p.start()
+        procs[option] = p
+    times = dict()
+    errors = dict()
+    # workers seen dead at the previous poll
+    dead = set()
+    winner = None
+    try:
+        while len(errors) < len(procs):
+            try:
+                option, result, t, error = queue.get(
+                    timeout=PORTFOLIO_POLL)
+            except Queue.Empty:
+                if timeout is not None and time.time() - t0 > timeout:
+                    raise Exception(
+                        'portfolio: no solver answered '
+                        'within {t} sec'.format(t=timeout))
+                # a dead worker's answer may still be in transit,
+                # so wait one more poll
+                for option, p in procs.iteritems():
+                    if option in errors or p.is_alive():
+                        continue
+                    if option in dead:
+                        errors[option] = (
+                            'worker exited with code {c}, '
+                            'without answer'.format(c=p.exitcode))
+                        logger.info('portfolio: "{s}" {e}'.format(
+                            s=option, e=errors[option]))
+                    else:
+                        dead.add(option)
+                continue
+            if error is None:
+                times[option] = t
+                winner = (option, result)
+                logger.info(
+                    'portfolio: "{s}" answered first, after {t:1.3} sec'.format(
+                        s=option, t=t))
+                break
+            logger.info('portfolio: "{s}" failed with:\n{e}'.format(
+                s=option, e=error))
+            errors[option] = error
+        # record solvers that answered at about the same time
+        while winner is not None:
+            try:
+                option, result, t, error = queue.get_nowait()
+            except Queue.Empty:
+                break
+            if error is None:
+                times[option] = t
+    finally:
+        for p in procs.itervalues():
+            _kill_worker(p)
+        t = time.time() - t0
+        for option in procs:
+            if option in errors:
+                solver_failures[option] = solver_failures.get(option, 0) + 1
+            else:
+                solver_timings.setdefault(option, list()).append(
+                    times.get(option, t))
+    if winner is None:
+        raise Exception(
+            'portfolio: all solvers failed:\n' + pprint.pformat(errors))
+    return winner
+
+
+def _portfolio_worker(f, option, specs, queue):
+    # own process group, so that solver subprocesses
+    # are terminated together with the worker
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    t0 = time.time()
+    try:
+        result = f(option, specs)
+        error = None
+    except Exception:
+        result = None
+        error = traceback.format_exc()
+    queue.put((option, result, time.time() - t0, error))
+
+
+def _kill_worker(p):
+    """Terminate portfolio worker C{p} and any solver it started."""
+    if p.is_alive() and hasattr(os, 'killpg'):
+        try:
+            os.killpg(p.pid, signal.SIGTERM)
+        except OSError:
+            pass
+    if p.is_alive():
+        p.terminate()
+    p.join()
+
+
+def rank_solvers(options=None):
+    """Return solvers sorted by mean time in previous portfolio runs.
+
+    Solvers that failed in some runs are ranked after those that
+    never failed, in order of the fraction of runs they failed in.
+    Solvers that have not taken part in any portfolio run are omitted.
+
+    @param options: rank only these solvers
+    @type options: iterable of C{str}
+
+    @rtype: C{list} of C{str}
+    """
+    if options is None:
+        options = set(solver_timings).union(solver_failures)
+    rank = dict()
+    for k in options:
+        times = solver_timings.get(k, list())
+        failures = solver_failures.get(k, 0)
+        if not times and not failures:
+            continue
+        if times:
+            mean = sum(times) / len(times)
+        else:
+            mean = float('inf')
+        rank[k] = (float(failures) / (failures + len(times)), mean)
+    return sorted(rank, key=rank.get)
+
+
+def synthesize_batch(
+    base_spec, variants, option='omega',
+    rm_deadends=True, processes=None
+):
+    """Synthesize controllers for variants of a specification.
+
+    Each variant adds a few clauses to C{base_spec},
+    for example a different set of goals.
+    The clauses of C{base_spec} are parsed once.
+    For C{"omega"} and C{"gr1py"} a single solver session is reused,
+    so that the shared part is also compiled once.
+    Other solvers are called on a pool of C{processes} workers.
+
+    Results are generated as they become available,
+    so not necessarily in the order of C{variants}.
+
+    Example::
+
+      goals = [{'sys_prog': 'X0reach'}, {'sys_prog': ['X1', 'X2']}]
+      for i, ctrl in synthesize_batch(spec, goals):
+          print(i, ctrl is not None)
+
+    @param base_spec: part shared by all variants
+    @type base_spec: L{GRSpec}
+
+    @param variants: map from names of parts
+        (C{'env_init'}, C{'sys_prog'}, etc., see C{GRSpec._parts})
+        to clauses to add
+    @type variants: iterable of C{dict} of C{str} or C{list} of C{str}
+
+    @param option: solver, as in L{synthesize},
+        except for C{"portfolio"}
+
+    @param processes: number of workers,
+        if C{None} then the number of CPUs
+
+    @return: generator of C{(i, ctrl)}, where C{ctrl} is the controller
+        for the C{i}-th variant, or C{None} if it is unrealizable
+    @rtype: C{(int, }L{MealyMachine}C{)}
+    """
+    base_spec.str_to_int()
+    if option == 'omega':
+        specs = [_spec_variant(base_spec, v) for v in variants]
+        strategies = enumerate(
+            omega_int.synthesize_enumerated_streett_batch(
+                base_spec, specs))
+    elif option == 'gr1py':
+        specs = [_spec_variant(base_spec, v) for v in variants]
+        strategies = enumerate(gr1py.synthesize_batch(base_spec, specs))
+    elif _is_portfolio(option):
+        raise ValueError('portfolio not supported by synthesize_batch')
+    else:
+        variants = list(variants)
+        specs = [_spec_variant(base_spec, v) for v in variants]
+        pool = multiprocessing.Pool(
+            processes, initializer=_batch_init,
+            initargs=(option, base_spec))
+        try:
+            strategies = pool.imap_unordered(
+                _batch_worker, enumerate(variants))
+            for i, strategy in strategies:
+                yield i, _strategy_to_ctrl(strategy, specs[i], rm_deadends)
+        finally:
+            pool.terminate()
+            pool.join()
+        return
+    for i, strategy in strategies:
+        yield i, _strategy_to_ctrl(strategy, specs[i], rm_deadends)
+
+
+def _spec_variant(base, variant):
+    """Return copy of C{base} with clauses of C{variant} added.
+
+    The parser caches of C{base} are shared,
+    so that only the new clauses are parsed.
+    """
+    spec = base.copy()
+    spec._ast.update(base._ast)
+    spec._bool_int.update(base._bool_int)
+    for part, clauses in variant.iteritems():
+        if part not in spec._parts:
+            raise ValueError('unknown part "{p}"'.format(p=part))
+        if isinstance(clauses, basestring):
+            clauses = [clauses]
+        getattr(spec, part).extend(clauses)
+    return spec
+
+
+# worker state of `synthesize_batch`
+_batch = dict()
+
+
+def _batch_init(option, base):
+    _batch['option'] = option
+    _batch['base'] = base
+
+
+def _batch_worker(args):
+    i, variant = args
+    spec = _spec_variant(_batch['base'], variant)
+    return i, _synthesize(_batch['option'], spec)
+
+
+def _strategy_to_ctrl(strategy, specs, rm_deadends):
+    """Return Mealy machine from C{strategy}, or C{None}."""
+    if strategy is None:
+        return None
+    ctrl = strategy2mealy(strategy, specs)
+    if rm_deadends:
+        ctrl.remove_deadends()
+    return ctrl
+
+
 def _spec_plus_sys(
     specs, env, sys,
     ignore_env_init, ignore_sys_init
@@ -1277,18 +1807,6 @@ def strategy2mealy(A, spec):
         k: v for k, v in sys_vars.iteritems()
         if isinstance(v, list)})
     mach.states.add_from(A)
-    # transitions labeled with I/O
-    for u in A:
-        for v in A.successors_iter(u):
-            d = A.node[v]['state']
-            d = _int2str(d, str_vars)
-            mach.transitions.add(u, v, **d)
-
-            logger.info('node: {v}, state: {d}'.format(v=v, d=d))
-    # special initial state, for first reaction
-    initial_state = 'Sinit'
-    mach.states.add(initial_state)
-    mach.states.initial.add(initial_state)
     # fix an ordering for keys
     # because tuple(dict.iteritems()) is not safe:
     # https://docs.python.org/2/library/stdtypes.html#dict.items
@@ -1297,36 +1815,47 @@ def strategy2mealy(A, spec):
         keys = A.node[u]['state'].keys()
     except Exception:
         logger.warn('strategy has no states.')
+        keys = list()
+    # intern one label per distinct valuation,
     # to store tuples of dict values for fast search
-    isinit = spec.compile_init(no_str=True)
-    # Mealy reaction to initial env input
-    init_valuations = set()
-    tmp = dict()
+    node_vals = dict()
+    labels = dict()
     for u, d in A.nodes_iter(data=True):
         var_values = d['state']
         vals = tuple(var_values[k] for k in keys)
-        # already an initial valuation ?
-        if vals in init_valuations:
-            continue
+        node_vals[u] = vals
+        if vals not in labels:
+            labels[vals] = _int2str(var_values, str_vars)
+    # transitions labeled with I/O
+    mach.add_edges_bulk(
+        (u, v, labels[node_vals[v]])
+        for u in A for v in A.successors_iter(u))
+    logger.debug('added {m} transitions for {n} distinct labels'.format(
+        m=A.number_of_edges(), n=len(labels)))
+    # special initial state, for first reaction
+    initial_state = 'Sinit'
+    mach.states.add(initial_state)
+    mach.states.initial.add(initial_state)
+    init_valuations = _init_valuations(labels, keys, spec)
+    # Mealy reaction to initial env input
+    for u in A:
+        vals = node_vals[u]
         # add edge: Sinit -> u ?
-        tmp.update(var_values)
-        if eval(isinit, tmp):
-            label = _int2str(var_values, str_vars)
-            mach.transitions.add(initial_state, u, **label)
-            # remember variable values to avoid
-            # spurious non-determinism wrt the machine's memory
-            #
-            # in other words,
-            # "state" omits the strategy's memory
-            # hidden (existentially quantified)
-            # so multiple nodes can be labeled with the same state
-            #
-            # non-uniqueness here would be equivalent to
-            # multiple choices for initializing the hidden memory.
-            init_valuations.add(vals)
-            logger.debug('found initial state: {u}'.format(u=u))
-        logger.debug('machine vertex: {u}, has var values: {v}'.format(
-                     u=u, v=var_values))
+        if vals not in init_valuations:
+            continue
+        mach.transitions.add(initial_state, u, **labels[vals])
+        # remember variable values to avoid
+        # spurious non-determinism wrt the machine's memory
+        #
+        # in other words,
+        # "state" omits the strategy's memory
+        # hidden (existentially quantified)
+        # so multiple nodes can be labeled with the same state
+        #
+        # non-uniqueness here would be equivalent to
+        # multiple choices for initializing the hidden memory.
+        init_valuations.remove(vals)
+        logger.debug('found initial state: {u}'.format(u=u))
     n = len(A)
     m = len(mach)
     assert m == n + 1, (n, m)
@@ -1342,6 +1871,34 @@ def strategy2mealy(A, spec):
     return mach
 
 
+def _init_valuations(valuations, keys, spec):
+    """Return valuations that satisfy the initial condition.
+
+    The initial condition is evaluated once for all C{valuations},
+    as arrays of values.
+
+    @param valuations: C{tuple}s of values, ordered as C{keys}
+    @type valuations: iterable
+    @param keys: variable names
+    @type spec: L{GRSpec}
+    @rtype: C{set} of C{tuple}
+    """
+    valuations = list(valuations)
+    if not valuations:
+        return set()
+    isinit = spec.compile_init(no_str=True, vectorized=True)
+    bools = {
+        k for k, v in spec.env_vars.items() + spec.sys_vars.items()
+        if v in ('boolean', 'bool')}
+    columns = dict()
+    for i, k in enumerate(keys):
+        dtype = bool if k in bools else None
+        columns[k] = np.array([x[i] for x in valuations], dtype=dtype)
+    r = eval(isinit, {'numpy': np}, columns)
+    r = np.broadcast_to(r, (len(valuations),))
+    return {x for x, y in zip(valuations, r) if y}
+
+
 def _int2str(label, str_vars):
     """Replace integers with string values for string variables.
 
@@ -1364,6 +1921,205 @@ def _int2str(label, str_vars):
     return label
 
 
+class StrategyCache(object):
+    """On-disk cache of strategies, keyed by specification contents.
+
+    The key is a hash of:
+
+      - the solver option
+      - C{moore}, C{plus_one}, and C{qinit}
+      - variable declarations
+      - the clauses of each part of the specification,
+        translated to solver syntax, as a set
+
+    So reordering or repeating clauses yields the same key.
+    Unrealizable results are cached too.
+
+    Each strategy is stored in a gzipped JSON file, with
+    one tuple of variable values per node.
+    If the files exceed C{max_size} bytes in total,
+    then the least recently used are removed.
+    A strategy whose file alone exceeds C{max_size}
+    is not stored.
+
+    Example:
+
+      >>> cache = StrategyCache('/tmp/tulip_cache')
+      >>> ctrl = synthesize('omega', specs, cache=cache)
+    """
+
+    suffix = '.json.gz'
+
+    def __init__(self, path, max_size=2**28):
+        """Create cache in directory C{path}.
+
+        @param max_size: bound on total size of cache files (bytes)
+        @type max_size: C{int}
+        """
+        self.path = path
+        self.max_size = max_size
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def key(self, option, specs):
+        """Return hash of C{specs} as given to solver C{option}.
+
+        C{specs} is not modified: the clauses are translated
+        in a copy, which starts from the parse and translation
+        caches of C{specs}.
+
+        @rtype: C{str}
+        """
+        if isinstance(option, (list, tuple)):
+            option = sorted(option)
+            lang = 'gr1c'
+        else:
+            lang = _solver_lang.get(option, 'gr1c')
+        specs = specs.copy()
+        specs.check_syntax()
+        translated = translate_clauses(specs, lang)
+        clauses = {part: sorted(set(c))
+                   for part, c in translated.iteritems()}
+        d = dict(
+            option=option,
+            moore=specs.moore,
+            plus_one=specs.plus_one,
+            qinit=specs.qinit,
+            env_vars=_canon_vars(specs.env_vars),
+            sys_vars=_canon_vars(specs.sys_vars),
+            clauses=clauses)
+        s = json.dumps(d, sort_keys=True)
+        return hashlib.sha256(s).hexdigest()
+
+    def get(self, key):
+        """Return C{(True, strategy)} if C{key} found.
+
+        Otherwise return C{(False, None)}.
+        The strategy is C{None} if unrealizable.
+        """
+        fname = self._filename(key)
+        try:
+            with gzip.open(fname, 'rb') as f:
+                d = json.load(f)
+        except (IOError, ValueError):
+            logger.debug('cache miss: {k}'.format(k=key))
+            return False, None
+        # mark as recently used
+        os.utime(fname, None)
+        logger.debug('cache hit: {k}'.format(k=key))
+        return True, _load_strategy(d)
+
+    def put(self, key, strategy):
+        """Store C{strategy} under C{key}, then evict if needed.
+
+        If the file of C{strategy} is larger than C{max_size},
+        then it is not stored, and other files are not evicted.
+        """
+        d = _dump_strategy(strategy)
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, 'wb') as fout:
+            with gzip.GzipFile(fileobj=fout, mode='wb') as f:
+                json.dump(d, f)
+        size = os.path.getsize(tmp)
+        if size > self.max_size:
+            os.remove(tmp)
+            logger.info((
+                'strategy of {size} bytes not cached, '
+                'larger than max_size').format(size=size))
+            return
+        # atomic, for concurrent writers
+        os.rename(tmp, self._filename(key))
+        self._evict()
+
+    def clear(self):
+        """Remove all cached strategies."""
+        for fname in self._files():
+            os.remove(fname)
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def _files(self):
+        return [
+            os.path.join(self.path, x)
+            for x in os.listdir(self.path)
+            if x.endswith(self.suffix)]
+
+    def _evict(self):
+        """Remove least recently used files above C{max_size}."""
+        stats = list()
+        for fname in self._files():
+            try:
+                st = os.stat(fname)
+            except OSError:
+                continue
+            stats.append((st.st_mtime, st.st_size, fname))
+        total = sum(size for _, size, _ in stats)
+        for _, size, fname in sorted(stats):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+            total -= size
+            logger.debug('evicted from cache: {f}'.format(f=fname))
+
+
+_solver_lang = {
+    'gr1c': 'gr1c', 'gr1py': 'gr1c', 'omega': 'gr1c',
+    'slugs': 'slugs', 'jtlv': 'jtlv'}
+
+
+def _canon_vars(d):
+    """Return sorted variable declarations, for hashing."""
+    r = list()
+    for var, dom in d.iteritems():
+        if isinstance(dom, set):
+            dom = sorted(dom)
+        elif isinstance(dom, tuple):
+            dom = ['range'] + list(dom)
+        r.append((var, dom))
+    return sorted(r)
+
+
+def _dump_strategy(A):
+    """Return compact representation of strategy C{A}.
+
+    @type A: C{networkx.DiGraph} or C{None}
+    @rtype: C{dict}
+    """
+    if A is None:
+        return None
+    if all(isinstance(u, (int, basestring)) for u in A):
+        ids = {u: u for u in A}
+    else:
+        ids = {u: i for i, u in enumerate(A)}
+    keys = list()
+    for _, d in A.nodes_iter(data=True):
+        keys = sorted(d['state'])
+        break
+    nodes = [
+        [ids[u], [d['state'][k] for k in keys],
+         [ids[v] for v in A.successors_iter(u)]]
+        for u, d in A.nodes_iter(data=True)]
+    return dict(vars=keys, nodes=nodes)
+
+
+def _load_strategy(d):
+    """Inverse of L{_dump_strategy}."""
+    if d is None:
+        return None
+    keys = [str(k) for k in d['vars']]
+    f = lambda u: str(u) if isinstance(u, unicode) else u
+    A = nx.DiGraph()
+    for u, values, succ in d['nodes']:
+        A.add_node(f(u), state=dict(zip(keys, values)))
+    for u, _, succ in d['nodes']:
+        A.add_edges_from((f(u), f(v)) for v in succ)
+    return A
+
+
 def mask_outputs(machine):
     """Erase outputs from each edge where they are zero."""
     for u, v, d in machine.edges_iter(data=True):
@@ -928,6 +928,45 @@ class LabeledDiGraph(nx.MultiDiGraph):
                 attr_dict.update(ndict)
             self.add_node(node, attr_dict=attr_dict, check=check)
 
+    def add_nodes_bulk(self, labeled_nbunch):
+        """Add many labeled nodes, validating each label once.
+
+        Faster alternative to L{add_nodes_from},
+        for loading large graphs.
+        Each distinct label C{dict} object is type-checked once,
+        so pass the same object for nodes with equal labels.
+        Each node gets its own copy of its label.
+        The label of an existing node is replaced.
+
+        @param labeled_nbunch: iterable of 2-tuples C{(n, label)}
+
+        @raise ValueError: a typed key has invalid value
+        @raise AttributeError: a label contains untyped keys
+        """
+        types = self._node_label_types
+        defaults = self._node_label_defaults
+        # id -> label, referencing labels keeps ids unique
+        checked = dict()
+        succ = self.succ
+        pred = self.pred
+        node = self.node
+        for n, label in labeled_nbunch:
+            if id(label) not in checked:
+                typed_attr = TypedDict()
+                typed_attr.set_types(types)
+                typed_attr.update(label)
+                self._check_for_untyped_keys(typed_attr, types, True)
+                checked[id(label)] = label
+            typed_attr = TypedDict()
+            typed_attr.set_types(types)
+            if defaults:
+                dict.update(typed_attr, copy.deepcopy(defaults))
+            dict.update(typed_attr, label)
+            if n not in succ:
+                succ[n] = dict()
+                pred[n] = dict()
+            node[n] = typed_attr
+
     def add_edge(self, u, v, key=None, attr_dict=None, check=True, **attr):
         """Use a L{TypedDict} as attribute dict.
 
@@ -1066,6 +1105,56 @@ class LabeledDiGraph(nx.MultiDiGraph):
             datadict.update(dd)
             self.add_edge(u, v, key=key, attr_dict=datadict, check=check)
 
+    def add_edges_bulk(self, labeled_ebunch):
+        """Add many labeled edges, validating each label once.
+
+        Faster alternative to L{add_edges_from},
+        for loading large graphs.
+        Each distinct label C{dict} object is type-checked once,
+        so pass the same object for edges with equal labels.
+        Each edge gets its own copy of its label.
+        The caller ensures that no edge is added twice.
+
+        @param labeled_ebunch: iterable of 3-tuples C{(u, v, label)},
+            where C{u} and C{v} are existing nodes
+
+        @raise ValueError: a node is missing,
+            or a typed key has invalid value
+        @raise AttributeError: a label contains untyped keys
+        """
+        types = self._edge_label_types
+        defaults = self._edge_label_defaults
+        # id -> label, referencing labels keeps ids unique
+        checked = dict()
+        succ = self.succ
+        pred = self.pred
+        for u, v, label in labeled_ebunch:
+            if u not in succ:
+                raise ValueError('Graph does not have node u: ' + str(u))
+            if v not in succ:
+                raise ValueError('Graph does not have node v: ' + str(v))
+            if id(label) not in checked:
+                typed_attr = TypedDict()
+                typed_attr.set_types(types)
+                typed_attr.update(label)
+                self._check_for_untyped_keys(typed_attr, types, True)
+                checked[id(label)] = label
+            typed_attr = TypedDict()
+            typed_attr.set_types(types)
+            if defaults:
+                dict.update(typed_attr, copy.deepcopy(defaults))
+            dict.update(typed_attr, label)
+            keydict = succ[u].get(v)
+            if keydict is None:
+                keydict = {0: typed_attr}
+                succ[u][v] = keydict
+                pred[v][u] = keydict
+            else:
+                key = len(keydict)
+                while key in keydict:
+                    key -= 1
+                keydict[key] = typed_attr
+
     def remove_labeled_edge(self, u, v, attr_dict=None, **attr):
         """Remove single labeled edge.
 
@@ -867,6 +867,117 @@ def mealy2moore(mealy):
     return moore
 
 
+def minimize(mealy):
+    """Return Mealy machine with equivalent states merged.
+
+    Two states are equivalent if they react to the same inputs
+    with the same outputs, and move to equivalent states.
+    The partition is refined as in Hopcroft's algorithm,
+    always splitting with the smaller half of a block,
+    so in O(m log n) time for m edges and n states.
+
+    A state with two edges that have the same label
+    (inputs and outputs) is nondeterministic,
+    and is kept as a singleton class.
+    Initial states are merged only with initial states.
+    Each class is named after one of its states,
+    preferably an initial one.
+
+    @type mealy: L{MealyMachine}
+
+    @rtype: L{MealyMachine}
+    """
+    if not isinstance(mealy, MealyMachine):
+        raise TypeError('mealy must be a MealyMachine')
+    keys = sorted(mealy.inputs) + sorted(mealy.outputs)
+    initial = mealy.states.initial
+    # letter = tuple of port values
+    out = dict()  # state -> {letter: successor}
+    pred = dict((u, list()) for u in mealy)  # state -> [(letter, pred)]
+    nondet = set()
+    for u in mealy:
+        succ = out[u] = dict()
+        for _, v, d in mealy.edges_iter(u, data=True):
+            a = tuple(d.get(k) for k in keys)
+            if a in succ:
+                nondet.add(u)
+            succ[a] = v
+            pred[v].append((a, u))
+    # initial partition: same letters enabled
+    blocks = list()
+    block_of = dict()
+    signatures = dict()
+    for u in mealy:
+        if u in nondet:
+            i = len(blocks)
+        else:
+            sig = (u in initial, frozenset(out[u]))
+            i = signatures.setdefault(sig, len(blocks))
+        if i == len(blocks):
+            blocks.append(set())
+        blocks[i].add(u)
+        block_of[u] = i
+    _refine(blocks, block_of, pred, nondet)
+    # quotient
+    rep = list()
+    for b in blocks:
+        init = [u for u in b if u in initial]
+        rep.append(init[0] if init else next(iter(b)))
+    new = MealyMachine()
+    new.add_inputs(mealy.inputs)
+    new.add_outputs(mealy.outputs)
+    new.states.add_from(rep)
+    new.states.initial.add_from(
+        set(rep[block_of[u]] for u in initial))
+    edges = list()
+    for u in rep:
+        seen = set()
+        for _, v, d in mealy.edges_iter(u, data=True):
+            v = rep[block_of[v]]
+            a = tuple(d.get(k) for k in keys)
+            if (a, v) in seen:
+                continue
+            seen.add((a, v))
+            edges.append((u, v, d))
+    new.add_edges_bulk(edges)
+    return new
+
+
+def _refine(blocks, block_of, pred, nondet):
+    """Split C{blocks} until stable, in place.
+
+    Splitting with a (possibly former) block that other blocks are
+    stable with respect to, by one of its halves suffices.
+    Edges leave a block all with the same letters,
+    except in singleton blocks of C{nondet} states.
+    """
+    waiting = set(range(len(blocks)))
+    while waiting:
+        b = waiting.pop()
+        # sources per letter, of edges into the splitter
+        sources = dict()
+        for v in blocks[b]:
+            for a, u in pred[v]:
+                if u not in nondet:
+                    sources.setdefault(a, set()).add(u)
+        for x in sources.itervalues():
+            touched = dict()
+            for u in x:
+                touched.setdefault(block_of[u], list()).append(u)
+            for c, part in touched.iteritems():
+                if len(part) == len(blocks[c]):
+                    continue
+                j = len(blocks)
+                blocks[c].difference_update(part)
+                blocks.append(set(part))
+                for u in part:
+                    block_of[u] = j
+                if c in waiting or len(part) < len(blocks[c]):
+                    waiting.add(j)
+                else:
+                    waiting.add(c)
+
+
 def _print_ports(port_dict):
     s = ''
     for port_name, port_type in port_dict.iteritems():